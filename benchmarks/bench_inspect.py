@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+# bench_inspect.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Benchmark of the header inspector.
+
+Times rominfo.inspect() on every file of a folder, once and then
+REPEATS more times, and reports the time per file. The inspector only
+reads headers, so the time should not grow with the size of the files.
+
+Usage:
+    bench_inspect.py [--corpus DIR] [--files N] [--size KIB] [-o FILE]
+
+Without --corpus, synthetic NSP/XCI-like files are generated.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import benchlib  # noqa: E402
+
+benchlib.import_app()
+
+from switchromtools.rominfo import inspect  # noqa: E402
+
+REPEATS = 5
+
+
+def inspect_all(files):
+    """Inspect every file; return the seconds each took and the failures."""
+    times = []
+    failed = 0
+    for path in files:
+        started = time.perf_counter()
+        if inspect(path) is None:
+            failed += 1
+        times.append(time.perf_counter() - started)
+    return times, failed
+
+
+def result(name, times, failed):
+    micro = benchlib.percentiles([value * 1e6 for value in times])
+    total = sum(times)
+    return {
+        "case": name,
+        "files": len(times),
+        "failed": failed,
+        "seconds": round(total, 6),
+        "files_per_second": round(len(times) / total) if total else None,
+        "per_file_us": {key: round(value, 1) for key, value in micro.items()},
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the header inspector.")
+    parser.add_argument("--corpus", help="folder of real titles instead of synthetic files")
+    parser.add_argument("--files", type=int, default=1000, help="synthetic files")
+    parser.add_argument("--size", type=int, default=256, help="KiB per synthetic file")
+    parser.add_argument("--work-dir", help="folder for the fixtures "
+                                           "(default: a temporary folder)")
+    parser.add_argument("-o", "--output", help="write the JSON report to a file")
+    args = parser.parse_args(argv[1:])
+
+    work_dir = None
+    if args.corpus:
+        files = sorted(
+            os.path.join(args.corpus, name) for name in os.listdir(args.corpus)
+            if name.lower().endswith((".nsp", ".nsz", ".xci", ".xcz"))
+        )
+        fixtures = {"corpus": os.path.abspath(args.corpus)}
+    else:
+        work_dir = args.work_dir or tempfile.mkdtemp(prefix="switchromtools-bench-")
+        benchlib.log(f"Writing {args.files} × {args.size} KiB fixtures")
+        files = benchlib.make_fixtures(
+            os.path.join(work_dir, "fixtures"), args.files, args.size * 1024
+        )
+        fixtures = {"synthetic": True, "files": args.files, "size_kib": args.size}
+    if not files:
+        benchlib.log("No files to inspect")
+        return 1
+
+    results = [result("first", *inspect_all(files))]
+    times = []
+    for _ in range(REPEATS):
+        repeat, failed = inspect_all(files)
+        times.extend(repeat)
+    results.append(result("repeated", times, failed))
+
+    for entry in results:
+        benchlib.log(
+            f"{entry['case']:>9}: {entry['per_file_us']['p50']:8.1f} µs per file "
+            f"(p95 {entry['per_file_us']['p95']:.1f}), {entry['failed']} unreadable"
+        )
+
+    if work_dir and not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    benchlib.write_report(
+        "inspect", results, args.output, fixtures=fixtures, repeats=REPEATS
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
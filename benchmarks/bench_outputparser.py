@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+# bench_outputparser.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Micro-benchmark for the PTY output line splitter.
+
+Feeds nsz output through LineSplitter and through the old bytes
+concatenation loop, in READ_BUFFER_SIZE chunks like the PTY reader.
+A third case also classifies every line like a running job and parses
+every progress line; the window only parses the latest one per frame,
+so this is the worst case.
+
+Usage:
+    bench_outputparser.py [RECORDING] [-o FILE]
+
+RECORDING is a raw capture of an nsz run, for example made with
+`script -q -c "nsz -C -V game.nsp" nsz.log`. Without it a synthetic
+capture in nsz's tqdm format is used. The JSON report goes to stdout
+or FILE.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import benchlib  # noqa: E402
+
+benchlib.import_app()
+
+from switchromtools.core import is_keys_error, is_progress_line  # noqa: E402
+from switchromtools.outputparser import (  # noqa: E402
+    LineSplitter,
+    parse_progress_line,
+)
+
+READ_BUFFER_SIZE = 4096
+REPEATS = 5
+
+
+def synthetic_recording(redraws=200000):
+    """Build output shaped like nsz -C -V: log lines and progress redraws."""
+    parts = [
+        b"Compressing /roms/Game [0100000000010000][v0].nsp\n",
+        b"[NCA] 0123456789abcdef0123456789abcdef.nca\n",
+    ]
+    total = 2.67
+    for i in range(redraws):
+        pct = i * 100 // redraws
+        done = total * i / redraws
+        bar = "█" * (pct // 10) + " " * (10 - pct // 10)
+        parts.append(
+            f"Compress {pct:3d}%|{bar}| {done:.2f}G/{total}G "
+            f"[00:{i % 60:02d}<00:{(60 - i) % 60:02d}, 253.83 MiB/s]\r"
+            .encode("utf-8")
+        )
+        if i % 5000 == 0:
+            parts.append(b"[VERIFY] Section 0 hash OK\n")
+    parts.append(b"\nDone!\n")
+    return b"".join(parts)
+
+
+def legacy_split(data):
+    """The pre-LineSplitter loop from _read_process_output_with_select."""
+    lines = 0
+    output_buffer = b""
+    for offset in range(0, len(data), READ_BUFFER_SIZE):
+        output_buffer += data[offset:offset + READ_BUFFER_SIZE]
+        while b'\n' in output_buffer or b'\r' in output_buffer:
+            newline_pos = output_buffer.find(b'\n')
+            carriage_pos = output_buffer.find(b'\r')
+            if newline_pos == -1:
+                split_pos = carriage_pos
+            elif carriage_pos == -1:
+                split_pos = newline_pos
+            else:
+                split_pos = min(newline_pos, carriage_pos)
+            line_bytes = output_buffer[:split_pos]
+            output_buffer = output_buffer[split_pos + 1:]
+            line_bytes.decode('utf-8', errors='replace').strip()
+            lines += 1
+    return lines
+
+
+def splitter_split(data):
+    lines = 0
+    splitter = LineSplitter()
+    for offset in range(0, len(data), READ_BUFFER_SIZE):
+        lines += len(splitter.feed(data[offset:offset + READ_BUFFER_SIZE]))
+    splitter.flush()
+    return lines
+
+
+def splitter_parse(data):
+    """Split and parse progress, as _process_output_line does."""
+    lines = 0
+    splitter = LineSplitter()
+    for offset in range(0, len(data), READ_BUFFER_SIZE):
+        for line, is_carriage in splitter.feed(data[offset:offset + READ_BUFFER_SIZE]):
+            if line and not is_keys_error(line) and is_progress_line(line):
+                parse_progress_line(line)
+            lines += 1
+    splitter.flush()
+    return lines
+
+
+def best_of(func, data):
+    best = None
+    lines = 0
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        lines = func(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, lines
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the PTY line parser.")
+    parser.add_argument("recording", nargs="?", help="raw capture of an nsz run")
+    parser.add_argument("-o", "--output", help="write the JSON report to a file")
+    args = parser.parse_args(argv[1:])
+
+    if args.recording:
+        with open(args.recording, "rb") as f:
+            data = f.read()
+    else:
+        data = synthetic_recording()
+
+    size_mib = len(data) / 1024 ** 2
+    benchlib.log(f"input: {size_mib:.1f} MiB, best of {REPEATS}")
+
+    results = []
+    for name, func in (
+        ("legacy", legacy_split),
+        ("LineSplitter", splitter_split),
+        ("LineSplitter+parse", splitter_parse),
+    ):
+        elapsed, lines = best_of(func, data)
+        benchlib.log(
+            f"{name:>18}: {elapsed * 1000:8.1f} ms  "
+            f"{size_mib / elapsed:8.1f} MiB/s  {lines} lines"
+        )
+        results.append({
+            "case": name,
+            "seconds": round(elapsed, 6),
+            "lines": lines,
+            "mib_per_second": round(size_mib / elapsed, 2),
+            "lines_per_second": round(lines / elapsed),
+        })
+
+    benchlib.write_report(
+        "outputparser", results, args.output,
+        input={
+            "recording": os.path.basename(args.recording) if args.recording else None,
+            "bytes": len(data),
+        },
+        repeats=REPEATS
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+
+# bench_pipeline.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Benchmark of whole conversion batches.
+
+Runs ConversionRunner over a set of files for every combination of
+the given levels, block modes, thread budgets and parallel jobs, then
+decompresses the outputs of each compression case. For every case it
+records wall time, throughput, CPU utilization and peak RSS of the app
+and its nsz processes, and the latency of a UI thread that drains
+progress like the app's window does.
+
+Usage:
+    bench_pipeline.py [--corpus DIR] [--nsz PATH] [--engine] [-o FILE] ...
+
+Without --corpus, synthetic NSP/XCI-like files are generated, which
+only the bundled simnsz.py stand-in can "convert"; it is the default
+nsz then. With a local corpus of real titles (and prod.keys), pass
+--nsz for the real nsz command, or --engine for the nsz engine. Runs
+offline either way. Run with --help for all options.
+"""
+
+import argparse
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import benchlib  # noqa: E402
+
+benchlib.import_app()
+
+from switchromtools.core import (  # noqa: E402
+    ConversionRunner,
+    FileList,
+    RunnerListener,
+    OUTPUT_EXTENSIONS,
+)
+from switchromtools.nszoptions import (  # noqa: E402
+    ConversionOptions,
+    MODE_COMPRESS,
+    MODE_DECOMPRESS,
+)
+from switchromtools.outputparser import parse_progress_line  # noqa: E402
+from switchromtools.planner import ThroughputHistory  # noqa: E402
+from switchromtools.scheduler import JOB_DONE  # noqa: E402
+from switchromtools.uichannel import UpdateChannel  # noqa: E402
+
+SIM_NSZ = os.path.join(benchlib.BENCH_DIR, "simnsz.py")
+UI_FRAME_RATE = 30  # as in main.py
+DEFAULT_FILES = 4
+DEFAULT_SIZE = 64  # MiB per synthetic file
+
+
+class UiProbe(RunnerListener):
+    """
+    Stands in for the window: posts to an UpdateChannel and drains it on
+    a UI thread at UI_FRAME_RATE, timing how late each frame is and how
+    long draining takes.
+    """
+
+    def __init__(self):
+        self.channel = UpdateChannel()
+        self.lateness = []
+        self.drain_times = []
+        self.errors = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def on_log(self, text, level=None, section=None):
+        self.channel.post_log(text, level, section)
+        if text.startswith(("✗", "❌", "Error")):
+            self.errors.append(text)
+
+    def on_job_started(self, job):
+        self.channel.post_call(lambda: None)
+
+    def on_job_progress(self, job, progress):
+        self.channel.post_progress(job, progress)
+
+    def on_job_finished(self, job):
+        self.channel.post_call(lambda: None)
+
+    def _run(self):
+        interval = 1 / UI_FRAME_RATE
+        due = time.perf_counter() + interval
+        while not self._stop.is_set():
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            woke = time.perf_counter()
+            self.lateness.append(max(0.0, woke - due))
+
+            calls, progress, logs = self.channel.drain()
+            for func, args in calls:
+                func(*args)
+            for value in progress.values():
+                # nsz commands post their progress bar, the engine parsed values
+                if isinstance(value, str):
+                    parse_progress_line(value)
+            self.drain_times.append(time.perf_counter() - woke)
+            due = max(due + interval, woke)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        lateness = benchlib.percentiles([value * 1000 for value in self.lateness])
+        drain = benchlib.percentiles([value * 1000 for value in self.drain_times])
+        return {
+            "frames": len(self.lateness),
+            "ui_latency_ms": {key: _round(value) for key, value in lateness.items()},
+            "ui_drain_ms": {key: _round(value) for key, value in drain.items()},
+            "progress_posted": self.channel.progress_posted,
+            "progress_merged": self.channel.progress_merged,
+        }
+
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
+
+
+def run_case(files, options, workers, engine, nsz, work_dir):
+    """Convert files once and return the measurements."""
+    listener = UiProbe()
+    runner = ConversionRunner(
+        options,
+        workers=workers,
+        use_engine=engine,
+        listener=listener,
+        throughput=ThroughputHistory(os.path.join(work_dir, "throughput.json")),
+        nsz_binary=nsz
+    )
+    sampler = benchlib.ResourceSampler()
+
+    listener.start()
+    sampler.start()
+    started = time.perf_counter()
+    result = runner.run(FileList(files, os.path.dirname(files[0])))
+    wall = time.perf_counter() - started
+    resources = sampler.stop()
+    ui = listener.stop()
+
+    size = sum(os.path.getsize(path) for path in files if os.path.exists(path))
+    done = sum(1 for job in runner.jobs if job.status == JOB_DONE)
+    return {
+        "result": result,
+        "files": len(files),
+        "done": done,
+        "input_bytes": size,
+        "wall_seconds": round(wall, 3),
+        "throughput_mib_s": round(size / 1024 ** 2 / wall, 2) if wall else None,
+        **resources,
+        **ui,
+        "errors": listener.errors[:5],
+    }
+
+
+def outputs_of(files, folder):
+    paths = []
+    for path in files:
+        root, ext = os.path.splitext(os.path.basename(path))
+        paths.append(os.path.join(folder, root + OUTPUT_EXTENSIONS.get(ext.lower(), ext)))
+    return paths
+
+
+def parse_list(text, type_=int):
+    return [type_(value) for value in text.split(",") if value]
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark conversion batches.")
+    parser.add_argument("--corpus", help="folder of real titles instead of synthetic files")
+    parser.add_argument("--files", type=int, default=DEFAULT_FILES,
+                        help=f"synthetic files (default: {DEFAULT_FILES})")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE,
+                        help=f"MiB per synthetic file (default: {DEFAULT_SIZE})")
+    parser.add_argument("--levels", default="3,18", help="compression levels")
+    parser.add_argument("--modes", default="solid", help="solid and/or block")
+    parser.add_argument("--threads", default="0", help="thread budgets, 0 = all cores")
+    parser.add_argument("--jobs", default="1,2", help="parallel jobs")
+    parser.add_argument("--no-decompress", action="store_true",
+                        help="skip the decompression cases")
+    parser.add_argument("--nsz", help="nsz command (default: simnsz.py for "
+                                      "synthetic files, the app's nsz for a corpus)")
+    parser.add_argument("--engine", action="store_true", help="use the nsz engine")
+    parser.add_argument("--work-dir", help="folder for fixtures and outputs "
+                                           "(default: a temporary folder)")
+    parser.add_argument("-o", "--output", help="write the JSON report to a file")
+    args = parser.parse_args(argv[1:])
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="switchromtools-bench-")
+    os.makedirs(work_dir, exist_ok=True)
+    # Earlier measurements of the app must not leak in, nor be overwritten
+    os.environ["XDG_DATA_HOME"] = os.path.join(work_dir, "data")
+
+    if args.corpus:
+        files = sorted(
+            os.path.join(args.corpus, name) for name in os.listdir(args.corpus)
+            if name.lower().endswith((".nsp", ".xci"))
+        )
+        nsz = args.nsz
+        fixtures = {"corpus": os.path.abspath(args.corpus)}
+    else:
+        benchlib.log(f"Writing {args.files} × {args.size} MiB fixtures")
+        files = benchlib.make_fixtures(
+            os.path.join(work_dir, "fixtures"), args.files, args.size * 1024 ** 2
+        )
+        nsz = args.nsz or SIM_NSZ
+        fixtures = {"synthetic": True, "files": args.files, "size_mib": args.size}
+    if not files:
+        benchlib.log("No files to convert")
+        return 1
+
+    results = []
+    cases = itertools.product(
+        parse_list(args.levels),
+        parse_list(args.modes, str),
+        parse_list(args.threads),
+        parse_list(args.jobs),
+    )
+    for level, block_mode, threads, workers in cases:
+        out_dir = os.path.join(work_dir, "out")
+        back_dir = os.path.join(work_dir, "back")
+        for folder in (out_dir, back_dir):
+            shutil.rmtree(folder, ignore_errors=True)
+            os.makedirs(folder)
+
+        case = {
+            "level": level,
+            "solid": block_mode == "solid",
+            "threads": threads,
+            "workers": workers,
+            "engine": args.engine,
+        }
+        options = ConversionOptions(
+            MODE_COMPRESS, level=level, solid=case["solid"],
+            threads=threads, output_dir=out_dir
+        )
+        benchlib.log(f"compress {case}")
+        measured = run_case(files, options, workers, args.engine, nsz, work_dir)
+        results.append({"mode": MODE_COMPRESS, **case, **measured})
+        benchlib.log(
+            f"  {measured['throughput_mib_s']} MiB/s in {measured['wall_seconds']} s, "
+            f"UI p95 {measured['ui_latency_ms']['p95']} ms"
+        )
+
+        compressed = [path for path in outputs_of(files, out_dir) if os.path.exists(path)]
+        if args.no_decompress or not compressed:
+            continue
+        options = ConversionOptions(
+            MODE_DECOMPRESS, threads=threads, output_dir=back_dir
+        )
+        benchlib.log(f"decompress {case}")
+        measured = run_case(compressed, options, workers, args.engine, nsz, work_dir)
+        results.append({"mode": MODE_DECOMPRESS, **case, **measured})
+
+    if not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    benchlib.write_report(
+        "pipeline", results, args.output,
+        fixtures=fixtures,
+        nsz="engine" if args.engine else os.path.basename(nsz or "nsz")
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+# bench_scan.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Benchmark of file discovery on large folder trees.
+
+Times what BaseConvertPage.get_input_files() and count_input_files()
+do, a query of the scan index, on a synthetic tree: a cold query that
+reads the tree, warm queries answered from memory, a deeper query
+after a shallow one, and a background FileScan as a batch uses it.
+
+Usage:
+    bench_scan.py [--dirs N] [--files N] [--depth N] [-o FILE]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import benchlib  # noqa: E402
+
+benchlib.import_app()
+
+from switchromtools.core import INPUT_EXTENSIONS  # noqa: E402
+from switchromtools.nszoptions import MODE_COMPRESS  # noqa: E402
+from switchromtools.scanindex import FileScan, ScanIndex  # noqa: E402
+
+REPEATS = 5
+
+
+def timed(func):
+    start = time.perf_counter()
+    value = func()
+    return time.perf_counter() - start, value
+
+
+def best_of(func):
+    best = None
+    value = None
+    for _ in range(REPEATS):
+        elapsed, value = timed(func)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def run_scan(root, exts, depth):
+    scan = FileScan(ScanIndex(root), exts, depth)
+    scan.start()
+    found = 0
+    for batch in scan.iter_batches():
+        found += len(batch)
+    return found
+
+
+def result(name, seconds, files):
+    return {
+        "case": name,
+        "seconds": round(seconds, 6),
+        "files": files,
+        "files_per_second": round(files / seconds) if seconds else None,
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark file discovery.")
+    parser.add_argument("--dirs", type=int, default=8, help="subfolders per folder")
+    parser.add_argument("--files", type=int, default=40, help="files per folder")
+    parser.add_argument("--depth", type=int, default=3, help="levels of subfolders")
+    parser.add_argument("--work-dir", help="folder for the tree "
+                                           "(default: a temporary folder)")
+    parser.add_argument("-o", "--output", help="write the JSON report to a file")
+    args = parser.parse_args(argv[1:])
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="switchromtools-bench-")
+    root = os.path.join(work_dir, "tree")
+    shutil.rmtree(root, ignore_errors=True)
+    created = benchlib.make_tree(root, args.dirs, args.files, args.depth)
+    benchlib.log(f"Created {created} files below {root}")
+
+    exts = INPUT_EXTENSIONS[MODE_COMPRESS]
+    depth = args.depth
+    results = []
+
+    # Cold: a new index reads every folder
+    seconds, files = best_of(lambda: ScanIndex(root).files(exts, depth))
+    results.append(result("cold", seconds, len(files)))
+
+    index = ScanIndex(root)
+    index.files(exts, depth)
+    seconds, files = best_of(lambda: index.files(exts, depth))
+    results.append(result("warm", seconds, len(files)))
+
+    seconds, count = best_of(lambda: index.count(exts, depth))
+    results.append(result("warm count", seconds, count))
+
+    def deepen():
+        index = ScanIndex(root)
+        index.files(exts, 0)
+        return index.files(exts, depth)
+
+    seconds, files = best_of(deepen)
+    results.append(result("shallow then deep", seconds, len(files)))
+
+    seconds, found = best_of(lambda: run_scan(root, exts, depth))
+    results.append(result("background scan", seconds, found))
+
+    for entry in results:
+        benchlib.log(
+            f"{entry['case']:>18}: {entry['seconds'] * 1000:9.2f} ms  "
+            f"{entry['files']} files"
+        )
+
+    if not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    benchlib.write_report(
+        "scan", results, args.output,
+        tree={
+            "dirs": args.dirs,
+            "files_per_dir": args.files,
+            "depth": args.depth,
+            "files": created,
+        },
+        repeats=REPEATS
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
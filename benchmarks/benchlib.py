@@ -0,0 +1,321 @@
+# benchlib.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Shared helpers of the benchmarks: importing the app from the source
+tree, synthetic ROM fixtures, resource sampling and JSON reports.
+"""
+
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+PACKAGE = "switchromtools"
+REPORT_VERSION = 1
+
+SAMPLE_INTERVAL = 0.1  # seconds between resource samples
+FIXTURE_BLOCK = 64 * 1024
+FIXTURE_COMPRESSIBLE = 0.3  # share of blocks that compress well, like game data
+
+
+def import_app():
+    """
+    Make the app importable as its package.
+
+    The sources live in src/, so the package is linked into a temporary
+    folder under its real name. nsz engine workers get that folder on
+    their path from the engine, so they import the same sources.
+    """
+    if PACKAGE in sys.modules:
+        return
+    parent = tempfile.mkdtemp(prefix="switchromtools-bench-")
+    os.symlink(SRC_DIR, os.path.join(parent, PACKAGE))
+    atexit.register(shutil.rmtree, parent, True)
+    sys.path.insert(0, parent)
+
+
+def machine_info():
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_report(suite, results, output=None, **extra):
+    """
+    Print or save a machine-readable report.
+
+    Args:
+        suite: Name of the benchmark
+        results: List of result dicts, one per case
+        output: File to write, or None for stdout
+    """
+    report = {
+        "suite": suite,
+        "version": REPORT_VERSION,
+        "time": time.time(),
+        "machine": machine_info(),
+        **extra,
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return report
+
+
+def log(text):
+    """Human-readable progress goes to stderr, reports to stdout."""
+    print(text, file=sys.stderr, flush=True)
+
+
+# ---------- Fixtures ---------- #
+
+def _payload(rng, size):
+    blocks = []
+    for offset in range(0, size, FIXTURE_BLOCK):
+        length = min(FIXTURE_BLOCK, size - offset)
+        if rng.random() < FIXTURE_COMPRESSIBLE:
+            blocks.append(bytes([rng.randrange(16)]) * length)
+        else:
+            blocks.append(rng.randbytes(length))
+    return b"".join(blocks)
+
+
+def _file_system(magic, entry, names_and_sizes):
+    string_table = b""
+    entries = b""
+    offset = 0
+    for name, size in names_and_sizes:
+        entries += entry(offset, size, len(string_table))
+        string_table += name.encode() + b"\0"
+        offset += size
+    string_table += b"\0" * (-len(string_table) % 0x20)
+    return (
+        magic
+        + struct.pack("<III", len(names_and_sizes), len(string_table), 0)
+        + entries
+        + string_table
+    )
+
+
+def _pfs0(names_and_sizes):
+    """PFS0 header (the container of an NSP) for the given files."""
+    return _file_system(
+        b"PFS0",
+        lambda offset, size, name: struct.pack("<QQII", offset, size, name, 0),
+        names_and_sizes
+    )
+
+
+def _hfs0(names_and_sizes):
+    """HFS0 header (a partition of an XCI) for the given files."""
+    return _file_system(
+        b"HFS0",
+        lambda offset, size, name: struct.pack("<QQII8x32x", offset, size, name, 0),
+        names_and_sizes
+    )
+
+
+def write_fixture(path, size, seed=0):
+    """
+    Write an NSP or XCI shaped file of about size bytes.
+
+    The contents are not a real title: a PFS0 (NSP) or an XCI header
+    with a secure HFS0 partition, holding one NCA of data that
+    compresses roughly like game data. Enough for the pipeline and the
+    header inspector, not for nsz itself.
+    """
+    rng = random.Random(f"{seed}:{os.path.basename(path)}")
+    payload = _payload(rng, size)
+    nca = f"{rng.getrandbits(128):032x}.nca"
+
+    with open(path, "wb") as f:
+        if path.lower().endswith(".xci"):
+            header = bytearray(0x200)
+            header[0x100:0x104] = b"HEAD"
+            secure = _hfs0([(nca, len(payload))])
+            struct.pack_into("<Q", header, 0x130, len(header))
+            f.write(bytes(header))
+            f.write(_hfs0([("secure", len(secure) + len(payload))]))
+            f.write(secure)
+        else:
+            f.write(_pfs0([(nca, len(payload))]))
+        f.write(payload)
+
+
+def make_fixtures(folder, count, size, exts=(".nsp", ".xci")):
+    """Create count fixtures in folder, alternating between exts."""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(count):
+        ext = exts[i % len(exts)]
+        path = os.path.join(folder, f"Bench Title {i:03d} [01000000{i:04X}0000][v0]{ext}")
+        if not os.path.exists(path) or os.path.getsize(path) < size:
+            write_fixture(path, size, seed=i)
+        paths.append(path)
+    return paths
+
+
+def make_tree(root, dirs, files_per_dir, depth, exts=(".nsp", ".xci", ".nsz", ".txt")):
+    """
+    Create an empty-file directory tree for scan benchmarks.
+
+    Args:
+        root: Folder to create it in
+        dirs: Subfolders per folder
+        files_per_dir: Files per folder
+        depth: Levels of subfolders below root
+
+    Returns:
+        Number of files created
+    """
+    created = 0
+
+    def fill(folder, level):
+        nonlocal created
+        os.makedirs(folder, exist_ok=True)
+        for i in range(files_per_dir):
+            ext = exts[i % len(exts)]
+            open(os.path.join(folder, f"file {i:04d}{ext}"), "wb").close()
+            created += 1
+        if level < depth:
+            for i in range(dirs):
+                fill(os.path.join(folder, f"dir {i:02d}"), level + 1)
+
+    fill(root, 0)
+    return created
+
+
+# ---------- Measurements ---------- #
+
+def percentiles(values, points=(50, 95, 99)):
+    if not values:
+        return {f"p{point}": None for point in points} | {"max": None}
+    values = sorted(values)
+    result = {
+        f"p{point}": values[min(len(values) - 1, len(values) * point // 100)]
+        for point in points
+    }
+    result["max"] = values[-1]
+    return result
+
+
+def _read_stat(pid):
+    """(ppid, cpu ticks, rss pages) of a process, or None."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces; fields start after it
+    fields = data[data.rindex(")") + 2:].split()
+    return int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[21])
+
+
+class ResourceSampler:
+    """
+    Samples the CPU time and memory of this process and its descendants.
+
+    nsz processes and engine workers are children of the benchmark, so
+    their CPU time and RSS count too. A process that exits between two
+    samples loses at most SAMPLE_INTERVAL of CPU time.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak_rss = 0
+        self._ticks = {}   # pid -> last seen CPU ticks
+        self._start = {}   # pid -> CPU ticks when first seen before start
+        self._stop = threading.Event()
+        self._thread = None
+        self._tick_rate = os.sysconf("SC_CLK_TCK")
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+
+    def _tree(self):
+        stats = {}
+        for name in os.listdir("/proc"):
+            if name.isdigit():
+                stat = _read_stat(int(name))
+                if stat:
+                    stats[int(name)] = stat
+
+        tree = {os.getpid()}
+        changed = True
+        while changed:
+            changed = False
+            for pid, (ppid, _, _) in stats.items():
+                if ppid in tree and pid not in tree:
+                    tree.add(pid)
+                    changed = True
+        return {pid: stats[pid] for pid in tree if pid in stats}
+
+    def _sample(self):
+        rss = 0
+        for pid, (_, ticks, pages) in self._tree().items():
+            self._ticks[pid] = ticks
+            rss += pages * self._page_size
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._start = {pid: ticks for pid, (_, ticks, _) in self._tree().items()}
+        self._ticks = dict(self._start)
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Returns:
+            Dict with cpu_seconds, cpu_percent (of all cores) and
+            peak_rss_mib
+        """
+        self._sample()
+        self._stop.set()
+        self._thread.join()
+        wall = max(time.monotonic() - self._started, 1e-6)
+        ticks = sum(
+            ticks - self._start.get(pid, 0) for pid, ticks in self._ticks.items()
+        )
+        cpu = ticks / self._tick_rate
+        return {
+            "cpu_seconds": round(cpu, 3),
+            "cpu_percent": round(100 * cpu / wall / (os.cpu_count() or 1), 1),
+            "peak_rss_mib": round(self.peak_rss / 1024 ** 2, 1),
+        }
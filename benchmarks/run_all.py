@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+# run_all.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Run every benchmark and combine their reports into one JSON document,
+for comparing runs over time.
+
+Usage:
+    run_all.py [--quick] [-o FILE]
+
+--quick uses small fixtures, for checking that the suite works rather
+than for numbers worth comparing.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import benchlib  # noqa: E402
+
+SUITES = {
+    "outputparser": ("bench_outputparser.py", [], []),
+    "scan": ("bench_scan.py", [], ["--dirs", "4", "--files", "20", "--depth", "2"]),
+    "inspect": ("bench_inspect.py", [], ["--files", "50", "--size", "64"]),
+    "pipeline": (
+        "bench_pipeline.py",
+        [],
+        ["--files", "2", "--size", "8", "--levels", "3", "--jobs", "1"],
+    ),
+}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Run all benchmarks.")
+    parser.add_argument("--quick", action="store_true", help="small fixtures")
+    parser.add_argument("--only", action="append", choices=sorted(SUITES),
+                        help="run only this suite (repeatable)")
+    parser.add_argument("-o", "--output", help="write the JSON report to a file")
+    args = parser.parse_args(argv[1:])
+
+    reports = {}
+    failed = []
+    with tempfile.TemporaryDirectory(prefix="switchromtools-bench-") as folder:
+        for name in args.only or SUITES:
+            script, full_args, quick_args = SUITES[name]
+            output = os.path.join(folder, f"{name}.json")
+            command = [
+                sys.executable, os.path.join(benchlib.BENCH_DIR, script),
+                *(quick_args if args.quick else full_args),
+                "-o", output,
+            ]
+            benchlib.log(f"--- {name} ---")
+            started = time.monotonic()
+            if subprocess.run(command).returncode != 0:
+                failed.append(name)
+                continue
+            with open(output) as f:
+                reports[name] = json.load(f)
+            benchlib.log(f"{name} took {time.monotonic() - started:.1f} s")
+
+    document = {
+        "version": benchlib.REPORT_VERSION,
+        "time": time.time(),
+        "machine": benchlib.machine_info(),
+        "quick": args.quick,
+        "failed": failed,
+        "suites": reports,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+# simnsz.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Stand-in for the nsz command, for benchmarks without keys or titles.
+
+Takes the nsz arguments the app passes, streams each input through
+zlib (the level is scaled from zstd's 1-22 to zlib's 1-9) on up to -t
+threads, writes the output nsz would and draws nsz's tqdm progress bar
+on stdout. Decompression hashes what it writes and reports it verified
+like nsz, and -V without -C or -D reads a file back. The work is
+comparable, the output format is not.
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 1024 ** 2
+PROGRESS_INTERVAL = 0.1  # seconds between progress redraws, like tqdm
+OUTPUT_EXTENSIONS = {".nsp": ".nsz", ".xci": ".xcz", ".nsz": ".nsp", ".xcz": ".xci"}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="simnsz")
+    parser.add_argument("-C", dest="compress", action="store_true")
+    parser.add_argument("-D", dest="decompress", action="store_true")
+    parser.add_argument("-l", "--level", type=int, default=18)
+    parser.add_argument("-S", "--solid", action="store_true")
+    parser.add_argument("-B", "--block", action="store_true")
+    parser.add_argument("-V", "--verify", action="store_true")
+    parser.add_argument("-t", "--threads", type=int, default=0)
+    parser.add_argument("-o", "--output")
+    parser.add_argument("--rm-source", action="store_true")
+    parser.add_argument("files", nargs="+")
+    return parser.parse_args(argv)
+
+
+def draw(label, done, total, started):
+    elapsed = max(time.monotonic() - started, 1e-6)
+    rate = done / elapsed
+    remaining = int((total - done) / rate) if rate else 0
+    pct = done * 100 // max(total, 1)
+    bar = "█" * (pct // 10) + " " * (10 - pct // 10)
+    sys.stdout.write(
+        f"{label} {pct:3d}%|{bar}| {done / 1024 ** 3:.2f}G/{total / 1024 ** 3:.2f}G "
+        f"[{int(elapsed) // 60:02d}:{int(elapsed) % 60:02d}<"
+        f"{remaining // 60:02d}:{remaining % 60:02d}, {rate / 1024 ** 2:.2f} MiB/s]\r"
+    )
+    sys.stdout.flush()
+
+
+def convert(path, args):
+    root, ext = os.path.splitext(path)
+    output = root + OUTPUT_EXTENSIONS.get(ext.lower(), ext)
+    if args.output:
+        output = os.path.join(args.output, os.path.basename(output))
+    if os.path.exists(output):
+        print(f"{output} already exists, skipping")
+        return
+
+    level = max(1, min(9, (args.level + 1) * 9 // 22))
+    threads = args.threads or os.cpu_count() or 1
+    label = "Compress" if args.compress else "Decompress"
+    total = os.path.getsize(path)
+
+    digest = hashlib.sha256()
+
+    def work(chunk):
+        if args.compress:
+            return zlib.compress(chunk, level)
+        # Decompression is mostly I/O and hashing
+        return chunk
+
+    print(f"{'Compressing' if args.compress else 'Decompressing'} {path}")
+    started = time.monotonic()
+    drawn = 0.0
+    done = 0
+    with open(path, "rb") as src, open(output, "wb") as dst, \
+            ThreadPoolExecutor(threads) as pool:
+        while True:
+            chunks = [src.read(CHUNK_SIZE) for _ in range(threads)]
+            chunks = [chunk for chunk in chunks if chunk]
+            if not chunks:
+                break
+            for chunk, result in zip(chunks, pool.map(work, chunks)):
+                dst.write(result)
+                if args.decompress:
+                    digest.update(result)
+                done += len(chunk)
+            now = time.monotonic()
+            if now - drawn >= PROGRESS_INTERVAL:
+                draw(label, done, total, started)
+                drawn = now
+    draw(label, total, total, started)
+    sys.stdout.write("\n")
+
+    if args.decompress:
+        print(f"[NCA HASH]   {digest.hexdigest()}")
+        print(f"[VERIFIED]   {os.path.basename(output)}")
+    elif args.verify:
+        verify(output)
+    if args.rm_source:
+        os.remove(path)
+    print("Done!")
+
+
+def verify(path):
+    """Read a file back and hash it, like nsz -V."""
+    print(f"[VERIFY] {path}")
+    total = os.path.getsize(path)
+    digest = hashlib.sha256()
+    started = time.monotonic()
+    drawn = 0.0
+    done = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+            done += len(chunk)
+            now = time.monotonic()
+            if now - drawn >= PROGRESS_INTERVAL:
+                draw("Verifying", done, total, started)
+                drawn = now
+    draw("Verifying", total, total, started)
+    sys.stdout.write("\n")
+    print(f"[VERIFIED]   {os.path.basename(path)}")
+
+
+def main(argv):
+    args = parse_args(argv)
+    for path in args.files:
+        if args.compress or args.decompress:
+            convert(path, args)
+        else:
+            verify(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
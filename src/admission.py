@@ -0,0 +1,214 @@
+# admission.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Free-space admission control.
+
+Before a job starts, the space its output is expected to take is
+reserved on every file system it writes to. The job only starts when
+the free space statvfs reports covers it on top of what running jobs
+still have reserved. An output that is being written already shows in
+the free space, so a reservation shrinks by what its file holds on
+disk. Jobs that do not fit wait for running jobs to finish (and delete
+their sources); when no job is running, nothing will make room, and a
+job that does not fit is failed without being started.
+
+Expected sizes err on the large side: a compressed title is assumed
+not to shrink unless it was sampled or probed before.
+"""
+
+import os
+import threading
+
+from .leveltuner import get_tuning_memory, title_key
+from .nszoptions import MODE_DECOMPRESS, MODE_RECOMPRESS
+from .placement import filesystem, free_space
+
+FREE_SPACE_HEADROOM = 64 * 1024 ** 2  # bytes left free on every file system
+SPACE_MARGIN = 0.02                   # share reserved on top of an expected size
+
+
+def expected_output_size(job, options, info, memory=None):
+    """
+    Bytes the output of a job may take, erring on the large side.
+
+    Args:
+        job: ConversionJob with its size
+        options: ConversionOptions of the batch
+        info: RomInfo of the job's file, or None
+        memory: TuningMemory, None for the shared one
+
+    Returns:
+        Bytes
+    """
+    if options.mode == MODE_DECOMPRESS:
+        return info.uncompressed_size if info else job.size
+
+    memory = memory or get_tuning_memory()
+    key = title_key(job.path)
+    ratio = memory.sampled_ratio(key, options.level)
+    if ratio is None:
+        # A fast probe shrinks a title less than the chosen level would
+        ratio = memory.probe_ratio(key)
+    if options.mode == MODE_RECOMPRESS:
+        if ratio is not None and info is not None:
+            return round(info.uncompressed_size * ratio)
+        return job.size
+    if ratio is None:
+        return job.size
+    return round(job.size * min(1.0, ratio))
+
+
+class SpaceNeed:
+    """Bytes a job needs in one folder while it runs."""
+
+    __slots__ = ("folder", "filesystem", "size", "path")
+
+    def __init__(self, folder, size, path=None):
+        """
+        Args:
+            folder: Folder the job writes to
+            size: Bytes it is expected to write there
+            path: File being written, whose size counts as already
+                used; None to reserve size until the job ends
+        """
+        self.folder = folder
+        self.filesystem = filesystem(folder)
+        self.size = round(size * (1 + SPACE_MARGIN))
+        self.path = path
+
+    def outstanding(self):
+        """Bytes still to be written."""
+        if self.path is None:
+            return self.size
+        try:
+            written = os.path.getsize(self.path)
+        except OSError:
+            written = 0
+        return max(0, self.size - written)
+
+
+class SpaceAdmission:
+    """
+    Reserves disk space for jobs before they start.
+
+    needs(job) returns the SpaceNeed objects of a job. It reads the
+    file's headers, so prepare(job) asks it once, when the job is
+    queued; the scheduler then only compares numbers under its lock.
+    refresh() reads the free space of every file system and what
+    running jobs still have to write, and is called outside the lock
+    before jobs are picked. A folder whose file system cannot report
+    its free space is not limited. on_waiting(job, folder, needed,
+    available) is called the first time a job does not fit.
+    """
+
+    def __init__(self, needs, headroom=FREE_SPACE_HEADROOM, on_waiting=None):
+        self.needs = needs
+        self.headroom = headroom
+        self.on_waiting = on_waiting
+        self._reserved = {}   # job index -> SpaceNeed objects
+        self._needs = {}      # job index -> SpaceNeed objects of queued jobs
+        self._available = {}  # file system -> bytes free for new jobs
+        self._folders = {}    # file system -> a folder on it
+        self._waiting = set()
+        self._lock = threading.Lock()
+
+    def prepare(self, job):
+        """Work out what a job needs before it is queued."""
+        needs = [need for need in self.needs(job) if need.size > 0]
+        with self._lock:
+            self._needs[job.index] = needs
+            for need in needs:
+                if need.filesystem is not None:
+                    self._folders.setdefault(need.filesystem, need.folder)
+
+    def refresh(self):
+        """Read the free space of the file systems jobs write to."""
+        with self._lock:
+            folders = dict(self._folders)
+            reserved = [need for needs in self._reserved.values() for need in needs]
+
+        available = {}
+        for device, folder in folders.items():
+            free = free_space(folder)
+            if free is None:
+                continue
+            held = sum(
+                need.outstanding() for need in reserved if need.filesystem == device
+            )
+            available[device] = max(0, free - held - self.headroom)
+
+        with self._lock:
+            self._available = available
+
+    def shortfall(self, job):
+        """
+        Where a job does not fit, as of the last refresh().
+
+        Returns:
+            (folder, bytes needed, bytes available), or None if it fits
+        """
+        with self._lock:
+            return self._shortfall(self._needs.get(job.index, ()))
+
+    def _wanted(self, needs):
+        wanted = {}
+        for need in needs:
+            if need.filesystem in self._available:
+                wanted.setdefault(need.filesystem, [need.folder, 0])[1] += need.size
+        return wanted
+
+    def _shortfall(self, needs):
+        for device, (folder, size) in self._wanted(needs).items():
+            if size > self._available[device]:
+                return folder, size, self._available[device]
+        return None
+
+    def admit(self, job):
+        """Reserve the space of a job if it fits; True if it may start."""
+        with self._lock:
+            needs = self._needs.get(job.index, ())
+            shortfall = self._shortfall(needs)
+            if shortfall is None:
+                # Taken from the snapshot until the next refresh()
+                for device, (folder, size) in self._wanted(needs).items():
+                    self._available[device] -= size
+                self._reserved[job.index] = needs
+                self._waiting.discard(job.index)
+                return True
+            first = job.index not in self._waiting
+            self._waiting.add(job.index)
+
+        if first and self.on_waiting:
+            self.on_waiting(job, *shortfall)
+        return False
+
+    def release(self, job):
+        """Give back what a finished job reserved."""
+        with self._lock:
+            self._reserved.pop(job.index, None)
+            self._needs.pop(job.index, None)
+            self._waiting.discard(job.index)
+
+    @property
+    def reserved(self):
+        """Bytes running jobs still expect to write."""
+        with self._lock:
+            reserved = [need for needs in self._reserved.values() for need in needs]
+        return sum(need.outstanding() for need in reserved)
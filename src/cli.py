@@ -0,0 +1,686 @@
+# cli.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Headless command line for batch conversions.
+
+Uses the same core as the app, without importing Gtk or Adw.
+"""
+
+import argparse
+import json
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+
+from .core import (
+    ConversionRunner,
+    FileList,
+    RunnerListener,
+    DEFAULT_COMPRESSION_LEVEL,
+    MAX_COMPRESSION_LEVEL,
+    MIN_COMPRESSION_LEVEL,
+    DEFAULT_SCAN_DEPTH,
+    DEFAULT_PARALLEL_JOBS,
+    MAX_PARALLEL_JOBS,
+    RESULT_SUCCESS,
+    RESULT_FAILED,
+    RESULT_STOPPED,
+    RESULT_NO_FILES,
+    RESULT_KEYS_ERROR,
+    INPUT_EXTENSIONS,
+    scan_input_files,
+)
+from .dryrun import ESTIMATE_HEADERS, plan_dry_run
+from .engine import engine_available
+from .governor import DEFAULT_PROFILE, PROFILES, get_profile
+from .leveltuner import (
+    LOW_GAIN_FAST,
+    LOW_GAIN_SKIP,
+    CompressionProbe,
+    LevelTuner,
+    TuningTarget,
+    get_tuning_memory,
+)
+from .journal import BatchJournal, journal_path, load_journal
+from .logstore import INFO, WARNING, ERROR
+from .nszoptions import (
+    ConversionOptions,
+    MODE_COMPRESS,
+    MODE_DECOMPRESS,
+    MODE_RECOMPRESS,
+    VERIFY_INLINE,
+    VERIFY_MODES,
+)
+from .outputparser import format_rate, format_size, parse_progress_line
+from .planner import format_duration
+from .resultcache import get_conversion_cache
+from .rominfo import inspect
+from .scanindex import get_scan_index
+from .scheduler import JOB_DONE, JOB_FAILED, JOB_SKIPPED
+
+# Exit codes
+EXIT_SUCCESS = 0
+EXIT_FAILED = 1     # At least one file failed
+EXIT_USAGE = 2      # Bad arguments (argparse)
+EXIT_NO_FILES = 3
+EXIT_KEYS_ERROR = 4
+EXIT_STOPPED = 130  # Interrupted
+
+RESULT_EXIT_CODES = {
+    RESULT_SUCCESS: EXIT_SUCCESS,
+    RESULT_FAILED: EXIT_FAILED,
+    RESULT_NO_FILES: EXIT_NO_FILES,
+    RESULT_KEYS_ERROR: EXIT_KEYS_ERROR,
+    RESULT_STOPPED: EXIT_STOPPED,
+}
+
+PROGRESS_REPORT_INTERVAL = 1.0  # seconds between progress lines per job
+
+# Not a conversion: list what the headers of each file tell
+MODE_INSPECT = "inspect"
+INSPECT_EXTENSIONS = INPUT_EXTENSIONS[MODE_COMPRESS] + INPUT_EXTENSIONS[MODE_RECOMPRESS]
+
+
+class ConsoleReporter(RunnerListener):
+    """Prints log lines, and progress when stderr is a terminal."""
+
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.show_progress = sys.stderr.isatty()
+
+    def on_log(self, text, level=INFO, section=None):
+        stream = sys.stderr if level >= WARNING else self.stream
+        with self.lock:
+            if self.show_progress:
+                sys.stderr.write("\r\033[K")
+            print(text, file=stream, flush=True)
+
+    def on_job_progress(self, job, progress):
+        if not self.show_progress:
+            return
+        if isinstance(progress, str):
+            progress = parse_progress_line(progress)
+            if progress is None:
+                return
+
+        text = f"[{job.index}] {job.name}: {int(progress.fraction * 100)}%"
+        if progress.rate > 0:
+            text += f" • {format_rate(progress.rate)}"
+        with self.lock:
+            sys.stderr.write("\r\033[K" + text)
+            sys.stderr.flush()
+
+
+class JsonReporter(RunnerListener):
+    """Writes one JSON object per line for every event."""
+
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.last_progress = {}
+
+    def emit(self, event, **fields):
+        fields = dict(event=event, time=round(time.time(), 3), **fields)
+        line = json.dumps(fields, ensure_ascii=False)
+        with self.lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def on_log(self, text, level=INFO, section=None):
+        self.emit(
+            "log",
+            level=logging_level_name(level),
+            file=section,
+            text=text
+        )
+
+    def on_job_started(self, job):
+        self.emit("job-started", index=job.index, path=job.path, size=job.size)
+
+    def on_job_progress(self, job, progress):
+        if isinstance(progress, str):
+            progress = parse_progress_line(progress)
+            if progress is None:
+                return
+
+        # One line per interval, plus the last one of every step
+        now = time.monotonic()
+        last = self.last_progress.get(job.index, 0)
+        if progress.fraction < 1.0 and now - last < PROGRESS_REPORT_INTERVAL:
+            return
+        self.last_progress[job.index] = now
+
+        self.emit(
+            "progress",
+            index=job.index,
+            step=progress.step,
+            fraction=round(progress.fraction, 4),
+            done=progress.done,
+            total=progress.total,
+            rate=round(progress.rate, 1),
+            remaining=progress.remaining
+        )
+
+    def on_file_skipped(self, path, output):
+        self.emit("file-skipped", path=path, output=output)
+
+    def on_job_finished(self, job):
+        self.last_progress.pop(job.index, None)
+        telemetry = job.telemetry.to_dict() if job.telemetry else {}
+        for key in ("index", "file", "status"):
+            telemetry.pop(key, None)
+        self.emit(
+            "job-finished",
+            index=job.index,
+            path=job.path,
+            status=job.status,
+            elapsed=round(job.elapsed, 3),
+            **telemetry
+        )
+
+
+def logging_level_name(level):
+    if level >= ERROR:
+        return "error"
+    if level >= WARNING:
+        return "warning"
+    return "info"
+
+
+def build_parser(version=None):
+    parser = argparse.ArgumentParser(
+        prog="switchromtools-cli",
+        description="Compress or decompress Nintendo Switch ROMs with nsz."
+    )
+
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument(
+        "-C", "--compress", dest="mode", action="store_const",
+        const=MODE_COMPRESS, help="compress NSP/XCI to NSZ/XCZ"
+    )
+    mode.add_argument(
+        "-D", "--decompress", dest="mode", action="store_const",
+        const=MODE_DECOMPRESS, help="decompress NSZ/XCZ/NCZ to NSP/XCI/NCA"
+    )
+    mode.add_argument(
+        "-R", "--recompress", dest="mode", action="store_const",
+        const=MODE_RECOMPRESS,
+        help="compress NSZ/XCZ again with other settings, through memory; "
+             "without -o the new files replace the old ones"
+    )
+    mode.add_argument(
+        "-I", "--inspect", dest="mode", action="store_const",
+        const=MODE_INSPECT,
+        help="list title ID, contents and sizes of NSP/NSZ/XCI/XCZ files "
+             "from their headers, without converting"
+    )
+
+    parser.add_argument(
+        "folder", nargs="?",
+        help="folder with the files to convert (not needed with --resume)"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="continue the last interrupted batch of this mode"
+    )
+    parser.add_argument(
+        "-l", "--level", type=int, default=DEFAULT_COMPRESSION_LEVEL,
+        choices=range(MIN_COMPRESSION_LEVEL, MAX_COMPRESSION_LEVEL + 1),
+        metavar="LEVEL",
+        help=f"compression level, {MIN_COMPRESSION_LEVEL}-{MAX_COMPRESSION_LEVEL} "
+             f"(default: {DEFAULT_COMPRESSION_LEVEL})"
+    )
+
+    parser.add_argument(
+        "--auto-level", action="store_true",
+        help="sample each title and pick the best level that meets --min-speed "
+             "and --time-limit (needs the nsz engine)"
+    )
+    parser.add_argument(
+        "--min-speed", type=float, default=0, metavar="MIB/S",
+        help="speed each file should reach with --auto-level"
+    )
+    parser.add_argument(
+        "--time-limit", type=float, default=0, metavar="MINUTES",
+        help="finish the batch within this time with --auto-level; with "
+             "--dry-run, check that the batch is expected to"
+    )
+    parser.add_argument(
+        "--min-savings", type=float, default=0, metavar="PERCENT",
+        help="probe each title first and treat titles that would shrink by "
+             "less than this as low-gain (needs the nsz engine)"
+    )
+    parser.add_argument(
+        "--low-gain", choices=(LOW_GAIN_SKIP, LOW_GAIN_FAST), default=LOW_GAIN_SKIP,
+        help="skip low-gain titles or compress them at a fast level "
+             "(default: skip)"
+    )
+
+    block = parser.add_mutually_exclusive_group()
+    block.add_argument(
+        "-S", "--solid", dest="solid", action="store_true", default=True,
+        help="solid compression (default)"
+    )
+    block.add_argument(
+        "-B", "--block", dest="solid", action="store_false",
+        help="block compression, allows random access"
+    )
+
+    parser.add_argument(
+        "-o", "--output", metavar="DIR",
+        help="folder for the converted files, keeping subfolders "
+             "(default: next to each source file)"
+    )
+    parser.add_argument(
+        "--scratch", metavar="DIR",
+        help="write to a fast local folder first, then move finished files "
+             "to their place"
+    )
+    parser.add_argument(
+        "--jobs-per-disk", type=int, default=0, metavar="N",
+        help="running jobs that may read or write the same disk, "
+             "0 = no limit (default: 0)"
+    )
+    parser.add_argument(
+        "--space-check", action=argparse.BooleanOptionalAction, default=True,
+        help="start a file only once its output is expected to fit on the "
+             "disk, and fail files that never will (default: on)"
+    )
+    parser.add_argument(
+        "-t", "--threads", type=int, default=0,
+        help="total CPU threads shared by running jobs, 0 = auto (default: 0)"
+    )
+    parser.add_argument(
+        "-V", "--verify", action=argparse.BooleanOptionalAction, default=True,
+        help="verify after converting (default: on)"
+    )
+    parser.add_argument(
+        "--verify-mode", choices=VERIFY_MODES, default=VERIFY_INLINE,
+        help="check decompressed files while writing them, or also read "
+             "them back afterwards (default: inline)"
+    )
+    parser.add_argument(
+        "--rm-source", action="store_true",
+        help="delete source files after a verified conversion"
+    )
+    parser.add_argument(
+        "-d", "--depth", type=int, default=DEFAULT_SCAN_DEPTH,
+        help="subfolder levels to scan, 0 = folder only (default: 0)"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=DEFAULT_PARALLEL_JOBS,
+        choices=range(1, MAX_PARALLEL_JOBS + 1), metavar="JOBS",
+        help=f"files converted at the same time, 1-{MAX_PARALLEL_JOBS} "
+             f"(default: {DEFAULT_PARALLEL_JOBS})"
+    )
+    parser.add_argument(
+        "--profile", choices=list(PROFILES), default=DEFAULT_PROFILE,
+        help="CPU and disk priority of nsz: background, balanced (adapts "
+             "parallel jobs to the disk queue) or max-throughput "
+             f"(default: {DEFAULT_PROFILE})"
+    )
+    parser.add_argument(
+        "--bwlimit", type=float, default=0, metavar="MB/S",
+        help="limit the disk bandwidth of each job, 0 = unlimited (default: 0)"
+    )
+    parser.add_argument(
+        "--engine", action=argparse.BooleanOptionalAction, default=False,
+        help="keep nsz loaded in worker processes instead of starting nsz "
+             "for every file, if nsz can be imported (default: off)"
+    )
+    parser.add_argument(
+        "--cache", action=argparse.BooleanOptionalAction, default=True,
+        help="skip files converted before whose output still exists (default: on)"
+    )
+    parser.add_argument(
+        "--hash", action="store_true",
+        help="identify files by a partial content hash, so moved files are recognized"
+    )
+    parser.add_argument("--nsz", metavar="PATH", help="nsz command to run")
+    parser.add_argument(
+        "--json", action="store_true",
+        help="write progress and results as JSON lines"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="show each file's expected output size and time and the batch "
+             "totals without converting; exits with 1 if the outputs would "
+             "not fit on the disk or the batch not within --time-limit"
+    )
+    parser.add_argument(
+        "--report", metavar="FILE",
+        help="save per-file measurements of the batch, as CSV if FILE ends "
+             "in .csv, otherwise as JSON"
+    )
+    if version:
+        parser.add_argument(
+            "--version", action="version", version=f"%(prog)s {version}"
+        )
+    return parser
+
+
+def describe(info, memory):
+    """One line about an inspected file."""
+    parts = [info.container.upper()]
+    if info.title_id:
+        parts.append(f"{info.title_id} ({info.title_type})")
+    if info.version is not None:
+        parts.append(f"v{info.version}")
+    if info.content_types:
+        parts.append("+".join(info.content_types))
+    size = format_size(info.size)
+    if info.compressed:
+        size += f" of {format_size(info.uncompressed_size)}, {info.compression}"
+    parts.append(size)
+    ratio = info.estimated_ratio(memory)
+    if ratio is not None:
+        parts.append(
+            f"{1 - ratio:.0%} smaller" if info.compressed
+            else f"about {1 - ratio:.0%} to gain"
+        )
+    return f"{info.name}: {', '.join(parts)}"
+
+
+def print_plan(plan, time_limit=None):
+    """Print a DryRunPlan as text."""
+    options = plan.options
+    settings = options.mode
+    if options.mode != MODE_DECOMPRESS:
+        block = "solid" if options.solid else "block"
+        settings += f" at level {options.level} ({block})"
+    print(
+        f"Plan for {len(plan.files)} file{'s' if len(plan.files) != 1 else ''}, "
+        f"{settings}, {plan.workers} at a time:"
+    )
+    for planned in plan.files:
+        text = f"  {planned.name}: {format_size(planned.size)}"
+        if planned.output_size is not None:
+            text += f" → {'' if planned.estimate == ESTIMATE_HEADERS else 'about '}"
+            text += f"{format_size(planned.output_size)} ({planned.estimate})"
+        else:
+            text += " → unknown size"
+        if planned.seconds is not None:
+            text += f", {format_duration(planned.seconds)}"
+        print(text)
+
+    text = f"Total: {format_size(plan.input_bytes)}"
+    if plan.estimated:
+        text += f", about {format_size(plan.output_bytes)} out"
+        if plan.savings >= 0:
+            text += f", {format_size(plan.savings)} saved"
+    unknown = len(plan.files) - len(plan.estimated)
+    if unknown:
+        text += f" ({unknown} file{'s' if unknown != 1 else ''} never measured)"
+    print(text)
+
+    if plan.seconds is None:
+        print("Time: unknown until a batch with these settings has run")
+    else:
+        text = f"Time: about {format_duration(plan.seconds)}"
+        if time_limit:
+            text += (
+                " (fits the time limit)" if plan.fits_time(time_limit)
+                else f" (more than {format_duration(time_limit)})"
+            )
+        print(text)
+
+    for space in plan.spaces:
+        free = format_size(space.free) if space.free is not None else "unknown"
+        print(
+            f"Space on {space.folder}: {format_size(space.needed)} needed, "
+            f"{free} free" + ("" if space.fits else " — NOT ENOUGH")
+        )
+
+
+def dry_run(folder, options, args):
+    """
+    Show the plan of a batch instead of running it.
+
+    Returns:
+        One of the EXIT_* codes
+    """
+    files = get_scan_index(folder).files(INPUT_EXTENSIONS[options.mode], args.depth)
+    if not files:
+        print("No compatible files found", file=sys.stderr)
+        return EXIT_NO_FILES
+
+    plan = plan_dry_run(files, options, args.jobs, root=folder)
+    time_limit = args.time_limit * 60 if args.time_limit > 0 else None
+    if args.json:
+        fields = plan.to_dict()
+        if time_limit:
+            fields["fits_time"] = plan.fits_time(time_limit)
+        JsonReporter().emit("plan", **fields)
+    else:
+        print_plan(plan, time_limit)
+
+    if not plan.fits_space or (time_limit and plan.fits_time(time_limit) is False):
+        return EXIT_FAILED
+    return EXIT_SUCCESS
+
+
+def inspect_folder(folder, depth, as_json):
+    """
+    Print the metadata of every title below folder.
+
+    Returns:
+        One of the EXIT_* codes
+    """
+    files = get_scan_index(folder).files(INSPECT_EXTENSIONS, depth)
+    if not files:
+        print("No compatible files found", file=sys.stderr)
+        return EXIT_NO_FILES
+
+    memory = get_tuning_memory()
+    reporter = JsonReporter() if as_json else None
+    unreadable = 0
+    for path in sorted(files):
+        info = inspect(path)
+        if info is None:
+            unreadable += 1
+            if reporter:
+                reporter.emit("file-info", path=path, error="unreadable headers")
+            else:
+                print(f"{os.path.basename(path)}: unreadable headers", file=sys.stderr)
+        elif reporter:
+            fields = info.to_dict(memory)
+            fields["path"] = fields.pop("file")
+            reporter.emit("file-info", **fields)
+        else:
+            print(describe(info, memory))
+    return EXIT_FAILED if unreadable else EXIT_SUCCESS
+
+
+def main(version=None, argv=None):
+    """
+    Run a batch from the command line.
+
+    Returns:
+        One of the EXIT_* codes
+    """
+    parser = build_parser(version)
+    args = parser.parse_args(argv)
+
+    if args.mode == MODE_INSPECT:
+        if not args.folder or not os.path.isdir(args.folder):
+            parser.error("a folder is required")
+        return inspect_folder(os.path.abspath(args.folder), args.depth, args.json)
+
+    state = None
+    if args.resume:
+        state = load_journal(journal_path(args.mode))
+        if state is None and not args.folder:
+            parser.error(f"no interrupted {args.mode} batch to resume")
+    if state is None:
+        if not args.folder:
+            parser.error("a folder is required")
+        if not os.path.isdir(args.folder):
+            parser.error(f"not a folder: {args.folder}")
+
+    options = ConversionOptions(
+        args.mode,
+        level=args.level if args.mode != MODE_DECOMPRESS else None,
+        solid=args.solid,
+        verify=args.verify,
+        verify_mode=args.verify_mode,
+        rm_source=args.rm_source,
+        threads=max(0, args.threads),
+        output_dir=os.path.abspath(args.output) if args.output else None
+    )
+    if state is not None:
+        # The batch keeps the settings it was started with
+        options = state.options.copy(threads=options.threads)
+    if args.dry_run:
+        if state is not None:
+            parser.error("--dry-run cannot be combined with --resume")
+        return dry_run(os.path.abspath(args.folder), options, args)
+    reporter = JsonReporter() if args.json else ConsoleReporter()
+
+    use_engine = args.engine
+    if use_engine and not engine_available():
+        use_engine = False
+        reporter.on_log("nsz cannot be imported, --engine is ignored", WARNING)
+
+    tuner = None
+    if args.auto_level and args.mode == MODE_COMPRESS:
+        if engine_available():
+            tuner = LevelTuner(TuningTarget(
+                min_speed=args.min_speed * 1024 ** 2 or None,
+                deadline=time.monotonic() + args.time_limit * 60
+                if args.time_limit > 0 else None
+            ))
+        else:
+            reporter.on_log(
+                "nsz cannot be imported, --auto-level is ignored", WARNING
+            )
+
+    probe = None
+    if args.min_savings > 0 and args.mode == MODE_COMPRESS:
+        if engine_available():
+            probe = CompressionProbe(args.min_savings / 100, args.low_gain)
+        else:
+            reporter.on_log(
+                "nsz cannot be imported, --min-savings is ignored", WARNING
+            )
+
+    if state is not None:
+        for output in state.cleanup():
+            reporter.on_log(f"Removed partial output {output}")
+        reporter.on_log(
+            f"Resuming batch in {state.folder}: {len(state.pending())} files left"
+        )
+        source = FileList(state.pending(), state.folder)
+        journal = BatchJournal.resume(state)
+    else:
+        folder = os.path.abspath(args.folder)
+        source = scan_input_files(folder, args.mode, args.depth)
+        journal = BatchJournal.start(
+            journal_path(args.mode), folder, args.depth, options
+        )
+
+    runner = ConversionRunner(
+        options,
+        workers=args.jobs,
+        use_engine=use_engine,
+        listener=reporter,
+        nsz_binary=args.nsz,
+        cache=get_conversion_cache() if args.cache else None,
+        hash_files=args.hash,
+        journal=journal,
+        profile=get_profile(args.profile),
+        scratch_dir=os.path.abspath(args.scratch) if args.scratch else None,
+        device_limit=max(0, args.jobs_per_disk),
+        tuner=tuner,
+        probe=probe,
+        space_check=args.space_check,
+        bandwidth_limit=int(args.bwlimit * 1000 ** 2) if args.bwlimit > 0 else None
+    )
+
+    # A handler interrupts the main thread wherever it is, possibly
+    # while it holds the scheduler's lock, so handlers only queue what
+    # to do; SimpleQueue.put is safe to call from a signal handler
+    actions = queue.SimpleQueue()
+
+    def run_actions():
+        for action in iter(actions.get, None):
+            action()
+
+    def suspend():
+        # nsz runs in its own process groups, which Ctrl+Z does not reach
+        runner.pause()
+        os.kill(os.getpid(), signal.SIGSTOP)
+
+    def handler(action):
+        return lambda signum, frame: actions.put(action)
+
+    threading.Thread(target=run_actions, name="signals", daemon=True).start()
+    signal.signal(signal.SIGINT, handler(runner.stop))
+    signal.signal(signal.SIGTERM, handler(runner.stop))
+    signal.signal(signal.SIGTSTP, handler(suspend))
+    signal.signal(signal.SIGCONT, handler(runner.resume))
+    signal.signal(signal.SIGUSR1, handler(runner.pause_after_current))
+
+    started = time.monotonic()
+    result = runner.run(source)
+    elapsed = time.monotonic() - started
+    actions.put(None)
+
+    done = sum(1 for job in runner.jobs if job.status == JOB_DONE)
+    failed = sum(1 for job in runner.jobs if job.status == JOB_FAILED)
+    low_gain = sum(1 for job in runner.jobs if job.status == JOB_SKIPPED)
+    savings = runner.savings()
+
+    if args.json:
+        reporter.emit(
+            "batch-finished",
+            result=result,
+            total=runner.total_files,
+            done=done,
+            failed=failed,
+            skipped=len(runner.skipped),
+            low_gain=low_gain,
+            input_bytes=savings[1] if savings else None,
+            estimated_bytes=round(savings[2]) if savings else None,
+            output_bytes=savings[3] if savings else None,
+            elapsed=round(elapsed, 3)
+        )
+    elif runner.jobs or runner.skipped:
+        summary = (
+            f"{done}/{runner.total_files} file"
+            f"{'s' if runner.total_files != 1 else ''} processed "
+            f"in {format_duration(elapsed)}"
+        )
+        if runner.skipped:
+            summary += f", {len(runner.skipped)} already converted"
+        if low_gain:
+            summary += f", {low_gain} not worth compressing"
+        reporter.on_log(summary, INFO if result == RESULT_SUCCESS else WARNING)
+
+    if args.report:
+        try:
+            runner.telemetry.write(args.report)
+        except OSError as e:
+            reporter.on_log(f"Could not save the report: {e}", WARNING)
+
+    return RESULT_EXIT_CODES.get(result, EXIT_FAILED)
@@ -0,0 +1,1310 @@
+# core.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Conversion core shared by the GTK app and the command line.
+
+Nothing here imports Gtk or Adw.
+"""
+
+import os
+import shutil
+import threading
+import time
+
+from .admission import SpaceAdmission, SpaceNeed, expected_output_size
+from .engine import EngineJob, get_engine
+from .governor import ResourceGovernor, apply_priority, get_profile
+from .journal import (
+    FILE_DONE,
+    FILE_FAILED,
+    FILE_SKIPPED,
+    FILE_STOPPED,
+    remove_partial_output,
+)
+from .leveltuner import LOW_GAIN_LEVEL, LOW_GAIN_SKIP
+from .logstore import INFO, WARNING, ERROR
+from .nszoptions import (
+    MODE_COMPRESS,
+    MODE_DECOMPRESS,
+    MODE_RECOMPRESS,
+    VERIFY_INLINE,
+)
+from .outputparser import (
+    LineSplitter,
+    format_rate,
+    format_size,
+    parse_progress_line,
+)
+from .paths import PROD_KEYS_PATH
+from .placement import Placement, filesystem
+from .planner import (
+    ThroughputHistory,
+    grant_threads,
+    plan_batch,
+    estimate_batch_seconds,
+    format_duration,
+)
+from .recompress import IntermediateSpace
+from .rominfo import inspect
+from .scanindex import FileScan, get_scan_index
+from .scheduler import (
+    JobScheduler,
+    split_threads,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_STOPPED,
+    JOB_SKIPPED,
+)
+from .supervisor import get_supervisor
+from .telemetry import (
+    BatchTelemetry,
+    PHASE_COMPRESS,
+    PHASE_MOVE,
+    PHASE_SAMPLE,
+    PHASE_SETUP,
+    PHASE_VERIFY,
+)
+
+NSZ_BINARY_PATH = "/app/bin/nsz"
+DEFAULT_COMPRESSION_LEVEL = 18
+MAX_COMPRESSION_LEVEL = 22
+MIN_COMPRESSION_LEVEL = 1
+DEFAULT_SCAN_DEPTH = 0
+MAX_SCAN_DEPTH = 10
+DEFAULT_PARALLEL_JOBS = 1
+MAX_PARALLEL_JOBS = 16
+MIN_REPORTED_SAVING = 1.0  # seconds a verify must save to be worth a log line
+
+INPUT_EXTENSIONS = {
+    MODE_COMPRESS: (".nsp", ".xci"),
+    MODE_DECOMPRESS: (".nsz", ".xcz", ".ncz"),
+    MODE_RECOMPRESS: (".nsz", ".xcz"),
+}
+
+# nsz writes its output next to the input with these extensions
+OUTPUT_EXTENSIONS = {
+    ".nsp": ".nsz",
+    ".xci": ".xcz",
+    ".nsz": ".nsp",
+    ".xcz": ".xci",
+    ".ncz": ".nca",
+}
+
+JOURNAL_STATES = {
+    JOB_DONE: FILE_DONE,
+    JOB_FAILED: FILE_FAILED,
+    JOB_STOPPED: FILE_STOPPED,
+    JOB_SKIPPED: FILE_SKIPPED,
+}
+
+# Outcome of a batch
+RESULT_SUCCESS = "success"
+RESULT_FAILED = "failed"
+RESULT_STOPPED = "stopped"
+RESULT_NO_FILES = "no-files"
+RESULT_KEYS_ERROR = "keys-error"
+
+
+def prod_keys_present():
+    return os.path.exists(os.path.expanduser(PROD_KEYS_PATH))
+
+
+def find_nsz_binary():
+    """The bundled nsz, or the first nsz on PATH outside the flatpak."""
+    if os.path.exists(NSZ_BINARY_PATH):
+        return NSZ_BINARY_PATH
+    return shutil.which("nsz") or NSZ_BINARY_PATH
+
+
+def build_command(options, file_path, nsz_binary=None):
+    """Build the nsz command line for a single file."""
+    return [nsz_binary or find_nsz_binary()] + options.to_args(file_path)
+
+
+def output_path(file_path, output_dir=None, mode=None):
+    """Path of the file nsz writes when converting file_path."""
+    root, ext = os.path.splitext(file_path)
+    path = file_path
+    if mode != MODE_RECOMPRESS:
+        path = root + OUTPUT_EXTENSIONS.get(ext.lower(), ext)
+    if output_dir:
+        path = os.path.join(output_dir, os.path.basename(path))
+    return path
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def throughput_key(options):
+    """Settings key for the measured throughput of these options."""
+    if options.mode in (MODE_COMPRESS, MODE_RECOMPRESS):
+        block = "solid" if options.solid else "block"
+        return f"{options.mode}:{options.level}:{block}"
+    return options.mode
+
+
+def scan_input_files(path, mode, max_depth, on_batch=None, on_done=None):
+    """Start a background scan of path for files the mode can convert."""
+    scan = FileScan(
+        get_scan_index(path),
+        INPUT_EXTENSIONS[mode],
+        max_depth,
+        on_batch=on_batch,
+        on_done=on_done
+    )
+    scan.start()
+    return scan
+
+
+class FileList:
+    """A fixed list of files with the interface of a finished FileScan."""
+
+    def __init__(self, files, root=None):
+        self.root = root
+        self.found = list(files)
+        self.done = True
+        self.cancelled = False
+
+    @property
+    def finished(self):
+        return True
+
+    def cancel(self):
+        self.cancelled = True
+
+    def iter_batches(self):
+        if self.found and not self.cancelled:
+            yield list(self.found)
+
+
+def is_progress_line(line):
+    """True if a line of nsz output is a progress bar."""
+    return "%" in line and any(
+        indicator in line for indicator in ["|", "MiB", "MB", "KB", "B/s"]
+    )
+
+
+def is_keys_error(line):
+    lower = line.lower()
+    return ("prod.keys" in lower or "keys.txt" in lower) and "not found" in lower
+
+
+def verify_result(line):
+    """True or False if a line of nsz output reports a checked hash, else None."""
+    if line.startswith("[VERIFIED]"):
+        return True
+    if line.startswith(("[CORRUPTED]", "[MISSMATCH]", "[MISMATCH]", "[BAD VERIFY]")):
+        return False
+    return None
+
+
+class RunnerListener:
+    """
+    Receives the progress of a ConversionRunner.
+
+    All methods are called from worker threads and should return
+    quickly; the GTK app queues them for its UI thread.
+    """
+
+    def on_log(self, text, level=INFO, section=None):
+        pass
+
+    def on_job_started(self, job):
+        pass
+
+    def on_job_progress(self, job, progress):
+        """progress is a JobProgress, or a progress bar line from nsz."""
+        pass
+
+    def on_job_finished(self, job):
+        pass
+
+    def on_file_skipped(self, path, output):
+        """path needs no conversion; output is the existing result."""
+        pass
+
+
+class ConversionRunner:
+    """
+    Runs a batch of conversions without any UI.
+
+    Files are planned and submitted as the scan finds them, and up to
+    workers jobs run at once, either as nsz processes or in the nsz
+    engine. If the engine cannot start, jobs fall back to the nsz
+    command.
+
+    With a ConversionCache, files that were converted before and whose
+    output is still there are skipped before they reach nsz, as are
+    files with an output next to them, which nsz would refuse to
+    overwrite anyway.
+
+    A batch can be paused: running jobs are suspended in place and
+    continue where they were on resume(), so no work is lost. With
+    pause_after_current() running jobs finish first and only the queued
+    ones wait.
+
+    nsz runs at the priority of a ResourceProfile, and a
+    ResourceGovernor applies the bandwidth limit and adapts the number
+    of parallel jobs to the disk.
+
+    Outputs go next to their inputs or below options.output_dir. With
+    a scratch_dir nsz writes there first and finished outputs are moved
+    to their place, and with a device_limit no disk serves more than
+    that many running jobs.
+
+    With a LevelTuner, each file to compress gets its own level, picked
+    from a quick sample of its title before nsz starts. With a
+    CompressionProbe, files that would barely shrink are skipped or
+    compressed at a fast level, and the estimated savings are compared
+    with the actual ones at the end of the batch.
+
+    Every file is measured in a BatchTelemetry: queue wait, phases, sizes,
+    rates and CPU time.
+
+    To recompress, each file is decompressed into a folder from an
+    IntermediateSpace, in memory if it fits, and compressed again from
+    there. Without an output folder the result replaces the source once
+    nsz has verified it.
+    """
+
+    def __init__(self, options, workers=DEFAULT_PARALLEL_JOBS, use_engine=False,
+                 listener=None, throughput=None, nsz_binary=None, cache=None,
+                 hash_files=False, journal=None, profile=None,
+                 bandwidth_limit=None, scratch_dir=None, device_limit=0,
+                 tuner=None, probe=None, space_check=True):
+        """
+        Args:
+            options: ConversionOptions; threads is the total thread budget
+                shared by running jobs
+            workers: Number of files converted at the same time
+            use_engine: Run jobs in the nsz engine
+            listener: RunnerListener for progress and results
+            throughput: ThroughputHistory for estimates
+            nsz_binary: nsz command, found automatically if None
+            cache: ConversionCache of earlier results, or None
+            hash_files: Identify files by a partial hash for the cache
+            journal: BatchJournal to record the batch in, or None
+            profile: ResourceProfile, the default profile if None
+            bandwidth_limit: Storage bytes per second for each job, or None
+            scratch_dir: Folder to stage outputs in, or None
+            device_limit: Running jobs per disk, 0 for no limit
+            tuner: LevelTuner choosing the level of each file, or None
+            probe: CompressionProbe for files with little to gain, or None
+            space_check: Hold jobs back until their output is expected
+                to fit on the disk, and fail those that never will
+        """
+        self.options = options
+        self.workers = workers
+        self.use_engine = use_engine
+        self.listener = listener or RunnerListener()
+        self.throughput = throughput or ThroughputHistory()
+        self.nsz_binary = nsz_binary or find_nsz_binary()
+        self.cache = cache
+        self.hash_files = hash_files
+        self.journal = journal
+        self.placement = Placement(None, options.output_dir, scratch_dir)
+        self.device_limit = device_limit
+        self.tuner = tuner
+        self.probe = probe
+        self.space_check = space_check
+        self._process_lock = threading.RLock()
+        self.profile = profile or get_profile(None)
+        self.governor = ResourceGovernor(
+            self.profile,
+            bandwidth_limit,
+            on_concurrency=self._on_concurrency
+        )
+        self._partial_outputs = {}
+        self.scheduler = None
+        self.jobs = []
+        self.skipped = []
+        self.telemetry = BatchTelemetry(options.mode)
+        self.intermediate = None  # IntermediateSpace of a recompression
+        self._file_keys = {}
+        self._thread_share = 0  # Threads of each job, as planned
+        self._replaceable = set()  # Inputs whose existing output may be replaced
+        self.total_files = 0
+        self.estimated_seconds = None
+        self.stopped = False
+        self.paused = False    # Running jobs are suspended
+        self.pausing = False   # Waiting for running jobs to finish
+        self.keys_error = False
+
+    def run(self, scan):
+        """
+        Convert everything the scan finds. Blocks until the batch is over.
+
+        Args:
+            scan: A started FileScan
+
+        Returns:
+            One of the RESULT_* constants
+        """
+        result = RESULT_FAILED
+        try:
+            result = self._run(scan)
+            return result
+        except Exception as e:
+            self.listener.on_log(f"Error: {e}", ERROR)
+            return result
+        finally:
+            self.governor.stop()
+            if self.cache is not None:
+                self.cache.flush()
+            if self.journal:
+                # Stopped batches and keys errors can be resumed later
+                if result in (RESULT_SUCCESS, RESULT_FAILED, RESULT_NO_FILES):
+                    self.journal.complete()
+                else:
+                    self.journal.close()
+
+    def _run(self, scan):
+        workers = self.workers
+        if scan.done:
+            workers = max(1, min(workers, len(scan.found)))
+
+        self.jobs = []
+        self.skipped = []
+        self._thread_share = split_threads(self.options.threads, workers)
+        self.telemetry = BatchTelemetry(self.options.mode)
+        if self.options.mode == MODE_RECOMPRESS:
+            self.intermediate = IntermediateSpace()
+        self.total_files = len(scan.found)
+        self.placement.root = getattr(scan, "root", None)
+        try:
+            self.placement.prepare()
+        except OSError as e:
+            self.listener.on_log(f"Error: {e}", ERROR)
+            return RESULT_FAILED
+
+        admission = None
+        if self.space_check:
+            admission = SpaceAdmission(
+                self._space_needs, on_waiting=self._on_waiting_for_space
+            )
+        self.scheduler = JobScheduler(
+            workers,
+            self.start_job,
+            self.device_limit,
+            admission=admission,
+            on_rejected=self._reject_job
+        )
+        if self.paused or self.pausing:
+            self.scheduler.hold()
+        if self._engine_enabled():
+            get_engine().set_profile(self.profile)
+            get_engine().resize(workers)
+
+        for files in scan.iter_batches():
+            if self.stopped:
+                break
+
+            files = self._skip_finished(files)
+            if not files:
+                continue
+
+            if not self.jobs:
+                self.governor.start(os.path.dirname(files[0]), workers)
+
+            batch = plan_batch(
+                files,
+                workers,
+                self.options.threads,
+                start_index=len(self.jobs) + 1
+            )
+            if self.device_limit:
+                for job in batch:
+                    job.devices = self.placement.devices(job.path)
+            self.jobs.extend(batch)
+            self.total_files = len(self.jobs)
+            if self.journal:
+                self.journal.queued([job.path for job in batch])
+            if admission:
+                for job in batch:
+                    admission.prepare(job)
+            now = time.monotonic()
+            for job in batch:
+                self.telemetry.queued(job, now)
+                self.scheduler.submit(job)
+
+        self.scheduler.close()
+
+        if self.jobs:
+            self.estimated_seconds = estimate_batch_seconds(
+                self.jobs,
+                workers,
+                self.throughput.rate(throughput_key(self.options))
+            )
+            if self.estimated_seconds is not None:
+                self.listener.on_log(
+                    f"Estimated batch time: {format_duration(self.estimated_seconds)}"
+                )
+
+        self.scheduler.join()
+        self._report_savings()
+        self._report_telemetry()
+
+        if not self.jobs and not self.stopped:
+            if self.skipped:
+                self.listener.on_log("All files were already converted")
+                return RESULT_SUCCESS
+            self.listener.on_log("No files found")
+            return RESULT_NO_FILES
+
+        if self.keys_error:
+            self.listener.on_log(
+                "❌ Invalid or missing prod.keys file! "
+                "Please provide a valid keys file.",
+                ERROR
+            )
+            return RESULT_KEYS_ERROR
+
+        if self.stopped:
+            self.listener.on_log("⚠️ Process stopped by user", WARNING)
+            return RESULT_STOPPED
+
+        successful = sum(
+            1 for job in self.jobs if job.status in (JOB_DONE, JOB_SKIPPED)
+        )
+        return RESULT_SUCCESS if successful == self.total_files else RESULT_FAILED
+
+    def _skip_finished(self, files):
+        """Drop files that need no conversion and return the rest."""
+        remaining = []
+        for path in files:
+            if self.cache is None:
+                remaining.append(path)
+                continue
+
+            output = None
+            final = self.final_output(path)
+            key = self.cache.key_for(path, self.hash_files)
+            entry = key and self.cache.lookup(path, key, self.options)
+            if entry:
+                output = entry["output"]
+            elif final != path and os.path.exists(final):
+                output = final
+                # A recompression replaces its own output from other settings
+                if (self.options.mode == MODE_RECOMPRESS and key
+                        and self.cache.previous_output(path, key) == final):
+                    output = None
+                    self._replaceable.add(path)
+            self._file_keys[path] = key
+
+            if output is None:
+                remaining.append(path)
+                continue
+
+            self.skipped.append(path)
+            self.listener.on_file_skipped(path, output)
+            self.listener.on_log(
+                f"↷ Skipping {os.path.basename(path)}: already converted "
+                f"to {output}",
+                INFO,
+                os.path.basename(path)
+            )
+        return remaining
+
+    def stop(self):
+        """Stop the batch: drop queued jobs and terminate running ones."""
+        if self.stopped:
+            return
+        self.stopped = True
+
+        if self.scheduler:
+            self.scheduler.stop()
+
+        for job in list(self.jobs):
+            if job.status == JOB_RUNNING:
+                self._terminate_process(job)
+
+    def pause(self):
+        """Suspend running jobs and start no new ones until resume()."""
+        if self.stopped or self.paused:
+            return
+        self.paused = True
+        self.pausing = False
+
+        if self.scheduler:
+            self.scheduler.hold()
+
+        now = time.monotonic()
+        for job in list(self.jobs):
+            if job.status == JOB_RUNNING:
+                self._set_job_paused(job, True, now)
+        self.listener.on_log("⏸ Paused")
+
+    def pause_after_current(self):
+        """Let running jobs finish, then wait before starting the next."""
+        if self.stopped or self.paused or self.pausing:
+            return
+        self.pausing = True
+
+        if self.scheduler:
+            self.scheduler.hold()
+        self.listener.on_log("⏸ Pausing after the current file")
+
+    def resume(self):
+        """Continue after pause() or pause_after_current()."""
+        if not (self.paused or self.pausing):
+            return
+        self.paused = False
+        self.pausing = False
+
+        now = time.monotonic()
+        for job in list(self.jobs):
+            if job.paused:
+                self._set_job_paused(job, False, now)
+
+        self.listener.on_log("▶ Resumed")
+        if self.scheduler:
+            self.scheduler.release()
+
+    def _set_job_paused(self, job, paused, now):
+        job.set_paused(paused, now)
+        record = job.telemetry
+        if record:
+            if paused:
+                record.pause(now)
+            else:
+                record.resume(now)
+        if isinstance(job.process, EngineJob):
+            if paused:
+                get_engine().pause(job.process)
+            else:
+                get_engine().resume(job.process)
+        elif job.process:
+            if paused:
+                get_supervisor().pause(job.process)
+            else:
+                get_supervisor().resume(job.process)
+
+    def final_output(self, path):
+        """Where the output of path ends up."""
+        return output_path(path, self.placement.final_dir(path), self.options.mode)
+
+    def _on_concurrency(self, workers, depth):
+        """The governor changed the number of parallel jobs."""
+        if self.scheduler:
+            self.scheduler.set_max_workers(workers)
+        self.listener.on_log(
+            f"Disk queue depth {depth:.1f}, running {workers} "
+            f"job{'s' if workers != 1 else ''} at once"
+        )
+
+    def _job_child(self, job):
+        """The ChildProcess running a job, or None."""
+        if isinstance(job.process, EngineJob):
+            worker = job.process.worker
+            return worker.process if worker and worker.job is job.process else None
+        return job.process
+
+    def _engine_enabled(self):
+        return self.use_engine and not get_engine().failed
+
+    def start_job(self, job, done):
+        """
+        Start nsz for a single job without blocking.
+
+        The job runs in the nsz engine when enabled, otherwise as an nsz
+        process. Either way output and exit are delivered on the
+        supervisor thread; done() is called once the job has finished.
+        """
+        if self.stopped:
+            job.status = JOB_STOPPED
+            done()
+            return
+
+        job.status = JOB_RUNNING
+        # Threads beyond the fair share only if others leave them unused;
+        # free slots queued jobs are about to take keep their share
+        with self._process_lock:
+            running = [
+                other for other in self.jobs
+                if other.status == JOB_RUNNING and other is not job
+            ]
+            queued = sum(1 for other in self.jobs if other.status == JOB_QUEUED)
+            slots = max(0, self.scheduler.max_workers - len(running) - 1)
+            in_use = (
+                sum(other.threads for other in running)
+                + min(queued, slots) * self._thread_share
+            )
+            job.threads = grant_threads(
+                job.threads,
+                self._thread_share,
+                self.options.threads or os.cpu_count() or 1,
+                in_use
+            )
+        record = job.telemetry
+        record.start(time.monotonic())
+        self.listener.on_job_started(job)
+        self.listener.on_log(
+            f"--- Processing {job.index}/{self.total_files}: {job.name} ---",
+            INFO,
+            job.name
+        )
+
+        write_dir = self.placement.write_dir(job.path)
+        options = self.options.copy(
+            threads=job.threads,
+            output_dir=write_dir if write_dir != os.path.dirname(job.path) else None
+        )
+        recompress = options.mode == MODE_RECOMPRESS
+        # Replacing the source in place needs the new file verified
+        final = self.final_output(job.path)
+        replace = recompress and final == job.path
+        # nsz only refuses to overwrite what it writes in place itself
+        if ((recompress or self.placement.staged) and not replace
+                and job.path not in self._replaceable and os.path.exists(final)):
+            self.listener.on_log(
+                f"✗ {os.path.basename(final)} already exists in "
+                f"{os.path.dirname(final)}, not overwriting it",
+                ERROR,
+                job.name
+            )
+            self._finish_job(job, 1)
+            done()
+            return
+        if recompress:
+            # Both passes write to a folder of their own, in memory if
+            # the title fits; the result is then moved to its place
+            info = inspect(job.path)
+            size = info.uncompressed_size if info else None
+            try:
+                job.work_dir, in_memory = self.intermediate.acquire(
+                    size + job.size if size else None,
+                    write_dir
+                )
+            except OSError as e:
+                self.listener.on_log(f"Error: {e}", ERROR, job.name)
+                self._finish_job(job, 1)
+                done()
+                return
+            self.listener.on_log(
+                f"Decompressing to {'memory' if in_memory else job.work_dir}",
+                INFO,
+                job.name
+            )
+            intermediate = output_path(job.path, job.work_dir)
+            written = output_path(job.path, job.work_dir, MODE_RECOMPRESS)
+            staged = True
+        else:
+            written = output_path(job.path, options.output_dir)
+            staged = self.placement.staged
+            if options.output_dir:
+                os.makedirs(options.output_dir, exist_ok=True)
+
+        # An output that exists already is not ours to clean up; the
+        # folder of a recompression is removed as a whole
+        partial = None if recompress or os.path.exists(written) else written
+        self._partial_outputs[job.path] = partial
+        if self.journal:
+            # An interrupted recompression leaves its folder, maybe in RAM
+            self.journal.running(job.path, job.work_dir if recompress else partial)
+
+        splitter = LineSplitter()
+        started = time.monotonic()
+        verify_started = None
+        current = (job.path, options)  # What nsz converts now, and how
+
+        def start(level=None):
+            nonlocal options, started, current
+            with self._process_lock:
+                if self.stopped:
+                    self._finish_job(job, -15)
+                    done()
+                    return
+                if level is not None:
+                    options = options.copy(level=level)
+                started = time.monotonic()
+                record.level = (
+                    options.level if options.mode != MODE_DECOMPRESS else None
+                )
+                record.enter(PHASE_SETUP, started)
+                current = (
+                    (job.path, options.decompress_pass(job.work_dir))
+                    if recompress else (job.path, options)
+                )
+                launch(self._engine_enabled())
+
+        def next_pass(path, run_options, phase, now, text):
+            nonlocal current
+            current = (path, run_options)
+            record.add_cpu(getattr(job.process, "cpu_seconds", None))
+            record.enter(phase, now)
+            self.listener.on_log(text, INFO, job.name)
+            launch(self._engine_enabled())
+
+        def on_exit(returncode):
+            if returncode is None:
+                # The engine could not start a worker; use the nsz command
+                self.listener.on_log(
+                    "⚠️ nsz engine unavailable, falling back to the nsz command",
+                    WARNING,
+                    job.name
+                )
+                launch(use_engine=False)
+                return
+
+            nonlocal verify_started
+            self.governor.remove_job(job)
+            now = time.monotonic()
+
+            # Process any remaining output
+            line = splitter.flush()
+            if line:
+                self._process_output_line(line, False, job)
+
+            ok = returncode == 0 and job.verified is not False and not self.stopped
+            if ok and recompress and current[1].mode == MODE_DECOMPRESS:
+                # Only the hashes of the new file count from here on
+                job.verified = None
+                next_pass(
+                    intermediate,
+                    options.compress_pass(job.work_dir, verify=replace),
+                    PHASE_COMPRESS,
+                    now,
+                    f"Compressing {os.path.basename(intermediate)}"
+                )
+                return
+            if ok and verify_started is None and options.needs_verify_pass():
+                # Read the written file back, as nsz -V does
+                verify_started = now
+                job.verifying = True
+                next_pass(
+                    written,
+                    options.verify_pass(),
+                    PHASE_VERIFY,
+                    now,
+                    f"Verifying {os.path.basename(written)}"
+                )
+                return
+            if ok and verify_started is not None:
+                self.throughput.record(
+                    throughput_key(options.verify_pass()),
+                    _file_size(written),
+                    now - verify_started
+                )
+
+            job.verifying = False
+            job.set_paused(False, now)
+            job.elapsed = now - started - job.paused_seconds
+
+            if ok and replace and not job.verified:
+                self.listener.on_log(
+                    f"⚠️ Keeping {job.name}, nsz reported no verified hashes "
+                    "for the new file",
+                    WARNING,
+                    job.name
+                )
+                ok, returncode = False, returncode or 1
+
+            if staged and ok:
+                # Copying gigabytes must not block the supervisor thread
+                threading.Thread(
+                    target=self._move_staged_output,
+                    args=(job, written, done),
+                    daemon=True
+                ).start()
+                return
+
+            self._finish_job(job, returncode)
+            done()
+
+        def launch(use_engine):
+            path, run_options = current
+            try:
+                if use_engine:
+                    job.process = get_engine().submit(
+                        path,
+                        run_options,
+                        lambda line, is_carriage: self._process_output_line(
+                            line, is_carriage, job
+                        ),
+                        lambda progress: self._on_progress(job, progress),
+                        on_exit
+                    )
+                else:
+                    # Own process group, so pausing reaches nsz's helpers too
+                    job.process = get_supervisor().spawn(
+                        build_command(run_options, path, self.nsz_binary),
+                        lambda chunk: self._process_output_chunk(splitter, chunk, job),
+                        on_exit,
+                        start_new_session=True
+                    )
+                    apply_priority(job.process.pid, self.profile)
+            except Exception as e:
+                self._release_work_dir(job)
+                self._fail_job(job, f"Error: {e}")
+                done()
+                return
+
+            self.governor.add_job(job, lambda: self._job_child(job))
+
+            # Stop or pause may have been pressed while the process was starting
+            if self.stopped:
+                self._terminate_process(job)
+            elif self.paused:
+                self._set_job_paused(job, True, time.monotonic())
+
+        if (self.tuner or self.probe) and options.mode == MODE_COMPRESS:
+            self._tune_job(job, start, done)
+        else:
+            start()
+
+    def _tune_job(self, job, start, done):
+        """
+        Sample a file for its level and savings, then call start(level).
+
+        Files the probe finds not worth compressing are skipped instead.
+        """
+        def sample(*args):
+            # Visible to stop() and pause() while sampling
+            with self._process_lock:
+                handle = get_engine().sample(*args)
+                if job.process is None:
+                    job.process = handle
+                return handle
+
+        def on_choice(choice):
+            job.process = None
+            if choice is None:
+                if not self.stopped:
+                    self.listener.on_log(
+                        f"⚠️ Could not sample {job.name}, using the selected level",
+                        WARNING,
+                        job.name
+                    )
+                start()
+                return
+
+            threads = job.threads or os.cpu_count() or 1
+            self.listener.on_log(
+                f"Level {choice.level} for {job.name}: about "
+                f"{1 - choice.ratio:.0%} smaller at "
+                f"{format_rate(choice.speed * threads)}"
+                f"{'' if choice.sampled else ' (remembered)'}",
+                INFO,
+                job.name
+            )
+            decide(choice.level, choice.ratio)
+
+        def on_ratio(ratio):
+            job.process = None
+            if ratio is None and not self.stopped:
+                self.listener.on_log(
+                    f"⚠️ Could not probe {job.name}, compressing it anyway",
+                    WARNING,
+                    job.name
+                )
+            decide(None, ratio)
+
+        def decide(level, ratio):
+            job.estimated_ratio = ratio
+            if (self.stopped or ratio is None or self.probe is None
+                    or not self.probe.is_low_gain(ratio)):
+                start(level)
+                return
+
+            if self.probe.action == LOW_GAIN_SKIP:
+                self.listener.on_log(
+                    f"↷ Skipping {job.name}: only about {1 - ratio:.1%} smaller",
+                    INFO,
+                    job.name
+                )
+                self._skip_job(job)
+                done()
+                return
+
+            self.listener.on_log(
+                f"Only about {1 - ratio:.1%} to gain for {job.name}, "
+                f"using a fast level",
+                INFO,
+                job.name
+            )
+            start(min(level or self.options.level or LOW_GAIN_LEVEL, LOW_GAIN_LEVEL))
+
+        job.process = None
+        job.telemetry.enter(PHASE_SAMPLE, time.monotonic())
+        if self.tuner:
+            self.tuner.choose(
+                job.path, job.threads, self._required_speed(), sample, on_choice
+            )
+        else:
+            self.probe.estimate(job.path, sample, on_ratio)
+
+    def _space_needs(self, job):
+        """SpaceNeed objects of a job, for the SpaceAdmission."""
+        info = inspect(job.path)
+        size = expected_output_size(job, self.options, info)
+        write_dir = self.placement.write_dir(job.path)
+        final_dir = self.placement.final_dir(job.path)
+
+        if self.options.mode == MODE_RECOMPRESS:
+            # Both passes run in a folder of their own, in memory if the
+            # title fits; the result is then moved to its place
+            disk = info.uncompressed_size + job.size if info else job.size * 2
+            intermediate = self.intermediate
+            in_memory = (
+                intermediate.memory_dir is not None
+                and info is not None
+                and disk <= intermediate.budget
+            )
+            needs = [] if in_memory else [SpaceNeed(write_dir, disk + size)]
+            if in_memory or filesystem(final_dir) != filesystem(write_dir):
+                needs.append(SpaceNeed(final_dir, size))
+            return needs
+
+        needs = [
+            SpaceNeed(
+                write_dir, size, output_path(job.path, write_dir, self.options.mode)
+            )
+        ]
+        if self.placement.staged and filesystem(final_dir) != filesystem(write_dir):
+            needs.append(SpaceNeed(final_dir, size))
+        return needs
+
+    def _on_waiting_for_space(self, job, folder, needed, available):
+        self.listener.on_log(
+            f"Waiting for space: {job.name} needs {format_size(needed)} "
+            f"on {folder}, {format_size(available)} free",
+            INFO,
+            job.name
+        )
+
+    def _reject_job(self, job):
+        """Fail a job whose output cannot fit, without starting it."""
+        shortfall = self.scheduler.admission.shortfall(job)
+        if shortfall:
+            folder, needed, available = shortfall
+            text = (
+                f"✗ Not enough space for {job.name}: needs "
+                f"{format_size(needed)} on {folder}, {format_size(available)} free"
+            )
+        else:
+            text = f"✗ Not enough space for {job.name}"
+        self._fail_job(job, text)
+
+    def _fail_job(self, job, text):
+        """Fail a job that never ran nsz, or could not start it."""
+        job.status = JOB_FAILED
+        self._record_result(job, False)
+        self.listener.on_log(text, ERROR, job.name)
+        job.telemetry.finish(JOB_FAILED, time.monotonic())
+        if self.journal:
+            self.journal.finished(job.path, FILE_FAILED)
+        self.listener.on_job_finished(job)
+
+    def _skip_job(self, job):
+        """Finish a started job without converting its file."""
+        job.status = JOB_SKIPPED
+        job.fraction = 1.0
+        job.telemetry.finish(JOB_SKIPPED, time.monotonic())
+        if self.journal:
+            self.journal.finished(job.path, FILE_SKIPPED)
+        self.listener.on_job_finished(job)
+
+    def savings(self):
+        """
+        Estimated and actual savings of the converted files with an estimate.
+
+        Returns:
+            (files, input bytes, estimated output bytes, actual output
+            bytes), or None if no file had both
+        """
+        jobs = [
+            job for job in self.jobs
+            if job.status == JOB_DONE
+            and job.estimated_ratio is not None
+            and job.output_size is not None
+        ]
+        if not jobs:
+            return None
+        return (
+            len(jobs),
+            sum(job.size for job in jobs),
+            sum(job.size * job.estimated_ratio for job in jobs),
+            sum(job.output_size for job in jobs),
+        )
+
+    def _report_savings(self):
+        savings = self.savings()
+        skipped = sum(1 for job in self.jobs if job.status == JOB_SKIPPED)
+        if skipped:
+            self.listener.on_log(
+                f"Skipped {skipped} file{'s' if skipped != 1 else ''} "
+                f"with little to gain"
+            )
+        if savings is None:
+            return
+        files, size, estimated, actual = savings
+        if size <= 0:
+            return
+        self.listener.on_log(
+            f"Savings over {files} file{'s' if files != 1 else ''}: "
+            f"estimated {1 - estimated / size:.1%}, actual {1 - actual / size:.1%}"
+        )
+
+    def _required_speed(self):
+        remaining = sum(job.size for job in self.jobs if not job.finished)
+        workers = self.scheduler.max_workers if self.scheduler else self.workers
+        return self.tuner.target.required_speed(remaining, workers)
+
+    def _report_telemetry(self):
+        summary = self.telemetry.summary()
+        if not summary["converted"] or not summary["wall_seconds"]:
+            return
+        text = (
+            f"{summary['converted']} file{'s' if summary['converted'] != 1 else ''}: "
+            f"{format_size(summary['input_bytes'])} → "
+            f"{format_size(summary['output_bytes'])} "
+            f"at {format_rate(summary['input_bytes'] / summary['wall_seconds'])}"
+        )
+        if summary["cpu_seconds"] is not None:
+            text += f", {format_duration(summary['cpu_seconds'])} CPU"
+        if (summary["verify_saved_seconds"] or 0) >= MIN_REPORTED_SAVING:
+            text += (
+                f", about {format_duration(summary['verify_saved_seconds'])} "
+                "saved by verifying while writing"
+            )
+        self.listener.on_log(text)
+
+    def _on_progress(self, job, progress):
+        if job.verifying:
+            # nsz labels the bars of a read-back "Decompress"
+            progress.step = "Verifying"
+        record = job.telemetry
+        if record:
+            record.progress(progress, time.monotonic())
+        self.listener.on_job_progress(job, progress)
+
+    def _move_staged_output(self, job, staged, done):
+        job.telemetry.enter(PHASE_MOVE, time.monotonic())
+        final = self.final_output(job.path)
+        self.listener.on_log(
+            f"Moving {os.path.basename(staged)} to {os.path.dirname(final)}",
+            INFO,
+            job.name
+        )
+        try:
+            self.placement.move_to_final(
+                staged, final, final == job.path or job.path in self._replaceable
+            )
+            returncode = 0
+        except OSError as e:
+            self.listener.on_log(f"Error: {e}", ERROR, job.name)
+            returncode = 1
+
+        self._finish_job(job, returncode)
+        done()
+
+    def _finish_job(self, job, returncode):
+        """Record the result of a job whose process has exited."""
+        if self.stopped:
+            job.status = JOB_STOPPED
+        elif self.keys_error:
+            job.status = JOB_FAILED
+            self.scheduler.stop()
+        elif returncode == 0 and job.verified is False:
+            job.status = JOB_FAILED
+            self._record_result(job, False)
+            self.listener.on_log(
+                f"✗ {job.name} failed verification",
+                ERROR,
+                job.name
+            )
+            self._remove_partial_output(job)
+        elif returncode == 0:
+            job.status = JOB_DONE
+            try:
+                job.output_size = os.path.getsize(self.final_output(job.path))
+            except OSError:
+                pass
+            self.throughput.record(
+                throughput_key(self.options), job.size, job.elapsed
+            )
+            if job.output_size and self.options.mode != MODE_DECOMPRESS:
+                # The tuner may have picked another level for this file
+                level = job.telemetry.level if job.telemetry else None
+                ran = self.options.copy(level=level) if level else self.options
+                self.throughput.record_ratio(
+                    throughput_key(ran), job.size, job.output_size
+                )
+            self._record_result(job, True)
+            self.listener.on_log(
+                f"✓ Successfully processed {job.name}",
+                INFO,
+                job.name
+            )
+            if self.options.mode == MODE_DECOMPRESS and self.options.verifies:
+                self._report_inline_verify(job)
+            if (self.options.rm_source and self.options.mode != MODE_COMPRESS
+                    and self.final_output(job.path) != job.path):
+                self._remove_source(job)
+        else:
+            job.status = JOB_FAILED
+            self._record_result(job, False)
+            self.listener.on_log(
+                f"✗ Failed to process {job.name}",
+                ERROR,
+                job.name
+            )
+
+        record = job.telemetry
+        if record:
+            record.verify_saved_seconds = job.verify_saved
+            record.finish(
+                job.status,
+                time.monotonic(),
+                job.output_size,
+                getattr(job.process, "cpu_seconds", None),
+                job.paused_seconds
+            )
+
+        if self.journal:
+            self.journal.finished(job.path, JOURNAL_STATES[job.status])
+        if job.status == JOB_STOPPED:
+            self._remove_partial_output(job)
+        self._release_work_dir(job)
+
+        self.listener.on_job_finished(job)
+
+        if self.pausing and not any(
+            other.status == JOB_RUNNING for other in self.jobs if other is not job
+        ):
+            queued = sum(1 for other in self.jobs if not other.finished)
+            self.listener.on_log(
+                f"⏸ Paused, {queued} file{'s' if queued != 1 else ''} left"
+            )
+
+    def _report_inline_verify(self, job):
+        """Log how long reading the output back would have taken."""
+        if self.options.verify_mode != VERIFY_INLINE or not job.verified:
+            return
+        size = job.output_size or job.size
+        rate = self.throughput.rate(throughput_key(self.options.verify_pass()))
+        if not rate and job.elapsed:
+            # Never measured: assume reading back is as fast as writing was
+            rate = size / job.elapsed
+        if not rate:
+            return
+        job.verify_saved = size / rate
+        if job.verify_saved < MIN_REPORTED_SAVING:
+            return
+        self.listener.on_log(
+            f"✓ Hashes verified while writing, about "
+            f"{format_duration(job.verify_saved)} saved",
+            INFO,
+            job.name
+        )
+
+    def _remove_source(self, job):
+        """Delete the source of a file whose output's hashes matched."""
+        if not job.verified:
+            self.listener.on_log(
+                f"⚠️ Keeping {job.name}, nsz reported no verified hashes",
+                WARNING,
+                job.name
+            )
+            return
+        try:
+            os.remove(job.path)
+        except OSError as e:
+            self.listener.on_log(
+                f"⚠️ Could not delete {job.name}: {e}", WARNING, job.name
+            )
+            return
+        self.listener.on_log(f"Deleted source file {job.name}", INFO, job.name)
+
+    def _release_work_dir(self, job):
+        if job.work_dir:
+            self.intermediate.release(job.work_dir)
+            job.work_dir = None
+
+    def _remove_partial_output(self, job):
+        partial = self._partial_outputs.get(job.path)
+        if partial and remove_partial_output(partial):
+            self.listener.on_log(
+                f"Removed partial output {os.path.basename(partial)}",
+                INFO,
+                job.name
+            )
+
+    def _record_result(self, job, ok):
+        if self.cache is None:
+            return
+        output = self.final_output(job.path)
+        self.cache.record(
+            job.path,
+            self._file_keys.get(job.path),
+            self.options,
+            output if ok and os.path.exists(output) else None,
+            ok
+        )
+
+    def _terminate_process(self, job):
+        """Gracefully terminate the process of a job, with fallback to kill."""
+        if isinstance(job.process, EngineJob):
+            get_engine().cancel(job.process)
+        elif job.process:
+            get_supervisor().terminate(job.process)
+
+    def _process_output_chunk(self, splitter, chunk, job):
+        """Split a chunk of process output into lines and handle each one."""
+        for line, is_carriage in splitter.feed(chunk):
+            self._process_output_line(line, is_carriage, job)
+
+    def _process_output_line(self, line, is_carriage_return, job):
+        """
+        Process a single line of output from nsz.
+
+        Args:
+            line: The output line to process
+            is_carriage_return: True if line ended with \r (progress update)
+            job: The ConversionJob that produced the line
+        """
+        if not line:
+            return
+
+        try:
+            verified = verify_result(line)
+            if verified is not None:
+                job.verified = verified and job.verified is not False
+
+            if is_keys_error(line):
+                self.keys_error = True
+                self.listener.on_log(f"❌ ERROR: {line}", ERROR, job.name)
+            elif is_progress_line(line):
+                progress = parse_progress_line(line)
+                if progress:
+                    self._on_progress(job, progress)
+            elif not is_carriage_return or verified is not None:
+                # Only log non-progress lines that end with newline
+                self.listener.on_log(
+                    line, ERROR if verified is False else INFO, job.name
+                )
+        except Exception:
+            pass
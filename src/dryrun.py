@@ -0,0 +1,267 @@
+# dryrun.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Dry run of a batch: what each file is expected to become and how long
+it takes, before nsz is started.
+
+Output sizes come from the file headers and from what earlier runs
+learned: the samples and probes of a title in the tuning memory, and
+the ratio measured for the settings in the throughput history. Times
+come from the throughput measured for the settings, with the parallel
+jobs simulated like the estimate a running batch logs. The space the
+outputs need is compared with what is free on each destination.
+"""
+
+import os
+
+from .core import throughput_key
+from .leveltuner import get_tuning_memory, title_key
+from .nszoptions import MODE_DECOMPRESS, MODE_RECOMPRESS
+from .placement import Placement, filesystem, free_space
+from .planner import ThroughputHistory, estimate_batch_seconds, plan_batch
+from .rominfo import inspect
+
+# Where the expected output size of a file comes from
+ESTIMATE_HEADERS = "headers"   # Exact, from the NCZ section tables
+ESTIMATE_SAMPLES = "samples"   # The title was sampled at this level
+ESTIMATE_PROBE = "probe"       # The title was probed at PROBE_LEVEL
+ESTIMATE_HISTORY = "history"   # Average of earlier files with these settings
+
+
+class PlannedFile:
+    """Expected outcome of converting one file."""
+
+    __slots__ = ("path", "size", "output_size", "estimate", "seconds", "info")
+
+    def __init__(self, path, size, info):
+        self.path = path
+        self.size = size
+        self.info = info           # RomInfo, or None if the headers are unreadable
+        self.output_size = None    # Bytes, None if nothing is known yet
+        self.estimate = None       # One of ESTIMATE_*
+        self.seconds = None
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def ratio(self):
+        if self.output_size is None or not self.size:
+            return None
+        return self.output_size / self.size
+
+    def to_dict(self):
+        return {
+            "file": self.path,
+            "size": self.size,
+            "output_size": self.output_size,
+            "estimate": self.estimate,
+            "seconds": round(self.seconds, 1) if self.seconds is not None else None,
+            "title_id": self.info.title_id if self.info else None,
+            "compression": self.info.compression if self.info else None,
+        }
+
+
+class SpaceCheck:
+    """Room the outputs need on one file system, and what is free there."""
+
+    __slots__ = ("folder", "free", "needed", "unknown")
+
+    def __init__(self, folder, free):
+        self.folder = folder    # First destination folder on the file system
+        self.free = free        # None if the file system cannot tell
+        self.needed = 0
+        self.unknown = 0        # Outputs of unknown size, not in needed
+
+    @property
+    def fits(self):
+        return self.free is None or self.needed <= self.free
+
+    def to_dict(self):
+        return {
+            "folder": self.folder,
+            "free": self.free,
+            "needed": self.needed,
+            "unknown": self.unknown,
+            "fits": self.fits,
+        }
+
+
+class DryRunPlan:
+    """Expected outcome of a whole batch."""
+
+    def __init__(self, options, workers, files, seconds, spaces):
+        self.options = options
+        self.workers = workers
+        self.files = files      # PlannedFile objects, in start order
+        self.seconds = seconds  # Wall time, None without measured throughput
+        self.spaces = spaces    # SpaceCheck per destination file system
+
+    @property
+    def input_bytes(self):
+        return sum(planned.size for planned in self.files)
+
+    @property
+    def estimated(self):
+        """Files whose output size is known or estimated."""
+        return [planned for planned in self.files if planned.output_size is not None]
+
+    @property
+    def output_bytes(self):
+        """Expected output of the estimated files."""
+        return sum(planned.output_size for planned in self.estimated)
+
+    @property
+    def savings(self):
+        """Bytes the estimated files shrink by, negative if they grow."""
+        estimated = self.estimated
+        if not estimated:
+            return None
+        return sum(planned.size for planned in estimated) - self.output_bytes
+
+    @property
+    def fits_space(self):
+        return all(space.fits for space in self.spaces)
+
+    def fits_time(self, seconds):
+        """True if the batch is expected to finish in seconds, None if unknown."""
+        if self.seconds is None:
+            return None
+        return self.seconds <= seconds
+
+    def to_dict(self):
+        return {
+            "mode": self.options.mode,
+            "level": self.options.level,
+            "solid": self.options.solid,
+            "workers": self.workers,
+            "files": [planned.to_dict() for planned in self.files],
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "estimated_files": len(self.estimated),
+            "savings": self.savings,
+            "seconds": round(self.seconds, 1) if self.seconds is not None else None,
+            "space": [space.to_dict() for space in self.spaces],
+            "fits_space": self.fits_space,
+        }
+
+
+def _expected_output(planned, options, throughput, memory):
+    """(bytes, ESTIMATE_*) expected from converting a file, or (None, None)."""
+    info = planned.info
+    if options.mode == MODE_DECOMPRESS:
+        if info is None:
+            return None, None
+        return info.uncompressed_size, ESTIMATE_HEADERS
+
+    history = throughput.ratio(throughput_key(options))
+    if options.mode == MODE_RECOMPRESS:
+        # Samples are of the uncompressed title, which the headers give
+        ratio = memory.sampled_ratio(title_key(planned.path), options.level)
+        if ratio is not None and info is not None:
+            return info.uncompressed_size * ratio, ESTIMATE_SAMPLES
+        if history is not None:
+            return planned.size * history, ESTIMATE_HISTORY
+        return None, None
+
+    ratio = memory.sampled_ratio(title_key(planned.path), options.level)
+    if ratio is not None:
+        return planned.size * ratio, ESTIMATE_SAMPLES
+    if history is not None:
+        return planned.size * history, ESTIMATE_HISTORY
+    # Higher levels only shrink a title a little more than the probe did
+    ratio = memory.probe_ratio(title_key(planned.path))
+    if ratio is not None:
+        return planned.size * ratio, ESTIMATE_PROBE
+    return None, None
+
+
+def _check_space(files, options, workers, placement):
+    """SpaceCheck per destination file system."""
+    # Sources are deleted or replaced once their output is verified
+    frees_source = options.rm_source or (
+        options.mode == MODE_RECOMPRESS and not options.output_dir
+    )
+    spaces = {}
+    growth = {}     # file system -> bytes the outputs add for good
+    in_flight = {}  # file system -> bytes held until a source is deleted
+    for planned in files:
+        folder = placement.final_dir(planned.path)
+        device = filesystem(folder)
+        if device not in spaces:
+            spaces[device] = SpaceCheck(folder, free_space(folder))
+        if planned.output_size is None:
+            spaces[device].unknown += 1
+            continue
+        output = planned.output_size
+        if frees_source and filesystem(os.path.dirname(planned.path)) == device:
+            # Until its source goes, an output takes its full size
+            growth[device] = growth.get(device, 0) + max(0, output - planned.size)
+            in_flight.setdefault(device, []).append(min(output, planned.size))
+        else:
+            growth[device] = growth.get(device, 0) + output
+
+    for device, space in spaces.items():
+        running = sorted(in_flight.get(device, ()), reverse=True)[:workers]
+        space.needed = growth.get(device, 0) + sum(running)
+    return list(spaces.values())
+
+
+def plan_dry_run(files, options, workers=1, root=None, throughput=None, memory=None):
+    """
+    Predict the outcome of a batch without converting anything.
+
+    Args:
+        files: Input file paths
+        options: ConversionOptions of the batch
+        workers: Number of jobs running at the same time
+        root: Folder the batch is started in, for outputs in subfolders
+        throughput: ThroughputHistory, None for the stored one
+        memory: TuningMemory, None for the shared one
+
+    Returns:
+        DryRunPlan
+    """
+    throughput = throughput or ThroughputHistory()
+    memory = memory or get_tuning_memory()
+    jobs = plan_batch(files, workers, options.threads)
+    rate = throughput.rate(throughput_key(options))
+
+    planned_files = []
+    for job in jobs:
+        planned = PlannedFile(job.path, job.size, inspect(job.path))
+        output, planned.estimate = _expected_output(
+            planned, options, throughput, memory
+        )
+        if output is not None:
+            planned.output_size = round(output)
+        if rate:
+            planned.seconds = job.size / rate
+        planned_files.append(planned)
+
+    placement = Placement(root, options.output_dir)
+    return DryRunPlan(
+        options,
+        workers,
+        planned_files,
+        estimate_batch_seconds(jobs, workers, rate),
+        _check_space(planned_files, options, workers, placement)
+    )
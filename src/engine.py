@@ -0,0 +1,401 @@
+# engine.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import importlib.util
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+from collections import deque
+
+from .governor import apply_priority
+from .nszworker import EVENT_PREFIX, KIND_CONVERT, KIND_SAMPLE
+from .outputparser import JobProgress, LineSplitter
+from .supervisor import get_supervisor, process_cpu_seconds
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def engine_available():
+    """True if the nsz library can be imported by a worker."""
+    try:
+        return importlib.util.find_spec("nsz") is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def get_engine():
+    """Return the shared NszEngine."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = NszEngine()
+        return _engine
+
+
+def _worker_command():
+    return [sys.executable, "-m", f"{__package__}.nszworker"]
+
+
+def _worker_env():
+    # The package lives in pkgdatadir, which is not on the default path
+    env = dict(os.environ)
+    package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    paths = [package_parent]
+    if env.get("PYTHONPATH"):
+        paths.append(env["PYTHONPATH"])
+    env["PYTHONPATH"] = os.pathsep.join(paths)
+    return env
+
+
+class EngineJob:
+    """A conversion queued on or running in the engine."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, path, options, on_line, on_progress, on_exit,
+                 kind=KIND_CONVERT, levels=None, on_result=None):
+        self.id = next(self._ids)
+        self.path = path
+        self.options = options
+        self.on_line = on_line
+        self.on_progress = on_progress
+        self.on_exit = on_exit
+        self.kind = kind
+        self.levels = levels
+        self.on_result = on_result
+        self.worker = None
+        self.paused = False
+        self.cpu_start = None
+        self.cpu_seconds = None  # CPU time of the worker for this job
+
+    def to_message(self):
+        if self.kind == KIND_SAMPLE:
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "path": self.path,
+                "levels": self.levels,
+            }
+        return {
+            "id": self.id,
+            "path": self.path,
+            "options": self.options.to_dict(),
+        }
+
+
+class EngineWorker:
+    """
+    A long-lived Python process with nsz imported and keys loaded.
+
+    Its PTY output is split into lines here: engine events are handled,
+    everything else is nsz output for the current job.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.splitter = LineSplitter()
+        self.ready = False
+        self.job = None
+        self.failure = None
+        self.profile = engine.profile
+        self.process = get_supervisor().spawn(
+            _worker_command(),
+            self.on_output,
+            self.on_exit,
+            stdin=subprocess.PIPE,
+            env=_worker_env(),
+            start_new_session=True
+        )
+        if self.profile:
+            apply_priority(self.process.pid, self.profile)
+
+    def runs_at(self, profile):
+        """True if the worker was started with the priority of profile."""
+        mine = self.profile.priority if self.profile else None
+        return mine == (profile.priority if profile else None)
+
+    def run(self, job):
+        self.job = job
+        job.worker = self
+        job.cpu_start = process_cpu_seconds(self.process.pid)
+        line = json.dumps(job.to_message()) + "\n"
+        self.process.popen.stdin.write(line.encode("utf-8"))
+        self.process.popen.stdin.flush()
+
+    def set_paused(self, paused):
+        if paused:
+            get_supervisor().pause(self.process)
+        else:
+            get_supervisor().resume(self.process)
+
+    def close(self):
+        """Let the worker exit once its current job is done."""
+        try:
+            self.process.popen.stdin.close()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _cpu_since(job, cpu):
+        if cpu is None or job.cpu_start is None:
+            return None
+        return max(0.0, cpu - job.cpu_start)
+
+    def on_output(self, chunk):
+        for line, is_carriage_return in self.splitter.feed(chunk):
+            if line.startswith(EVENT_PREFIX):
+                try:
+                    event = json.loads(line[len(EVENT_PREFIX):])
+                except ValueError:
+                    continue
+                self.on_event(event)
+            elif self.job:
+                self.job.on_line(line, is_carriage_return)
+
+    def on_event(self, event):
+        kind = event.get("event")
+        if kind == "ready":
+            self.ready = True
+            self.engine._worker_idle(self)
+        elif kind == "failed":
+            self.failure = event.get("reason")
+        elif kind == "progress" and self.job and self.job.id == event.get("id"):
+            self.job.on_progress(JobProgress(
+                event.get("step"),
+                event.get("done", 0),
+                event.get("total", 0),
+                event.get("rate", 0.0)
+            ))
+        elif kind == "sample" and self.job and self.job.id == event.get("id"):
+            if self.job.on_result:
+                self.job.on_result(event.get("results", []))
+        elif kind == "done" and self.job and self.job.id == event.get("id"):
+            job, self.job = self.job, None
+            job.cpu_seconds = self._cpu_since(job, process_cpu_seconds(self.process.pid))
+            self.engine._worker_idle(self)
+            job.on_exit(event.get("returncode", 1))
+            self.engine._dispatch()
+
+    def on_exit(self, returncode):
+        rest = self.splitter.flush()
+        job, self.job = self.job, None
+        if job and rest:
+            job.on_line(rest, False)
+
+        self.engine._worker_exited(self)
+
+        if job:
+            # Crashed or terminated in the middle of a job
+            job.cpu_seconds = self._cpu_since(job, self.process.cpu_seconds)
+            job.on_exit(returncode or 1)
+        self.engine._dispatch()
+
+
+class NszEngine:
+    """
+    Runs conversions in a pool of long-lived nsz worker processes.
+
+    Starting nsz means importing it, pycryptodome and zstandard and
+    parsing prod.keys. Workers do that once and then take jobs from a
+    queue, so a batch of small files no longer pays the start-up cost
+    for every file. Workers are started on demand, up to size at once,
+    or ahead of time with prewarm(), and stay idle between batches so
+    the next batch starts without a cold start. A worker is only lost
+    when a job is stopped, since stopping terminates it.
+
+    Workers run at the priority of the ResourceProfile they were started
+    with. A process cannot raise its own priority again, so after
+    set_profile() workers with another priority are retired once idle.
+
+    If workers cannot start (nsz missing, no keys), queued jobs get
+    on_exit(None) so the caller can fall back to the nsz command.
+    """
+
+    def __init__(self, size=1):
+        self.size = size
+        self.failed = False
+        self.profile = None
+        self._lock = threading.RLock()
+        self._queue = deque()
+        self._workers = []
+        self._idle = []
+
+    def resize(self, size):
+        """Allow up to size workers at the same time."""
+        with self._lock:
+            self.size = max(1, size)
+        self._dispatch()
+
+    def set_profile(self, profile):
+        """Run new jobs at the priority of a ResourceProfile."""
+        with self._lock:
+            self.profile = profile
+            retired = [w for w in self._idle if not w.runs_at(profile)]
+            for worker in retired:
+                self._retire(worker)
+        self._dispatch()
+
+    def _retire(self, worker):
+        if worker in self._workers:
+            self._workers.remove(worker)
+        if worker in self._idle:
+            self._idle.remove(worker)
+        worker.close()
+
+    def prewarm(self, count):
+        """Start workers ahead of time until count are running."""
+        with self._lock:
+            if self.failed:
+                return
+            self.size = max(self.size, count)
+            while len(self._workers) < count:
+                self._workers.append(EngineWorker(self))
+
+    def submit(self, path, options, on_line, on_progress, on_exit):
+        """
+        Queue a conversion.
+
+        Args:
+            path: File to convert
+            options: ConversionOptions for the file
+            on_line: Called with (line, is_carriage_return) for nsz output
+            on_progress: Called with a JobProgress while the job runs
+            on_exit: Called with the exit code, or None if no worker
+                could be started
+
+        Returns:
+            EngineJob
+        """
+        return self._queue_job(EngineJob(path, options, on_line, on_progress, on_exit))
+
+    def sample(self, path, levels, on_result, on_exit):
+        """
+        Queue a sampling job for the level tuner.
+
+        Args:
+            path: NSP or XCI to sample
+            levels: Compression levels to try
+            on_result: Called with the list of results
+            on_exit: Called with the exit code, or None if no worker
+                could be started
+
+        Returns:
+            EngineJob
+        """
+        return self._queue_job(EngineJob(
+            path, None, lambda line, is_carriage: None, lambda progress: None,
+            on_exit, kind=KIND_SAMPLE, levels=levels, on_result=on_result
+        ))
+
+    def _queue_job(self, job):
+        with self._lock:
+            self._queue.append(job)
+        self._dispatch()
+        return job
+
+    def cancel(self, job):
+        """Drop a queued job or terminate the worker running it."""
+        with self._lock:
+            if job in self._queue:
+                self._queue.remove(job)
+                queued = True
+            else:
+                queued = False
+                worker = job.worker
+
+        if queued:
+            job.on_exit(-15)
+        elif worker and worker.job is job:
+            # The worker dies with the job; a new one starts when needed
+            get_supervisor().terminate(worker.process)
+
+    def pause(self, job):
+        """Suspend the worker running a job; a queued job starts paused."""
+        self._set_paused(job, True)
+
+    def resume(self, job):
+        """Continue a paused job."""
+        self._set_paused(job, False)
+
+    def _set_paused(self, job, paused):
+        with self._lock:
+            job.paused = paused
+            worker = job.worker
+        if worker and worker.job is job:
+            worker.set_paused(paused)
+
+    def shutdown(self):
+        """Let all workers exit once they are idle."""
+        with self._lock:
+            workers, self._idle = list(self._workers), []
+        for worker in workers:
+            worker.close()
+
+    # ---------- Worker callbacks ---------- #
+
+    def _dispatch(self):
+        with self._lock:
+            while self._queue and self._idle:
+                worker = self._idle.pop()
+                job = self._queue.popleft()
+                try:
+                    worker.run(job)
+                except OSError:
+                    # Broken pipe: the worker is exiting, retry elsewhere
+                    worker.job = None
+                    self._queue.appendleft(job)
+                    continue
+                if job.paused:
+                    worker.set_paused(True)
+
+            if self.failed:
+                failed, self._queue = list(self._queue), deque()
+            else:
+                failed = []
+                starting = sum(1 for w in self._workers if not w.ready)
+                while (
+                    len(self._queue) > starting
+                    and len(self._workers) < self.size
+                ):
+                    self._workers.append(EngineWorker(self))
+                    starting += 1
+
+        for job in failed:
+            job.on_exit(None)
+
+    def _worker_idle(self, worker):
+        with self._lock:
+            if not worker.runs_at(self.profile):
+                self._retire(worker)
+            elif worker in self._workers and worker not in self._idle:
+                self._idle.append(worker)
+        self._dispatch()
+
+    def _worker_exited(self, worker):
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            if worker in self._idle:
+                self._idle.remove(worker)
+            if not worker.ready:
+                self.failed = True
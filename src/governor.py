@@ -0,0 +1,399 @@
+# governor.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import ctypes
+import os
+import platform
+import threading
+import time
+
+from .supervisor import get_supervisor
+
+# Profiles
+PROFILE_BACKGROUND = "background"
+PROFILE_BALANCED = "balanced"
+PROFILE_MAX_THROUGHPUT = "max-throughput"
+DEFAULT_PROFILE = PROFILE_MAX_THROUGHPUT  # As nsz runs without a profile
+
+# I/O scheduling classes (linux/ioprio.h)
+IOPRIO_CLASS_NONE = 0
+IOPRIO_CLASS_BE = 2    # Best effort, levels 0 (highest) to 7
+IOPRIO_CLASS_IDLE = 3  # Only when the disk is otherwise idle
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_WHO_PROCESS = 1
+
+_IOPRIO_SET_SYSCALLS = {
+    "x86_64": 251,
+    "i386": 289,
+    "i686": 289,
+    "aarch64": 30,
+    "riscv64": 30,
+    "armv7l": 314,
+    "ppc64le": 273,
+}
+
+GOVERNOR_INTERVAL = 0.25      # seconds between bandwidth checks
+QUEUE_SAMPLE_INTERVAL = 2.0   # seconds between concurrency decisions
+QUEUE_TIME_FIELD = 10         # weighted ms with requests queued, in a block stat
+MAX_THROTTLE_SECONDS = 2.0    # longest a job is suspended to pay off its I/O debt
+
+
+class ResourceProfile:
+    """
+    How hard conversions may use the machine.
+
+    Attributes:
+        name: One of the PROFILE_* constants
+        nice: CPU niceness of nsz processes
+        ioprio_class: IOPRIO_CLASS_* of nsz processes
+        ioprio_level: Level within the best-effort class
+        adaptive: Lower the number of parallel jobs while the disk
+            queue is deeper than queue_high, and raise it again below
+            queue_low
+        queue_high: Average disk queue depth that counts as thrashing
+        queue_low: Average disk queue depth with room for another job
+    """
+
+    def __init__(self, name, nice=0, ioprio_class=IOPRIO_CLASS_NONE,
+                 ioprio_level=4, adaptive=False, queue_high=4.0, queue_low=1.0):
+        self.name = name
+        self.nice = nice
+        self.ioprio_class = ioprio_class
+        self.ioprio_level = ioprio_level
+        self.adaptive = adaptive
+        self.queue_high = queue_high
+        self.queue_low = queue_low
+
+    @property
+    def priority(self):
+        """What a process started with this profile runs at."""
+        return (self.nice, self.ioprio_class, self.ioprio_level)
+
+
+PROFILES = {
+    PROFILE_BACKGROUND: ResourceProfile(
+        PROFILE_BACKGROUND,
+        nice=19,
+        ioprio_class=IOPRIO_CLASS_IDLE,
+        adaptive=True,
+        queue_high=2.0,
+        queue_low=0.5
+    ),
+    PROFILE_BALANCED: ResourceProfile(
+        PROFILE_BALANCED,
+        nice=10,
+        ioprio_class=IOPRIO_CLASS_BE,
+        ioprio_level=7,
+        adaptive=True
+    ),
+    PROFILE_MAX_THROUGHPUT: ResourceProfile(PROFILE_MAX_THROUGHPUT),
+}
+
+PROFILE_LABELS = {
+    PROFILE_BACKGROUND: "Background",
+    PROFILE_BALANCED: "Balanced",
+    PROFILE_MAX_THROUGHPUT: "Maximum throughput",
+}
+
+
+def get_profile(name):
+    return PROFILES.get(name, PROFILES[DEFAULT_PROFILE])
+
+
+def _ioprio_set(pid, ioprio_class, level):
+    number = _IOPRIO_SET_SYSCALLS.get(platform.machine())
+    if number is None:
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        value = (ioprio_class << IOPRIO_CLASS_SHIFT) | level
+        return libc.syscall(number, IOPRIO_WHO_PROCESS, pid, value) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+def apply_priority(pid, profile):
+    """
+    Set the CPU and I/O priority of a process.
+
+    Called right after the process is started, before nsz creates its
+    compression threads, which inherit the priority. Raising the
+    priority again needs privileges, so failures are ignored.
+    """
+    try:
+        if profile.nice:
+            os.setpriority(os.PRIO_PROCESS, pid, profile.nice)
+    except OSError:
+        pass
+
+    if profile.ioprio_class != IOPRIO_CLASS_NONE:
+        _ioprio_set(pid, profile.ioprio_class, profile.ioprio_level)
+
+
+def process_io_bytes(pid):
+    """Bytes a process has read from and written to storage so far."""
+    try:
+        with open(f"/proc/{pid}/io") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["read_bytes"]) + int(fields["write_bytes"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def process_group_io_bytes(pgids):
+    """
+    Storage bytes of every process in some process groups.
+
+    nsz compresses in multiprocessing children, whose I/O only shows up
+    in the counters of the nsz process once they are reaped, so the
+    whole group is counted.
+
+    Args:
+        pgids: Process group IDs
+
+    Returns:
+        Dict of process group ID -> bytes; groups none of whose
+        processes could be read are left out
+    """
+    totals = {}
+    try:
+        pids = [name for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return totals
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # The command name in parentheses may contain spaces
+                pgid = int(f.read().rsplit(")", 1)[1].split()[2])
+        except (OSError, IndexError, ValueError):
+            continue
+        if pgid not in pgids:
+            continue
+        io_bytes = process_io_bytes(pid)
+        if io_bytes is not None:
+            totals[pgid] = totals.get(pgid, 0) + io_bytes
+    return totals
+
+
+def block_stat_path(path):
+    """The /sys stat file of the block device holding path, or None."""
+    try:
+        st_dev = os.stat(path).st_dev
+    except OSError:
+        return None
+
+    stat = f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}/stat"
+    # Network and virtual file systems have no block device
+    return stat if os.path.exists(stat) else None
+
+
+def read_queue_time(stat_path):
+    """Weighted milliseconds the device has spent with requests queued."""
+    try:
+        with open(stat_path) as f:
+            return int(f.read().split()[QUEUE_TIME_FIELD])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class _GovernedJob:
+    """Bandwidth budget of one running job."""
+
+    __slots__ = ("get_child", "child", "io_bytes", "allowance", "resume_at")
+
+    def __init__(self, get_child):
+        self.get_child = get_child
+        self.child = None
+        self.io_bytes = None
+        self.allowance = 0.0
+        self.resume_at = None
+
+
+class ResourceGovernor:
+    """
+    Keeps a running batch within its ResourceProfile.
+
+    A thread wakes up every GOVERNOR_INTERVAL. With a bandwidth limit
+    it compares the storage I/O of every running job with its budget
+    and suspends a job that is ahead (SIGSTOP on its process group)
+    until it is back within the limit. The limit is approximate: I/O
+    is counted over the job's process group, a process that exits
+    before it is sampled can make its bytes show up late, and a job is
+    never suspended for more than MAX_THROTTLE_SECONDS at a time. With an adaptive profile it
+    samples the average queue depth of the disk holding the files and
+    changes the number of parallel jobs between 1 and the number the
+    batch was started with.
+    """
+
+    def __init__(self, profile, bandwidth_limit=None, on_concurrency=None):
+        """
+        Args:
+            profile: ResourceProfile of the batch
+            bandwidth_limit: Storage bytes per second for each job, or None
+            on_concurrency: Called with the new number of parallel jobs
+        """
+        self.profile = profile
+        self.bandwidth_limit = bandwidth_limit or None
+        self.on_concurrency = on_concurrency
+        self.max_workers = 1
+        self.workers = 1
+        self._stat_path = None
+        self._lock = threading.Lock()
+        self._jobs = {}  # job -> _GovernedJob
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, path, workers):
+        """
+        Start watching a batch.
+
+        Args:
+            path: Folder of the batch, to find its disk
+            workers: Parallel jobs the batch was started with
+        """
+        self.max_workers = self.workers = max(1, workers)
+        if self.profile.adaptive and workers > 1 and path:
+            self._stat_path = block_stat_path(path)
+        if not (self.bandwidth_limit or self._stat_path) or self._thread:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+        with self._lock:
+            jobs, self._jobs = self._jobs, {}
+        for entry in jobs.values():
+            self._release(entry)
+
+    def add_job(self, job, get_child):
+        """
+        Limit the bandwidth of a running job.
+
+        Args:
+            job: The job
+            get_child: Returns the ChildProcess running the job, or None
+                while it waits for one
+        """
+        if not self.bandwidth_limit:
+            return
+        entry = _GovernedJob(get_child)
+        entry.child = get_child()
+        if entry.child:
+            entry.io_bytes = process_group_io_bytes({entry.child.pid}).get(
+                entry.child.pid
+            )
+        with self._lock:
+            self._jobs[job] = entry
+
+    def remove_job(self, job):
+        with self._lock:
+            entry = self._jobs.pop(job, None)
+        if entry:
+            self._release(entry)
+
+    def _release(self, entry):
+        if entry.child and entry.child.throttled:
+            get_supervisor().throttle(entry.child, False)
+
+    def _run(self):
+        last = time.monotonic()
+        queue_time = read_queue_time(self._stat_path) if self._stat_path else None
+        queue_sampled = last
+
+        while not self._stop.wait(GOVERNOR_INTERVAL):
+            now = time.monotonic()
+            if self.bandwidth_limit:
+                self._limit_bandwidth(now - last, now)
+            last = now
+
+            if queue_time is not None and now - queue_sampled >= QUEUE_SAMPLE_INTERVAL:
+                current = read_queue_time(self._stat_path)
+                if current is not None:
+                    depth = (current - queue_time) / ((now - queue_sampled) * 1000)
+                    self._adapt(depth)
+                    queue_time = current
+                queue_sampled = now
+
+    def _limit_bandwidth(self, elapsed, now):
+        """Token bucket per job: a job in debt is suspended until it is not."""
+        # Under the lock, so a finished job is never suspended again
+        with self._lock:
+            for entry in self._jobs.values():
+                if entry.child is None:
+                    # Engine jobs wait for a worker
+                    entry.child = entry.get_child()
+            # Children lead their own process group
+            io_bytes = process_group_io_bytes({
+                entry.child.pid for entry in self._jobs.values() if entry.child
+            })
+            for entry in self._jobs.values():
+                self._limit_job(entry, elapsed, now, io_bytes)
+
+    def _limit_job(self, entry, elapsed, now, group_io_bytes):
+        if entry.resume_at is not None:
+            if now < entry.resume_at:
+                return
+            entry.resume_at = None
+            get_supervisor().throttle(entry.child, False)
+
+        if entry.child is None:
+            return
+
+        io_bytes = group_io_bytes.get(entry.child.pid)
+        if io_bytes is None or entry.io_bytes is None:
+            entry.io_bytes = io_bytes
+            return
+
+        # The total dips while an exited child waits to be reaped, and
+        # comes back once its bytes are added to its parent
+        used = max(0, io_bytes - entry.io_bytes)
+        entry.io_bytes = max(entry.io_bytes, io_bytes)
+
+        # At most one second of unused budget carries over, and at most
+        # MAX_THROTTLE_SECONDS of debt
+        entry.allowance = max(
+            -self.bandwidth_limit * MAX_THROTTLE_SECONDS,
+            min(
+                self.bandwidth_limit,
+                entry.allowance + self.bandwidth_limit * elapsed - used
+            )
+        )
+
+        if entry.allowance < 0:
+            # Suspended until the debt is paid off
+            entry.resume_at = now - entry.allowance / self.bandwidth_limit
+            entry.allowance = 0.0
+            get_supervisor().throttle(entry.child, True)
+
+    def _adapt(self, depth):
+        workers = self.workers
+        if depth > self.profile.queue_high and workers > 1:
+            workers -= 1
+        elif depth < self.profile.queue_low and workers < self.max_workers:
+            workers += 1
+        if workers == self.workers:
+            return
+
+        self.workers = workers
+        if self.on_concurrency:
+            self.on_concurrency(workers, depth)
@@ -0,0 +1,233 @@
+# journal.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+import shutil
+import threading
+import time
+
+from .nszoptions import ConversionOptions
+from .paths import user_data_dir
+
+JOURNAL_FILE_SUFFIX = "-batch.journal"
+
+# Per-file states
+FILE_QUEUED = "queued"
+FILE_RUNNING = "running"
+FILE_DONE = "done"
+FILE_FAILED = "failed"
+FILE_STOPPED = "stopped"
+FILE_SKIPPED = "skipped"
+
+# States that still need a conversion when the batch is resumed
+PENDING_STATES = (FILE_QUEUED, FILE_RUNNING, FILE_STOPPED)
+
+
+def journal_path(mode):
+    """Journal of the current batch of a mode."""
+    return os.path.join(user_data_dir(), f"{mode}{JOURNAL_FILE_SUFFIX}")
+
+
+def remove_partial_output(path):
+    """
+    Delete an output nsz did not finish writing, or the folder of an
+    interrupted recompression. True if removed.
+    """
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
+class JournalState:
+    """A batch read back from its journal."""
+
+    def __init__(self, path):
+        self.path = path
+        self.folder = None
+        self.depth = 0
+        self.options = None
+        self.started = None
+        self.files = {}            # path -> state, in order of queueing
+        self.partial_outputs = {}  # path -> output written while running
+
+    def pending(self):
+        """Files that still have to be converted, in their original order."""
+        return [
+            path for path, state in self.files.items()
+            if state in PENDING_STATES
+        ]
+
+    def count(self, *states):
+        return sum(1 for state in self.files.values() if state in states)
+
+    def interrupted_outputs(self):
+        """Outputs of files that were being converted when the batch ended."""
+        return [
+            self.partial_outputs[path]
+            for path, state in self.files.items()
+            if state in (FILE_RUNNING, FILE_STOPPED) and path in self.partial_outputs
+        ]
+
+    def cleanup(self):
+        """Remove the partial outputs of interrupted files."""
+        return [
+            output for output in self.interrupted_outputs()
+            if remove_partial_output(output)
+        ]
+
+
+def load_journal(path):
+    """
+    Read the journal of an unfinished batch.
+
+    A torn last line (from a crash while writing) is ignored.
+
+    Returns:
+        JournalState, or None if there is no unfinished batch
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    state = JournalState(path)
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+
+        op = record.get("op")
+        if op == "batch":
+            state.folder = record.get("folder")
+            state.depth = record.get("depth", 0)
+            state.options = ConversionOptions.from_dict(record.get("options", {}))
+            state.started = record.get("time")
+        elif op == "complete":
+            return None
+        elif op in (FILE_QUEUED, FILE_RUNNING, FILE_DONE, FILE_FAILED,
+                    FILE_STOPPED, FILE_SKIPPED):
+            file_path = record.get("path")
+            state.files[file_path] = op
+            if op == FILE_RUNNING and record.get("output"):
+                state.partial_outputs[file_path] = record["output"]
+
+    if state.options is None or not state.pending():
+        return None
+    return state
+
+
+class BatchJournal:
+    """
+    Durable record of a batch, one JSON line per state change.
+
+    Every file is journaled as queued, running (with the output it is
+    writing), then done, failed, stopped or skipped. Lines are fsynced, so after a
+    crash or power loss the batch can be resumed where it ended, partial
+    outputs can be removed, and finished files are never converted again.
+    A batch that runs to the end marks its journal complete and deletes it.
+    """
+
+    def __init__(self, path, truncate=True):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "w" if truncate else "a", encoding="utf-8")
+
+    @classmethod
+    def start(cls, path, folder, depth, options):
+        """Begin a new batch, discarding any unfinished one."""
+        previous = load_journal(path)
+        if previous is not None:
+            discard_journal(previous)
+        journal = cls(path)
+        options = options.to_dict()
+        options.pop("threads", None)
+        journal._write({
+            "op": "batch",
+            "folder": folder,
+            "depth": depth,
+            "options": options,
+            "time": time.time(),
+        })
+        return journal
+
+    @classmethod
+    def resume(cls, state):
+        """Continue an unfinished batch in its own journal."""
+        return cls(state.path, truncate=False)
+
+    def _write(self, *records):
+        with self._lock:
+            if self._file is None:
+                return
+            for record in records:
+                self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def queued(self, paths):
+        self._write(*({"op": FILE_QUEUED, "path": path} for path in paths))
+
+    def running(self, path, output=None):
+        """
+        Mark a file as being converted.
+
+        Args:
+            path: Input file
+            output: Output nsz creates for it, or None if it existed before
+                and must not be removed; the folder of a recompression
+        """
+        self._write({"op": FILE_RUNNING, "path": path, "output": output})
+
+    def finished(self, path, state):
+        """Record the final state of a file: done, failed, stopped or skipped."""
+        self._write({"op": state, "path": path})
+
+    def close(self):
+        """Stop writing; the batch stays resumable."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def complete(self):
+        """The batch ran to the end; nothing is left to resume."""
+        self._write({"op": "complete", "time": time.time()})
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def discard_journal(state):
+    """Drop an unfinished batch, removing its partial outputs."""
+    removed = state.cleanup()
+    try:
+        os.remove(state.path)
+    except OSError:
+        pass
+    return removed
@@ -0,0 +1,422 @@
+# leveltuner.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Automatic compression level.
+
+A few chunks of the decrypted game data of a title are compressed at
+several levels in an engine worker, where nsz and the keys are loaded.
+The level with the best ratio that still meets the speed target is
+used, except that a higher level only wins if it saves noticeably more.
+Sample results are remembered per title ID, so a title is sampled once.
+
+The same samples make a quick probe of how well a title compresses at
+all, so titles that would barely shrink can be skipped or compressed
+at a fast level instead.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+from .paths import user_data_dir
+
+TUNE_LEVELS = (3, 9, 15, 18, 22)
+SAMPLE_CHUNKS = 4
+SAMPLE_CHUNK_SIZE = 2 * 1024 ** 2  # bytes
+SAMPLE_ALIGNMENT = 0x1000          # AES-CTR sections are read from block starts
+RATIO_TOLERANCE = 0.01             # share of the size a higher level must save
+
+PROBE_LEVEL = 3      # Level the probe compresses samples at
+LOW_GAIN_LEVEL = 3   # Level for low-gain titles that are not skipped
+
+# What to do with titles below the savings threshold
+LOW_GAIN_SKIP = "skip"
+LOW_GAIN_FAST = "fast"
+
+TUNING_FILE_NAME = "tuning.json"
+TUNING_VERSION = 1
+
+_TITLE_ID = re.compile(r"\[(0100[0-9A-Fa-f]{12})\]")
+
+# Title types, from the last digits of the title ID
+TITLE_BASE = "base"
+TITLE_UPDATE = "update"
+TITLE_DLC = "dlc"
+
+_memory = None
+_memory_lock = threading.Lock()
+
+
+def get_tuning_memory():
+    """Return the shared TuningMemory, loading it on first use."""
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = TuningMemory()
+        return _memory
+
+
+def title_id(path):
+    """Title ID from a file name like "Game [0100ABCD12340000][v0].nsp"."""
+    match = _TITLE_ID.search(os.path.basename(path))
+    return match.group(1).upper() if match else None
+
+
+def title_type(tid):
+    if tid.endswith("000"):
+        return TITLE_BASE
+    if tid.endswith("800"):
+        return TITLE_UPDATE
+    return TITLE_DLC
+
+
+def title_key(path):
+    """Key the samples of a file are remembered under."""
+    tid = title_id(path)
+    if tid:
+        return f"{title_type(tid)}:{tid}"
+    return f"file:{os.path.basename(path)}"
+
+
+# ---------- Sampling (runs in an engine worker) ---------- #
+
+def _packed_sections(container):
+    from nsz.Fs import Nca, Type
+    from nsz.SectionFs import isNcaPacked, sortedFs
+
+    for nspf in container:
+        if not isinstance(nspf, Nca.Nca):
+            continue
+        if nspf.header.contentType not in (Type.Content.PROGRAM, Type.Content.PUBLICDATA):
+            continue
+        if not isNcaPacked(nspf):
+            continue
+        for fs in sortedFs(nspf):
+            for section in fs.getEncryptionSections():
+                yield nspf, section
+
+
+def _read_samples(path):
+    from pathlib import Path
+    from nsz.Fs import factory
+
+    container = factory(Path(path))
+    container.open(str(path), "rb")
+    try:
+        if path.lower().endswith(".xci"):
+            containers = [
+                part for part in container.hfs0 if part._path == "secure"
+            ]
+        else:
+            containers = [container]
+
+        sections = [
+            item for part in containers for item in _packed_sections(part)
+        ]
+        total = sum(section.size for _, section in sections)
+        if total == 0:
+            raise ValueError("No game data to sample; are the keys up to date?")
+
+        # Evenly spread over all sections, like a quick scan of the title
+        samples = []
+        for i in range(SAMPLE_CHUNKS):
+            position = total * (2 * i + 1) // (2 * SAMPLE_CHUNKS)
+            for nca, section in sections:
+                if position < section.size:
+                    break
+                position -= section.size
+
+            start = position - position % SAMPLE_ALIGNMENT
+            partition = nca.partition(
+                offset=section.offset,
+                size=section.size,
+                cryptoType=section.cryptoType,
+                cryptoKey=section.cryptoKey,
+                cryptoCounter=bytearray(section.cryptoCounter),
+                autoOpen=True
+            )
+            try:
+                partition.seek(start)
+                samples.append(partition.read(min(SAMPLE_CHUNK_SIZE, section.size - start)))
+            finally:
+                partition.close()
+        return samples
+    finally:
+        container.close()
+
+
+def sample_title(path, levels):
+    """
+    Compress samples of a title at each level.
+
+    Returns:
+        List of {"level", "ratio", "speed"} dicts; ratio is compressed
+        size / original size, speed is bytes per second on one thread
+    """
+    from zstandard import ZstdCompressor
+
+    samples = _read_samples(path)
+    original = sum(len(sample) for sample in samples)
+
+    results = []
+    for level in levels:
+        compressor = ZstdCompressor(level=level)
+        started = time.perf_counter()
+        compressed = sum(len(compressor.compress(sample)) for sample in samples)
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        results.append({
+            "level": level,
+            "ratio": compressed / original,
+            "speed": original / elapsed,
+        })
+    return results
+
+
+# ---------- Choosing a level ---------- #
+
+def choose_level(results, min_speed=None, threads=1):
+    """
+    Pick a level from sample results.
+
+    Args:
+        results: Output of sample_title()
+        min_speed: Bytes per second a job must reach, or None
+        threads: Threads the job compresses with
+
+    Returns:
+        The chosen result dict
+    """
+    results = sorted(results, key=lambda result: result["level"])
+    fast_enough = [
+        result for result in results
+        if min_speed is None or result["speed"] * threads >= min_speed
+    ]
+    if not fast_enough:
+        return results[0]
+
+    # The lowest level that is about as good as the best one
+    best = min(result["ratio"] for result in fast_enough)
+    for result in fast_enough:
+        if result["ratio"] - best <= RATIO_TOLERANCE:
+            return result
+    return fast_enough[-1]
+
+
+class TuningTarget:
+    """
+    What automatic levels aim for.
+
+    Attributes:
+        min_speed: Bytes per second every job should at least reach
+        deadline: time.monotonic() by which the batch should be done
+    """
+
+    def __init__(self, min_speed=None, deadline=None):
+        self.min_speed = min_speed
+        self.deadline = deadline
+
+    def required_speed(self, remaining_bytes, workers):
+        """Speed a job needs to meet the target, or None if there is none."""
+        speeds = []
+        if self.min_speed:
+            speeds.append(self.min_speed)
+        if self.deadline is not None:
+            seconds = max(1.0, self.deadline - time.monotonic())
+            speeds.append(remaining_bytes / seconds / max(1, workers))
+        return max(speeds) if speeds else None
+
+
+class TuningMemory:
+    """Sample results and chosen levels per title, stored as JSON."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(user_data_dir(), TUNING_FILE_NAME)
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != TUNING_VERSION:
+            return {}
+        return data.get("titles", {})
+
+    def _save(self):
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"version": TUNING_VERSION, "titles": self._entries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def results(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry.get("results") if entry else None
+
+    def remember(self, key, results, level):
+        with self._lock:
+            entry = self._entries.setdefault(key, {})
+            entry.update({
+                "results": results,
+                "level": level,
+                "time": time.time(),
+            })
+            self._save()
+
+    def sampled_ratio(self, key, level):
+        """Ratio at level from earlier samples, or None."""
+        for result in self.results(key) or ():
+            if result["level"] == level:
+                return result["ratio"]
+        return None
+
+    def probe_ratio(self, key):
+        """Ratio at PROBE_LEVEL from an earlier probe or sample, or None."""
+        with self._lock:
+            entry = self._entries.get(key) or {}
+        if entry.get("probe") is not None:
+            return entry["probe"]
+        for result in entry.get("results") or ():
+            if result["level"] == PROBE_LEVEL:
+                return result["ratio"]
+        return None
+
+    def remember_probe(self, key, ratio):
+        with self._lock:
+            entry = self._entries.setdefault(key, {})
+            entry["probe"] = ratio
+            entry.setdefault("time", time.time())
+            self._save()
+
+
+class TuningChoice:
+    """The level picked for a file and why."""
+
+    __slots__ = ("level", "ratio", "speed", "sampled")
+
+    def __init__(self, result, sampled):
+        self.level = result["level"]
+        self.ratio = result["ratio"]
+        self.speed = result["speed"]
+        self.sampled = sampled
+
+
+class LevelTuner:
+    """Picks a compression level for each file of a batch."""
+
+    def __init__(self, target, memory=None, levels=TUNE_LEVELS):
+        self.target = target
+        self.memory = memory or get_tuning_memory()
+        self.levels = levels
+
+    def choose(self, path, threads, required_speed, sample, on_choice):
+        """
+        Pick a level for a file, sampling it if its title is new.
+
+        Args:
+            path: File to compress
+            threads: Threads the job compresses with, 0 = all cores
+            required_speed: Bytes per second the job needs, or None
+            sample: sample(path, levels, on_result, on_exit) starts a
+                sampling job and returns a handle for cancelling it
+            on_choice: Called with a TuningChoice, or None if the file
+                could not be sampled
+
+        Returns:
+            The handle of the sampling job, or None if none was needed
+        """
+        threads = threads or os.cpu_count() or 1
+        key = title_key(path)
+
+        results = self.memory.results(key)
+        if results:
+            on_choice(TuningChoice(choose_level(results, required_speed, threads), False))
+            return None
+
+        sampled = []
+
+        def on_exit(returncode):
+            if returncode != 0 or not sampled:
+                on_choice(None)
+                return
+            result = choose_level(sampled, required_speed, threads)
+            self.memory.remember(key, sampled, result["level"])
+            on_choice(TuningChoice(result, True))
+
+        return sample(path, list(self.levels), sampled.extend, on_exit)
+
+
+class CompressionProbe:
+    """
+    Estimates the savings of a title before it is compressed.
+
+    Attributes:
+        min_savings: Share of the size a title must shrink by, 0.02 = 2%
+        action: LOW_GAIN_SKIP or LOW_GAIN_FAST for titles below it
+    """
+
+    def __init__(self, min_savings, action=LOW_GAIN_SKIP, memory=None):
+        self.min_savings = min_savings
+        self.action = action
+        self.memory = memory or get_tuning_memory()
+
+    def is_low_gain(self, ratio):
+        return 1 - ratio < self.min_savings
+
+    def estimate(self, path, sample, on_ratio):
+        """
+        Estimate the compressed / original ratio of a file.
+
+        The ratio at PROBE_LEVEL is a slight underestimate of what
+        higher levels achieve, which is what a threshold needs.
+
+        Args:
+            path: File to compress
+            sample: As for LevelTuner.choose()
+            on_ratio: Called with the ratio, or None if the file could
+                not be sampled
+
+        Returns:
+            The handle of the sampling job, or None if none was needed
+        """
+        key = title_key(path)
+        ratio = self.memory.probe_ratio(key)
+        if ratio is not None:
+            on_ratio(ratio)
+            return None
+
+        sampled = []
+
+        def on_exit(returncode):
+            if returncode != 0 or not sampled:
+                on_ratio(None)
+                return
+            ratio = sampled[0]["ratio"]
+            self.memory.remember_probe(key, ratio)
+            on_ratio(ratio)
+
+        return sample(path, [PROBE_LEVEL], sampled.extend, on_exit)
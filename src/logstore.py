@@ -0,0 +1,147 @@
+# logstore.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import logging
+import logging.handlers
+import os
+import threading
+import time
+
+from .paths import user_data_dir
+
+# Severity levels, shared with the logging module
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+DEFAULT_LOG_CAPACITY = 5000  # records kept in memory
+LOG_FILE_NAME = "batch.log"
+LOG_FILE_MAX_BYTES = 10 * 1024 ** 2
+LOG_FILE_BACKUPS = 3
+
+
+class LogRecord:
+    __slots__ = ("seq", "time", "level", "section", "text")
+
+    def __init__(self, seq, level, section, text):
+        self.seq = seq
+        self.time = time.time()
+        self.level = level
+        self.section = section
+        self.text = text
+
+
+class LogStore:
+    """
+    Fixed-capacity ring buffer of log records.
+
+    The newest DEFAULT_LOG_CAPACITY records are kept in memory and can
+    be read by position, so a viewer only has to fetch the rows it
+    shows. Older records are overwritten. Records can optionally also
+    be written to a rotating log file, so nothing is lost on long
+    batches while memory stays flat.
+    """
+
+    def __init__(self, capacity=DEFAULT_LOG_CAPACITY, spill_path=None):
+        self.capacity = capacity
+        self._records = [None] * capacity
+        self._appended = 0
+        self._lock = threading.Lock()
+        self._logger = None
+        self.generation = 0  # bumped by clear()
+
+        if spill_path:
+            self.spill_to(spill_path)
+
+    def spill_to(self, path=None):
+        """Also write every record to a rotating log file."""
+        path = path or os.path.join(user_data_dir(), LOG_FILE_NAME)
+
+        handler = logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=LOG_FILE_MAX_BYTES,
+            backupCount=LOG_FILE_BACKUPS,
+            encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(message)s"
+        ))
+
+        self._logger = logging.getLogger(f"switchromtools.log.{id(self)}")
+        self._logger.propagate = False
+        self._logger.setLevel(DEBUG)
+        self._logger.addHandler(handler)
+
+    def append(self, text, level=INFO, section=None):
+        with self._lock:
+            record = LogRecord(self._appended, level, section, text)
+            self._records[self._appended % self.capacity] = record
+            self._appended += 1
+
+        if self._logger:
+            prefix = f"[{section}] " if section else ""
+            self._logger.log(level, "%s%s", prefix, text)
+
+    def clear(self):
+        with self._lock:
+            self._records = [None] * self.capacity
+            self._appended = 0
+            self.generation += 1
+
+    def __len__(self):
+        return min(self._appended, self.capacity)
+
+    @property
+    def first_seq(self):
+        """Sequence number of the oldest record still in memory."""
+        return max(0, self._appended - self.capacity)
+
+    def window(self, start, count):
+        """
+        Records by position, oldest first.
+
+        Args:
+            start: Position of the first record (0 = oldest kept)
+            count: Maximum number of records to return
+        """
+        with self._lock:
+            first = max(0, self._appended - self.capacity)
+            start = max(0, start)
+            end = min(first + start + count, self._appended)
+            return [
+                self._records[seq % self.capacity]
+                for seq in range(first + start, end)
+            ]
+
+    def records(self, section=None, min_level=DEBUG):
+        """All records in memory, optionally filtered."""
+        return [
+            record for record in self.window(0, self.capacity)
+            if record.level >= min_level
+            and (section is None or record.section == section)
+        ]
+
+    def sections(self):
+        """Section names in order of first appearance."""
+        seen = {}
+        for record in self.window(0, self.capacity):
+            if record.section is not None:
+                seen.setdefault(record.section, None)
+        return list(seen)
@@ -1,25 +1,555 @@
 import gi
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw, GLib, Gio
-import subprocess
-import re
+from gi.repository import Gtk, Adw, GLib, Gio, GObject, Pango
 import threading
 import sys
+import os
+import time
+
+from .core import (
+    ConversionRunner,
+    FileList,
+    RunnerListener,
+    INPUT_EXTENSIONS,
+    DEFAULT_COMPRESSION_LEVEL,
+    MAX_COMPRESSION_LEVEL,
+    MIN_COMPRESSION_LEVEL,
+    DEFAULT_SCAN_DEPTH,
+    MAX_SCAN_DEPTH,
+    DEFAULT_PARALLEL_JOBS,
+    MAX_PARALLEL_JOBS,
+    RESULT_SUCCESS,
+    RESULT_NO_FILES,
+    RESULT_KEYS_ERROR,
+    RESULT_STOPPED,
+    prod_keys_present,
+)
+from .dryrun import plan_dry_run
+from .engine import engine_available, get_engine
+from .governor import DEFAULT_PROFILE, PROFILES, PROFILE_LABELS, get_profile
+from .journal import BatchJournal, discard_journal, journal_path, load_journal
+from .leveltuner import (
+    LOW_GAIN_FAST,
+    LOW_GAIN_SKIP,
+    CompressionProbe,
+    LevelTuner,
+    TuningTarget,
+)
+from .logstore import LogStore, INFO, WARNING, ERROR
+from .nszoptions import (
+    ConversionOptions,
+    MODE_COMPRESS,
+    MODE_DECOMPRESS,
+    MODE_RECOMPRESS,
+    VERIFY_FULL,
+    VERIFY_INLINE,
+)
+from .outputparser import format_rate, format_size, parse_progress_line
+from .paths import user_data_dir
+from .planner import ThroughputHistory, format_duration
+from .resultcache import get_conversion_cache
+from .scanindex import FileScan, get_scan_index
+from .scheduler import JOB_DONE
+from .uichannel import UpdateChannel
 
 # Constants
-NSZ_BINARY_PATH = "/app/bin/nsz"
-PROD_KEYS_PATH = "~/.switch/prod.keys"
-DEFAULT_COMPRESSION_LEVEL = 18
-MAX_COMPRESSION_LEVEL = 22
-MIN_COMPRESSION_LEVEL = 1
-DEFAULT_SCAN_DEPTH = 0
-MAX_SCAN_DEPTH = 10
-PROCESS_POLL_INTERVAL = 0.1  # seconds
-PROCESS_TERMINATE_TIMEOUT = 1  # seconds
-READ_BUFFER_SIZE = 4096
-
-class BaseConvertPage(Gtk.Box):
+DIRECTORY_REFRESH_DELAY = 500  # milliseconds
+UI_FRAME_RATE = 30  # UI updates per second while converting
+LOG_VIEW_REFRESH_INTERVAL = 250  # milliseconds
+MAX_BANDWIDTH_LIMIT = 2000  # MB/s
+MAX_TUNING_SPEED = 2000  # MiB/s
+MAX_TUNING_HOURS = 72
+MAX_MIN_SAVINGS = 50  # percent
+DEBUG_ENV_VAR = "SWITCHROMTOOLS_DEBUG"
+
+_directory_watchers = {}
+
+
+def get_directory_watcher(path):
+    """Return the shared DirectoryWatcher for a folder."""
+    index = get_scan_index(path)
+    watcher = _directory_watchers.get(index.root)
+    if watcher is None:
+        watcher = DirectoryWatcher(index)
+        _directory_watchers[index.root] = watcher
+    return watcher
+
+
+class DirectoryWatcher:
+    """
+    Keeps a shared ScanIndex in sync with the disk using Gio.FileMonitor.
+
+    Changes are collected and applied after a short delay, so nsz
+    writing an output file doesn't trigger a rescan for every chunk.
+    """
+
+    WATCHED_EVENTS = (
+        Gio.FileMonitorEvent.CREATED,
+        Gio.FileMonitorEvent.DELETED,
+        Gio.FileMonitorEvent.MOVED_IN,
+        Gio.FileMonitorEvent.MOVED_OUT,
+        Gio.FileMonitorEvent.RENAMED,
+        Gio.FileMonitorEvent.CHANGES_DONE_HINT,
+    )
+
+    def __init__(self, index):
+        self.index = index
+        self.monitors = {}
+        self.listeners = []
+        self.dirty = set()
+        self.refresh_source = None
+
+    def add_listener(self, callback):
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def sync(self):
+        """Start or cancel monitors to match the directories in the index."""
+        current = set(self.index.directories())
+
+        for path in list(self.monitors):
+            if path not in current:
+                self.monitors.pop(path).cancel()
+
+        for path in current - set(self.monitors):
+            try:
+                monitor = Gio.File.new_for_path(path).monitor_directory(
+                    Gio.FileMonitorFlags.WATCH_MOVES,
+                    None
+                )
+            except GLib.Error:
+                continue
+
+            monitor.connect("changed", self.on_changed, path)
+            self.monitors[path] = monitor
+
+        return False
+
+    def on_changed(self, monitor, file, other_file, event, path):
+        if event not in self.WATCHED_EVENTS:
+            return
+
+        self.dirty.add(path)
+        if self.refresh_source is None:
+            self.refresh_source = GLib.timeout_add(
+                DIRECTORY_REFRESH_DELAY,
+                self.apply_changes
+            )
+
+    def apply_changes(self):
+        self.refresh_source = None
+        dirty, self.dirty = self.dirty, set()
+
+        for path in dirty:
+            self.index.refresh_dir(path)
+        self.sync()
+
+        for callback in list(self.listeners):
+            callback()
+        return False
+
+
+class LogRowItem(GObject.Object):
+    def __init__(self, record):
+        super().__init__()
+        self.record = record
+
+
+class LogListModel(GObject.Object, Gio.ListModel):
+    """
+    Gio.ListModel view of a LogStore.
+
+    Items are only created for the rows the list view asks for, so the
+    cost of showing the log doesn't grow with its length.
+    """
+
+    def __init__(self, store):
+        super().__init__()
+        self.store = store
+        self.generation = store.generation
+        self.first_seq = store.first_seq
+        self.n_items = len(store)
+
+    def do_get_item_type(self):
+        return LogRowItem.__gtype__
+
+    def do_get_n_items(self):
+        return self.n_items
+
+    def do_get_item(self, position):
+        if position >= self.n_items:
+            return None
+
+        # Records evicted since the last refresh show the oldest one kept
+        offset = max(0, self.first_seq + position - self.store.first_seq)
+        records = self.store.window(offset, 1)
+        return LogRowItem(records[0]) if records else None
+
+    def refresh(self):
+        """Announce records added to or evicted from the store."""
+        first_seq = self.store.first_seq
+        count = len(self.store)
+
+        if self.store.generation != self.generation:
+            # The store was cleared
+            removed, self.n_items = self.n_items, count
+            self.generation = self.store.generation
+            self.first_seq = first_seq
+            self.items_changed(0, removed, count)
+            return
+
+        removed = min(self.n_items, max(0, first_seq - self.first_seq))
+        if removed:
+            self.first_seq += removed
+            self.n_items -= removed
+            self.items_changed(0, removed, 0)
+
+        added = count - self.n_items
+        if added > 0:
+            position = self.n_items
+            self.n_items = count
+            self.items_changed(position, 0, added)
+
+
+class LogViewer(Adw.Dialog):
+    """Log dialog that only renders the visible rows of a LogStore."""
+
+    def __init__(self, store, title):
+        super().__init__()
+        self.set_title(title)
+        self.set_content_width(700)
+        self.set_content_height(500)
+
+        self.model = LogListModel(store)
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_setup_row)
+        factory.connect("bind", self.on_bind_row)
+
+        self.list_view = Gtk.ListView(
+            model=Gtk.NoSelection(model=self.model),
+            factory=factory
+        )
+        self.list_view.add_css_class("monospace")
+
+        self.scrolled = Gtk.ScrolledWindow()
+        self.scrolled.set_vexpand(True)
+        self.scrolled.set_child(self.list_view)
+
+        toolbar_view = Adw.ToolbarView()
+        toolbar_view.add_top_bar(Adw.HeaderBar())
+        toolbar_view.set_content(self.scrolled)
+        self.set_child(toolbar_view)
+
+        self.refresh_source = GLib.timeout_add(
+            LOG_VIEW_REFRESH_INTERVAL,
+            self.on_refresh
+        )
+        self.connect("closed", self.on_closed)
+        self.scroll_to_end()
+
+    def on_setup_row(self, factory, list_item):
+        label = Gtk.Label()
+        label.set_xalign(0)
+        label.set_wrap(True)
+        label.set_selectable(True)
+        label.set_margin_start(12)
+        label.set_margin_end(12)
+        list_item.set_child(label)
+
+    def on_bind_row(self, factory, list_item):
+        record = list_item.get_item().record
+        label = list_item.get_child()
+
+        prefix = f"[{record.section}] " if record.section else ""
+        label.set_label(prefix + record.text)
+
+        label.remove_css_class("error")
+        label.remove_css_class("warning")
+        if record.level >= ERROR:
+            label.add_css_class("error")
+        elif record.level >= WARNING:
+            label.add_css_class("warning")
+
+    def scroll_to_end(self):
+        if self.model.n_items:
+            self.list_view.scroll_to(
+                self.model.n_items - 1,
+                Gtk.ListScrollFlags.NONE,
+                None
+            )
+
+    def on_refresh(self):
+        # Follow new output only if the user hasn't scrolled up
+        adj = self.scrolled.get_vadjustment()
+        at_end = adj.get_value() >= adj.get_upper() - adj.get_page_size() - 1
+
+        self.model.refresh()
+        if at_end:
+            self.scroll_to_end()
+        return True
+
+    def on_closed(self, *_):
+        if self.refresh_source:
+            GLib.source_remove(self.refresh_source)
+            self.refresh_source = None
+
+
+class ReportRowItem(GObject.Object):
+    def __init__(self, record):
+        super().__init__()
+        self.record = record
+
+
+class BatchReportDialog(Adw.Dialog):
+    """Table of the per-file telemetry of a batch, with JSON/CSV export."""
+
+    def __init__(self, telemetry, title, on_error=None):
+        super().__init__()
+        self.telemetry = telemetry
+        self.on_error = on_error  # Called with a message when export fails
+        self.set_title(title)
+        self.set_content_width(900)
+        self.set_content_height(500)
+
+        store = Gio.ListStore(item_type=ReportRowItem)
+        for record in telemetry.jobs:
+            store.append(ReportRowItem(record))
+
+        self.column_view = Gtk.ColumnView(model=Gtk.NoSelection(model=store))
+        self.column_view.add_css_class("data-table")
+        for name, text in self._columns():
+            factory = Gtk.SignalListItemFactory()
+            factory.connect("setup", self.on_setup_cell)
+            factory.connect("bind", self.on_bind_cell, text)
+            column = Gtk.ColumnViewColumn(title=name, factory=factory)
+            column.set_expand(name == "File")
+            self.column_view.append_column(column)
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        scrolled.set_child(self.column_view)
+
+        summary = Gtk.Label(label=self._summary_text())
+        summary.set_xalign(0)
+        summary.set_wrap(True)
+        summary.add_css_class("dim-label")
+        summary.set_margin_start(12)
+        summary.set_margin_end(12)
+        summary.set_margin_top(6)
+        summary.set_margin_bottom(6)
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        box.append(summary)
+        box.append(scrolled)
+
+        header = Adw.HeaderBar()
+        for label, suffix in (("CSV", ".csv"), ("JSON", ".json")):
+            button = Gtk.Button(label=f"Export {label}")
+            button.connect("clicked", self.on_export, suffix)
+            header.pack_end(button)
+
+        toolbar_view = Adw.ToolbarView()
+        toolbar_view.add_top_bar(header)
+        toolbar_view.set_content(box)
+        self.set_child(toolbar_view)
+
+    @staticmethod
+    def _columns():
+        def seconds(value):
+            return f"{value:.1f} s" if value is not None else "–"
+
+        def size(value):
+            return format_size(value) if value else "–"
+
+        def rate(value):
+            return format_rate(value) if value else "–"
+
+        def phases(record):
+            return ", ".join(
+                f"{phase} {value:.1f} s" for phase, value in record.phases.items()
+            ) or "–"
+
+        return (
+            ("File", lambda record: record.name),
+            ("Status", lambda record: record.status or "–"),
+            ("Level", lambda record: str(record.level) if record.level else "–"),
+            ("Input", lambda record: size(record.input_bytes)),
+            ("Output", lambda record: size(record.output_bytes)),
+            ("Ratio", lambda record: (
+                f"{record.ratio * 100:.1f}%" if record.ratio else "–"
+            )),
+            ("Queued", lambda record: seconds(record.queue_seconds)),
+            ("Time", lambda record: seconds(record.wall_seconds)),
+            ("Phases", phases),
+            ("Average", lambda record: rate(record.average_rate)),
+            ("Peak", lambda record: rate(record.peak_rate)),
+            ("CPU", lambda record: seconds(record.cpu_seconds)),
+        )
+
+    def _summary_text(self):
+        summary = self.telemetry.summary()
+        text = f"{summary['converted']} of {summary['files']} files converted"
+        if summary["input_bytes"]:
+            text += (
+                f", {format_size(summary['input_bytes'])} → "
+                f"{format_size(summary['output_bytes'])}"
+            )
+        if summary["wall_seconds"]:
+            text += f" in {format_duration(summary['wall_seconds'])}"
+        if summary["cpu_seconds"]:
+            text += f", {format_duration(summary['cpu_seconds'])} CPU"
+        return text
+
+    def on_setup_cell(self, factory, list_item):
+        label = Gtk.Label()
+        label.set_xalign(0)
+        label.set_ellipsize(Pango.EllipsizeMode.END)
+        list_item.set_child(label)
+
+    def on_bind_cell(self, factory, list_item, text):
+        record = list_item.get_item().record
+        list_item.get_child().set_label(text(record))
+
+    def on_export(self, button, suffix):
+        dialog = Gtk.FileDialog()
+        dialog.set_title("Export Batch Report")
+        dialog.set_initial_name(f"batch-report{suffix}")
+        dialog.save(self.get_root(), None, self.on_export_selected)
+
+    def on_export_selected(self, dialog, result):
+        try:
+            file = dialog.save_finish(result)
+        except GLib.Error:
+            return  # Cancelled
+        if not file:
+            return
+        try:
+            self.telemetry.write(file.get_path())
+        except OSError as e:
+            if self.on_error:
+                self.on_error(f"Could not write the batch report: {e}")
+
+
+class PlanDialog(Adw.Dialog):
+    """Expected output size and time of every file of a batch, and the totals."""
+
+    def __init__(self, plan, title):
+        super().__init__()
+        self.plan = plan
+        self.set_title(title)
+        self.set_content_width(800)
+        self.set_content_height(500)
+
+        store = Gio.ListStore(item_type=ReportRowItem)
+        for planned in plan.files:
+            store.append(ReportRowItem(planned))
+
+        column_view = Gtk.ColumnView(model=Gtk.NoSelection(model=store))
+        column_view.add_css_class("data-table")
+        for name, text in self._columns():
+            factory = Gtk.SignalListItemFactory()
+            factory.connect("setup", self.on_setup_cell)
+            factory.connect("bind", self.on_bind_cell, text)
+            column = Gtk.ColumnViewColumn(title=name, factory=factory)
+            column.set_expand(name == "File")
+            column_view.append_column(column)
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        scrolled.set_child(column_view)
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        for text, warning in self._summary_lines():
+            label = Gtk.Label(label=text)
+            label.set_xalign(0)
+            label.set_wrap(True)
+            label.add_css_class("error" if warning else "dim-label")
+            label.set_margin_start(12)
+            label.set_margin_end(12)
+            label.set_margin_top(6)
+            box.append(label)
+        scrolled.set_margin_top(6)
+        box.append(scrolled)
+
+        toolbar_view = Adw.ToolbarView()
+        toolbar_view.add_top_bar(Adw.HeaderBar())
+        toolbar_view.set_content(box)
+        self.set_child(toolbar_view)
+
+    @staticmethod
+    def _columns():
+        def output(planned):
+            if planned.output_size is None:
+                return "–"
+            text = format_size(planned.output_size)
+            if planned.ratio is not None:
+                text += f" ({planned.ratio * 100:.0f}%)"
+            return text
+
+        return (
+            ("File", lambda planned: planned.name),
+            ("Size", lambda planned: format_size(planned.size)),
+            ("Expected Output", output),
+            ("Estimated From", lambda planned: planned.estimate or "–"),
+            ("Time", lambda planned: (
+                format_duration(planned.seconds)
+                if planned.seconds is not None else "–"
+            )),
+        )
+
+    def _summary_lines(self):
+        """(text, is_warning) lines above the table."""
+        plan = self.plan
+        count = len(plan.files)
+        text = f"{count} file{'s' if count != 1 else ''}, "
+        text += format_size(plan.input_bytes)
+        if plan.estimated:
+            text += f" → about {format_size(plan.output_bytes)}"
+            if plan.savings and plan.savings > 0:
+                text += f", {format_size(plan.savings)} saved"
+        unknown = count - len(plan.estimated)
+        if unknown:
+            text += f" ({unknown} without an estimate yet)"
+        lines = [(text, False)]
+
+        if plan.seconds is not None:
+            lines.append((
+                f"About {format_duration(plan.seconds)} with "
+                f"{plan.workers} file{'s' if plan.workers != 1 else ''} at a time",
+                False
+            ))
+        else:
+            lines.append((
+                "No time estimate until a batch with these settings has run",
+                False
+            ))
+
+        for space in plan.spaces:
+            free = format_size(space.free) if space.free is not None else "unknown"
+            text = f"{space.folder}: {format_size(space.needed)} needed, {free} free"
+            if not space.fits:
+                text = f"Not enough space on {text}"
+            lines.append((text, not space.fits))
+        return lines
+
+    def on_setup_cell(self, factory, list_item):
+        label = Gtk.Label()
+        label.set_xalign(0)
+        label.set_ellipsize(Pango.EllipsizeMode.END)
+        list_item.set_child(label)
+
+    def on_bind_cell(self, factory, list_item, text):
+        planned = list_item.get_item().record
+        list_item.get_child().set_label(text(planned))
+
+
+class BaseConvertPage(Gtk.Box, RunnerListener):
     mode = None                # "compress" or "decompress"
     input_exts = ()
     action_label = "Convert"
@@ -31,14 +561,29 @@ class BaseConvertPage(Gtk.Box):
         )
 
         self.selected_path = None
-        self.process = None
-        self.total_files = 0
-        self.current_file = 0
-        self.stopped = False
-        self.keys_error = False  # Track if we encounter a keys error
+        self.watcher = None
+        self.scan = None
+        self.runner = None  # ConversionRunner of the current batch
+        self.channel = UpdateChannel()
+        self.ui_frame_source = None
+        self.job_rows = {}
+        self.completed_files = 0
+        self.throughput = ThroughputHistory()
 
         self._build_ui()
 
+    @property
+    def jobs(self):
+        return self.runner.jobs if self.runner else []
+
+    @property
+    def total_files(self):
+        return self.runner.total_files if self.runner else 0
+
+    @property
+    def estimated_seconds(self):
+        return self.runner.estimated_seconds if self.runner else None
+
     # ---------------- UI ---------------- #
 
     def _build_ui(self):
@@ -60,9 +605,11 @@ class BaseConvertPage(Gtk.Box):
         self._build_action_buttons()
         self._build_progress_section()
 
-        # Keep output view for internal logging but don't display it
-        self.output_view = Gtk.TextView()
-        self.output_view.set_editable(False)
+        # Bounded log of the current batch, shown on demand
+        self.log = LogStore()
+        self.log.spill_to(
+            os.path.join(user_data_dir(), f"{self.mode}.log")
+        )
 
         # Assemble
         main_box.append(self.folder_group)
@@ -70,7 +617,22 @@ class BaseConvertPage(Gtk.Box):
         main_box.append(self.progress_group)
 
         clamp.set_child(main_box)
-        self.append(clamp)
+
+        overlay = Gtk.Overlay()
+        overlay.set_child(clamp)
+
+        # UI channel statistics, only shown when debugging
+        self.debug_label = Gtk.Label()
+        self.debug_label.add_css_class("caption")
+        self.debug_label.add_css_class("dim-label")
+        self.debug_label.set_halign(Gtk.Align.END)
+        self.debug_label.set_valign(Gtk.Align.END)
+        self.debug_label.set_margin_end(12)
+        self.debug_label.set_margin_bottom(6)
+        self.debug_label.set_visible(bool(os.environ.get(DEBUG_ENV_VAR)))
+        overlay.add_overlay(self.debug_label)
+
+        self.append(overlay)
 
     def _build_folder_section(self):
         """Build the folder selection UI section"""
@@ -141,8 +703,166 @@ class BaseConvertPage(Gtk.Box):
         # Add subclass-specific settings
         self._add_mode_specific_settings()
 
+        # Parallel jobs
+        jobs_row = Adw.ActionRow()
+        jobs_row.set_title("Parallel jobs")
+        jobs_row.set_subtitle("Number of files processed at the same time")
+
+        self.jobs_spin = Gtk.SpinButton()
+        self.jobs_spin.set_range(1, MAX_PARALLEL_JOBS)
+        self.jobs_spin.set_value(DEFAULT_PARALLEL_JOBS)
+        self.jobs_spin.set_increments(1, 1)
+        self.jobs_spin.set_valign(Gtk.Align.CENTER)
+
+        jobs_row.add_suffix(self.jobs_spin)
+        self.expander.add_row(jobs_row)
+
+        # Storage placement
+        self.output_row = self._build_folder_option_row(
+            "Output folder",
+            "Next to the source files",
+            "output_dir"
+        )
+        self.scratch_row = self._build_folder_option_row(
+            "Scratch folder",
+            "Off – a fast local disk to write to before moving files into place",
+            "scratch_dir"
+        )
+
+        device_row = Adw.ActionRow()
+        device_row.set_title("Jobs per disk")
+        device_row.set_subtitle("Running jobs that may use the same disk, 0 = no limit")
+
+        self.device_limit_spin = Gtk.SpinButton()
+        self.device_limit_spin.set_range(0, MAX_PARALLEL_JOBS)
+        self.device_limit_spin.set_value(0)
+        self.device_limit_spin.set_increments(1, 1)
+        self.device_limit_spin.set_valign(Gtk.Align.CENTER)
+
+        device_row.add_suffix(self.device_limit_spin)
+        self.expander.add_row(device_row)
+
+        # Resource use
+        self.profile_names = list(PROFILES)
+        self.profile_row = Adw.ComboRow()
+        self.profile_row.set_title("Resource profile")
+        self.profile_row.set_subtitle(
+            "Background yields CPU and disk to other programs, balanced adapts "
+            "parallel jobs to the disk"
+        )
+        self.profile_row.set_model(Gtk.StringList.new(
+            [PROFILE_LABELS[name] for name in self.profile_names]
+        ))
+        self.profile_row.set_selected(self.profile_names.index(DEFAULT_PROFILE))
+        self.profile_row.connect("notify::selected", self.on_engine_toggled)
+        self.expander.add_row(self.profile_row)
+
+        bandwidth_row = Adw.ActionRow()
+        bandwidth_row.set_title("Disk bandwidth limit")
+        bandwidth_row.set_subtitle("MB/s read and written by each job, 0 = unlimited")
+
+        self.bandwidth_spin = Gtk.SpinButton()
+        self.bandwidth_spin.set_range(0, MAX_BANDWIDTH_LIMIT)
+        self.bandwidth_spin.set_value(0)
+        self.bandwidth_spin.set_increments(10, 100)
+        self.bandwidth_spin.set_valign(Gtk.Align.CENTER)
+
+        bandwidth_row.add_suffix(self.bandwidth_spin)
+        self.expander.add_row(bandwidth_row)
+
+        # In-process nsz engine, only offered when nsz can be imported;
+        # nsz runs as a command for every file unless this is turned on
+        engine_row = Adw.ActionRow()
+        engine_row.set_title("Keep nsz loaded")
+        engine_row.set_subtitle(
+            "Reuse nsz worker processes instead of starting nsz for every file"
+        )
+
+        self.engine_switch = Gtk.Switch()
+        self.engine_switch.set_valign(Gtk.Align.CENTER)
+        self.engine_switch.set_active(False)
+        self.engine_switch.connect("notify::active", self.on_engine_toggled)
+
+        engine_row.add_suffix(self.engine_switch)
+        engine_row.set_activatable_widget(self.engine_switch)
+        engine_row.set_visible(engine_available())
+        self.expander.add_row(engine_row)
+
+        # Conversion cache
+        skip_row = Adw.ActionRow()
+        skip_row.set_title("Skip converted files")
+        skip_row.set_subtitle("Files converted before, whose output still exists, are not processed again")
+
+        self.skip_switch = Gtk.Switch()
+        self.skip_switch.set_valign(Gtk.Align.CENTER)
+        self.skip_switch.set_active(True)
+
+        skip_row.add_suffix(self.skip_switch)
+        skip_row.set_activatable_widget(self.skip_switch)
+        self.expander.add_row(skip_row)
+
+        hash_row = Adw.ActionRow()
+        hash_row.set_title("Recognize moved files")
+        hash_row.set_subtitle("Identify files by a partial content hash (reads a few MB per file)")
+
+        self.hash_switch = Gtk.Switch()
+        self.hash_switch.set_valign(Gtk.Align.CENTER)
+        self.skip_switch.bind_property(
+            "active", self.hash_switch, "sensitive",
+            GObject.BindingFlags.SYNC_CREATE
+        )
+
+        hash_row.add_suffix(self.hash_switch)
+        hash_row.set_activatable_widget(self.hash_switch)
+        self.expander.add_row(hash_row)
+
         self.folder_group.add(self.expander)
 
+    def _build_folder_option_row(self, title, unset_subtitle, attribute):
+        """A row holding an optional folder, stored in self.<attribute>."""
+        setattr(self, attribute, None)
+        row = Adw.ActionRow()
+        row.set_title(title)
+        row.set_subtitle(unset_subtitle)
+
+        def set_folder(path):
+            setattr(self, attribute, path)
+            row.set_subtitle(path or unset_subtitle)
+            clear_button.set_visible(path is not None)
+
+        def on_selected(dialog, result):
+            try:
+                folder = dialog.select_folder_finish(result)
+                if folder:
+                    set_folder(folder.get_path())
+            except Exception:
+                pass
+
+        def on_choose(*_):
+            dialog = Gtk.FileDialog()
+            dialog.set_title(f"Select {title}")
+            dialog.select_folder(None, None, on_selected)
+
+        clear_button = Gtk.Button()
+        clear_button.set_icon_name("edit-clear-symbolic")
+        clear_button.set_tooltip_text("Reset")
+        clear_button.add_css_class("flat")
+        clear_button.set_valign(Gtk.Align.CENTER)
+        clear_button.set_visible(False)
+        clear_button.connect("clicked", lambda *_: set_folder(None))
+
+        choose_button = Gtk.Button()
+        choose_button.set_icon_name("document-open-symbolic")
+        choose_button.add_css_class("flat")
+        choose_button.set_valign(Gtk.Align.CENTER)
+        choose_button.connect("clicked", on_choose)
+
+        row.add_suffix(clear_button)
+        row.add_suffix(choose_button)
+        row.set_activatable_widget(choose_button)
+        self.expander.add_row(row)
+        return row
+
     def _build_action_buttons(self):
         """Build the action button section"""
         self.button_box = Gtk.Box(spacing=12)
@@ -160,7 +880,31 @@ class BaseConvertPage(Gtk.Box):
         self.stop_button.set_visible(False)
         self.stop_button.connect("clicked", self.on_stop)
 
+        # Pause suspends running files; the menu waits for them instead
+        pause_after_button = Gtk.Button(label="Pause After Current File")
+        pause_after_button.add_css_class("flat")
+        pause_after_button.connect("clicked", self.on_pause_after_current)
+        self.pause_popover = Gtk.Popover()
+        self.pause_popover.set_child(pause_after_button)
+
+        self.pause_button = Adw.SplitButton(label="Pause")
+        self.pause_button.add_css_class("pill")
+        self.pause_button.set_popover(self.pause_popover)
+        self.pause_button.set_visible(False)
+        self.pause_button.connect("clicked", self.on_pause)
+
+        # Expected sizes and times of the batch, without converting
+        self.plan_button = Gtk.Button(label="Plan")
+        self.plan_button.add_css_class("pill")
+        self.plan_button.set_tooltip_text(
+            "Show the expected output sizes, time and disk space"
+        )
+        self.plan_button.set_sensitive(False)
+        self.plan_button.connect("clicked", self.on_plan)
+
+        self.button_box.append(self.plan_button)
         self.button_box.append(self.convert_button)
+        self.button_box.append(self.pause_button)
         self.button_box.append(self.stop_button)
 
     def _build_progress_section(self):
@@ -191,72 +935,122 @@ class BaseConvertPage(Gtk.Box):
         self.progress_bar.set_valign(Gtk.Align.CENTER)
         self.status_row.add_suffix(self.progress_bar)
 
-        self.progress_group.add(self.status_row)
+        log_button = Gtk.Button()
+        log_button.set_icon_name("text-x-generic-symbolic")
+        log_button.set_tooltip_text("Show log")
+        log_button.add_css_class("flat")
+        log_button.set_valign(Gtk.Align.CENTER)
+        log_button.connect("clicked", self.on_show_log)
+        self.status_row.add_suffix(log_button)
+
+        self.report_button = Gtk.Button()
+        self.report_button.set_icon_name("x-office-spreadsheet-symbolic")
+        self.report_button.set_tooltip_text("Show batch report")
+        self.report_button.add_css_class("flat")
+        self.report_button.set_valign(Gtk.Align.CENTER)
+        self.report_button.set_visible(False)
+        self.report_button.connect("clicked", self.on_show_report)
+        self.status_row.add_suffix(self.report_button)
 
-    def _process_output_line(self, line, is_carriage_return):
-        """
-        Process a single line of output from nsz.
+        self.progress_group.add(self.status_row)
 
-        Args:
-            line: The output line to process
-            is_carriage_return: True if line ended with \r (progress update)
-        """
-        if not line:
-            return
+    def add_job_row(self, job):
+        """Show a progress row for a job that has just started."""
+        row = Adw.ActionRow()
+        row.set_title(job.name)
+        row.set_subtitle("Starting...")
 
-        # Check for keys error
-        if "prod.keys" in line.lower() or "keys.txt" in line.lower():
-            if "not found" in line.lower():
-                self.keys_error = True
-                GLib.idle_add(self.append_output, f"❌ ERROR: {line}")
-                return
+        bar = Gtk.ProgressBar()
+        bar.set_size_request(200, -1)
+        bar.set_valign(Gtk.Align.CENTER)
+        row.add_suffix(bar)
 
-        # Check if it's a progress line
-        if "%" in line and any(indicator in line for indicator in ["|", "MiB", "MB", "KB", "B/s"]):
-            GLib.idle_add(self.update_progress, line)
-        elif not is_carriage_return:
-            # Only log non-progress lines that end with newline
-            GLib.idle_add(self.append_output, line)
+        self.progress_group.add(row)
+        self.job_rows[job.index] = (row, bar)
+        self.update_file_count()
+        return False
 
-    def _terminate_process(self):
-        """Gracefully terminate the current process, with fallback to kill."""
-        if not self.process:
-            return
+    def finish_job_row(self, job):
+        """Remove the progress row of a finished job and update the total."""
+        entry = self.job_rows.pop(job.index, None)
+        if entry:
+            self.progress_group.remove(entry[0])
 
-        try:
-            self.process.terminate()
-        except Exception:
-            pass
+        self.completed_files += 1
+        self.update_file_count()
+        self.update_overall_progress()
+        return False
 
-        # Give it a moment to terminate gracefully
-        try:
-            self.process.wait(timeout=PROCESS_TERMINATE_TIMEOUT)
-        except subprocess.TimeoutExpired:
-            try:
-                self.process.kill()
-                self.process.wait()
-            except Exception:
-                pass
+    def clear_job_rows(self):
+        for row, _ in self.job_rows.values():
+            self.progress_group.remove(row)
+        self.job_rows = {}
 
     def _add_mode_specific_settings(self):
         """Override in subclasses to add mode-specific settings"""
         pass
 
     def on_scan_depth_changed(self, spin_button):
-        if not self.selected_path:
+        # A running batch keeps its scan; the new depth applies afterwards
+        if not self.selected_path or self.stop_button.get_visible():
             return
 
-        depth = int(spin_button.get_value())
-        count = self.count_input_files(self.selected_path, depth)
+        self.start_scan()
+
+    def on_index_changed(self):
+        """Called when files appear or disappear in the selected folder."""
+        # Don't touch the convert button while a batch is running
+        if self.selected_path and not self.stop_button.get_visible():
+            self.start_scan()
+
+    def start_scan(self):
+        """Scan the selected folder in the background, cancelling any stale scan."""
+        if self.scan:
+            self.scan.cancel()
+
+        depth = int(self.scan_depth_spin.get_value())
+        self.scan = FileScan(
+            get_scan_index(self.selected_path),
+            self.input_exts,
+            depth,
+            on_batch=lambda scan: GLib.idle_add(self.on_scan_progress, scan),
+            on_done=lambda scan: GLib.idle_add(self.on_scan_finished, scan)
+        )
+        self.scan.start()
+
+    def on_scan_progress(self, scan):
+        """Show the files found so far while a scan is running."""
+        if scan is not self.scan or scan.finished:
+            return False
+
+        count = len(scan.found)
+        self.folder_row.set_subtitle(
+            f"Scanning... found {count} file{'s' if count != 1 else ''} so far"
+        )
+        self.convert_button.set_sensitive(True)
+        return False
+
+    def on_scan_finished(self, scan):
+        if scan is not self.scan:
+            return False
+
+        # Newly indexed subfolders need monitors too
+        if self.watcher:
+            self.watcher.sync()
 
+        count = len(scan.found)
         if count > 0:
             self.folder_row.set_subtitle(
                 f"Found {count} file{'s' if count != 1 else ''} ready to process"
             )
             self.convert_button.set_sensitive(True)
+            self.plan_button.set_sensitive(True)
+            self.prewarm_engine()
         else:
             self.folder_row.set_subtitle("No compatible files found")
             self.convert_button.set_sensitive(False)
+            self.plan_button.set_sensitive(False)
+        return False
 
     # ---------------- Logic ---------------- #
 
@@ -271,30 +1065,35 @@ class BaseConvertPage(Gtk.Box):
             if not folder:
                 return
 
-            self.selected_path = folder.get_path()
-            depth = int(self.scan_depth_spin.get_value())
-
-            count = self.count_input_files(self.selected_path, depth)
-            self.folder_row.set_title(self.selected_path)
-
-            if count > 0:
-                self.folder_row.set_subtitle(
-                    f"Found {count} file{'s' if count != 1 else ''}"
-                )
-                self.convert_button.set_sensitive(True)
-            else:
-                self.folder_row.set_subtitle("No compatible files found")
-                self.convert_button.set_sensitive(False)
+            self.select_folder(folder.get_path())
 
         except Exception:
             pass
 
+    def select_folder(self, path):
+        """Watch and scan a folder."""
+        self.selected_path = path
+        self.folder_row.set_title(self.selected_path)
+        self.folder_row.set_subtitle("Scanning...")
+        self.convert_button.set_sensitive(False)
+        self.plan_button.set_sensitive(False)
+
+        if self.watcher:
+            self.watcher.remove_listener(self.on_index_changed)
+        self.watcher = get_directory_watcher(self.selected_path)
+        self.watcher.add_listener(self.on_index_changed)
+
+        self.start_scan()
+
     # ---------- File discovery ---------- #
 
     def get_input_files(self, path, max_depth):
         """
         Recursively find all compatible ROM files in a directory.
 
+        The tree is only walked once; results come from the shared scan
+        index, which is kept up to date by the DirectoryWatcher.
+
         Args:
             path: Root directory to scan
             max_depth: Maximum recursion depth (0 = current dir only)
@@ -302,59 +1101,80 @@ class BaseConvertPage(Gtk.Box):
         Returns:
             List of absolute file paths
         """
-        import os
-
-        files = []
-
-        def scan(current_path, depth):
-            try:
-                for name in os.listdir(current_path):
-                    full = os.path.join(current_path, name)
-
-                    if os.path.isfile(full):
-                        if full.lower().endswith(self.input_exts):
-                            files.append(full)
-
-                    elif os.path.isdir(full):
-                        # Don't recurse if max_depth is 0 or we've reached max depth
-                        if max_depth == 0:
-                            continue
-                        if depth >= max_depth:
-                            continue
-
-                        scan(full, depth + 1)
-            except Exception:
-                pass
-
-        scan(path, 0)
-        return files
+        return get_scan_index(path).files(self.input_exts, max_depth)
 
     def count_input_files(self, path, max_depth):
         """Count compatible files in directory."""
-        return len(self.get_input_files(path, max_depth))
+        return get_scan_index(path).count(self.input_exts, max_depth)
 
     # ---------- Conversion ---------- #
 
     def on_convert(self, *_):
+        if not self.selected_path or not self.scan:
+            return
+
+        options = self.get_options()
+        journal = BatchJournal.start(
+            journal_path(self.mode),
+            self.selected_path,
+            int(self.scan_depth_spin.get_value()),
+            options
+        )
+
+        # Files still being discovered are added to the batch as they come
+        self.start_batch(self.scan, options, journal)
+
+    def on_plan(self, *_):
+        """Estimate the batch on a worker thread and show the plan."""
         if not self.selected_path:
             return
 
-        self.stopped = False  # Reset stop flag
-        self.keys_error = False  # Reset keys error flag
+        path = self.selected_path
+        depth = int(self.scan_depth_spin.get_value())
+        options = self.get_options()
+        workers = self.get_parallel_jobs()
+        self.plan_button.set_sensitive(False)
+
+        def work():
+            plan = plan_dry_run(
+                self.get_input_files(path, depth),
+                options,
+                workers,
+                root=path,
+                throughput=self.throughput
+            )
+            GLib.idle_add(self.show_plan, plan)
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def show_plan(self, plan):
+        self.plan_button.set_sensitive(True)
+        dialog = PlanDialog(plan, f"{self.action_label} Plan")
+        dialog.present(self.get_root())
+        return False
+
+    def start_batch(self, source, options, journal=None):
+        """
+        Run a batch on a worker thread.
 
+        Args:
+            source: FileScan or FileList with the files to convert
+            options: ConversionOptions for every file
+            journal: BatchJournal to record progress in
+        """
         self.status_icon.set_visible(False)
         self.status_icon.remove_css_class("success")
         self.status_icon.remove_css_class("error")
 
-        depth = int(self.scan_depth_spin.get_value())
-        self.total_files = self.count_input_files(self.selected_path, depth)
-        self.current_file = 0
+        self.completed_files = 0
+        self.clear_job_rows()
 
-        buffer = self.output_view.get_buffer()
-        buffer.set_text("")
+        self.log.clear()
 
         self.convert_button.set_visible(False)
+        self.plan_button.set_visible(False)
         self.stop_button.set_visible(True)
+        self.pause_button.set_visible(True)
         self.folder_button.set_sensitive(False)
         self.progress_group.set_visible(True)
         self.progress_bar.set_fraction(0.0)
@@ -366,244 +1186,325 @@ class BaseConvertPage(Gtk.Box):
 
         self.status_row.set_title("Processing")
         self.status_row.set_subtitle("Starting...")
+        self.report_button.set_visible(False)
+
+        # Worker threads post to the channel; it is drawn once per frame
+        self.channel = UpdateChannel()
+        self.ui_frame_source = GLib.timeout_add(
+            1000 // UI_FRAME_RATE,
+            self.on_ui_frame
+        )
+
+        self.runner = ConversionRunner(
+            options,
+            workers=self.get_parallel_jobs(),
+            use_engine=self.use_engine(),
+            listener=self,
+            throughput=self.throughput,
+            cache=get_conversion_cache() if self.skip_switch.get_active() else None,
+            hash_files=self.hash_switch.get_active(),
+            journal=journal,
+            profile=self.get_resource_profile(),
+            bandwidth_limit=self.get_bandwidth_limit(),
+            scratch_dir=self.scratch_dir,
+            device_limit=int(self.device_limit_spin.get_value()),
+            tuner=self.get_tuner(),
+            probe=self.get_probe()
+        )
 
-        thread = threading.Thread(target=self.run_conversion, daemon=True)
+        thread = threading.Thread(
+            target=self.run_conversion,
+            args=(self.runner, source),
+            daemon=True
+        )
         thread.start()
 
-    def on_stop(self, *_):
-        """Stop the current conversion process"""
-        if not self.stopped:
-            self.stopped = True
-            GLib.idle_add(self.append_output, "\n⚠️ Stopping process...")
-            self.stop_button.set_sensitive(False)  # Disable to prevent multiple clicks
+    # ---------- Unfinished batches ---------- #
+
+    def check_unfinished_batch(self):
+        """Offer to resume a batch that was stopped or interrupted."""
+        state = load_journal(journal_path(self.mode))
+        if state is None:
+            return False
+
+        pending = len(state.pending())
+        finished = len(state.files) - pending
+
+        dialog = Adw.AlertDialog()
+        dialog.set_heading("Resume Unfinished Batch?")
+        dialog.set_body(
+            f"A batch in {state.folder} was interrupted after {finished} of "
+            f"{len(state.files)} files. {pending} file"
+            f"{'s are' if pending != 1 else ' is'} left to {self.mode}."
+        )
+        dialog.add_response("discard", "Discard")
+        dialog.add_response("later", "Not Now")
+        dialog.add_response("resume", "Resume")
+        dialog.set_response_appearance("discard", Adw.ResponseAppearance.DESTRUCTIVE)
+        dialog.set_response_appearance("resume", Adw.ResponseAppearance.SUGGESTED)
+        dialog.set_default_response("resume")
+        dialog.set_close_response("later")
+        dialog.connect("response", self.on_unfinished_batch_response, state)
+        dialog.present(self.get_root())
+        return False
+
+    def on_unfinished_batch_response(self, dialog, response, state):
+        if response == "discard":
+            discard_journal(state)
+        elif response == "resume":
+            self.resume_batch(state)
 
-    def update_progress(self, progress_text):
-        # Extract percentage
-        match = re.search(r'(\d+)%', progress_text)
-        if not match:
+    def resume_batch(self, state):
+        """Continue a journaled batch with its own settings and files."""
+        if self.runner and not self.runner.stopped and self.stop_button.get_visible():
             return
 
-        percentage = int(match.group(1)) / 100.0
-        self.progress_bar.set_fraction(percentage)
+        removed = state.cleanup()
+        if state.folder and os.path.isdir(state.folder):
+            self.select_folder(state.folder)
 
-        # Try to extract speed and time info - format: [00:02<00:02, 253.83 MiB/s]
-        info_match = re.search(
-            r'\[[\d:]+<([\d:]+),\s*([\d.]+\s*\w+/s)\]',
-            progress_text
+        options = state.options.copy(threads=self.get_options().threads)
+        self.start_batch(
+            FileList(state.pending(), state.folder),
+            options,
+            BatchJournal.resume(state)
         )
 
-        if info_match:
-            remaining, speed = info_match.groups()
-            self.status_row.set_subtitle(
-                f"{int(percentage * 100)}% • {speed} • {remaining} remaining"
-            )
-        else:
-            # Just show the percentage
-            self.status_row.set_subtitle(f"{int(percentage * 100)}%")
+        self.append_output(
+            f"Resuming batch: {len(state.pending())} files left", INFO
+        )
+        for output in removed:
+            self.append_output(f"Removed partial output {output}", INFO)
 
-    def update_file_count(self):
-        if self.total_files > 1:
-            self.status_row.set_title(
-                f"Processing ({self.current_file}/{self.total_files})"
-            )
+    def on_stop(self, *_):
+        """Stop the current conversion process"""
+        if self.runner and not self.runner.stopped:
+            self.append_output("⚠️ Stopping process...", WARNING)
+            self.stop_button.set_sensitive(False)  # Disable to prevent multiple clicks
+            self.pause_button.set_sensitive(False)
+            self.runner.stop()
+
+    def on_pause(self, *_):
+        """Pause or resume the current batch."""
+        if not self.runner or self.runner.stopped:
+            return
+        if self.runner.paused or self.runner.pausing:
+            self.runner.resume()
+            self.set_paused_ui(False)
         else:
-            self.status_row.set_title("Processing")
-        return False
+            self.runner.pause()
+            self.set_paused_ui(True)
+
+    def on_pause_after_current(self, *_):
+        self.pause_popover.popdown()
+        if self.runner and not self.runner.stopped:
+            self.runner.pause_after_current()
+            self.set_paused_ui(True)
+
+    def set_paused_ui(self, paused):
+        self.pause_button.set_label("Resume" if paused else "Pause")
+        self.pause_popover.get_child().set_sensitive(not paused)
+        self.spinner.set_visible(not paused)
+        if paused:
+            self.spinner.stop()
+        else:
+            self.spinner.start()
+        self.update_file_count()
 
-    def build_command(self, file_path):
-        """Build the nsz command for a single file. Override in subclasses."""
-        cmd = [NSZ_BINARY_PATH]
-        cmd.append("-D" if self.mode == "decompress" else "-C")
+    def get_parallel_jobs(self):
+        return int(self.jobs_spin.get_value())
 
-        if self.delete_switch.get_active():
-            cmd.extend(["-V", "--rm-source"])
+    def use_engine(self):
+        """True if jobs should run in the nsz engine instead of the CLI."""
+        return self.engine_switch.get_active() and not get_engine().failed
 
-        cmd.append(file_path)
-        return cmd
+    def get_tuner(self):
+        """LevelTuner for the batch, or None. Override in subclasses."""
+        return None
 
-    def run_conversion(self):
-        """Main conversion loop that processes all files."""
-        import os
-        import pty
+    def get_probe(self):
+        """CompressionProbe for the batch, or None. Override in subclasses."""
+        return None
 
-        try:
-            depth = int(self.scan_depth_spin.get_value())
-            files = self.get_input_files(self.selected_path, depth)
+    def get_resource_profile(self):
+        return get_profile(self.profile_names[self.profile_row.get_selected()])
 
-            if not files:
-                GLib.idle_add(self.append_output, "No files found")
-                GLib.idle_add(self.on_complete, False, False)
-                return
+    def get_bandwidth_limit(self):
+        """Bytes per second for each job, or None for no limit."""
+        limit = int(self.bandwidth_spin.get_value())
+        return limit * 1000 ** 2 if limit > 0 else None
 
-            self.total_files = len(files)
-            successful = 0
+    def prewarm_engine(self):
+        """Start nsz workers while the user is still choosing settings."""
+        if self.use_engine():
+            get_engine().set_profile(self.get_resource_profile())
+            get_engine().prewarm(self.get_parallel_jobs())
 
-            for idx, path in enumerate(files, 1):
-                # Check if stopped between files
-                if self.stopped:
-                    GLib.idle_add(self.append_output, "\n⚠️ Process stopped by user")
-                    GLib.idle_add(self.on_complete, False, True)
-                    return
+    def on_engine_toggled(self, *_):
+        if self.scan and self.scan.found:
+            self.prewarm_engine()
 
-                self.current_file = idx
-                GLib.idle_add(self.update_file_count)
+    def get_thread_budget(self):
+        """Total CPU threads to share between jobs. Override in subclasses."""
+        return 0
 
-                GLib.idle_add(
-                    self.append_output,
-                    f"\n--- Processing {idx}/{self.total_files}: {os.path.basename(path)} ---"
-                )
+    def on_ui_frame(self):
+        """Apply everything the workers posted since the last frame."""
+        calls, progress, logs = self.channel.drain()
 
-                # Build and run command
-                cmd = self.build_command(path)
-                master, slave = pty.openpty()
+        for func, args in calls:
+            func(*args)
 
-                self.process = subprocess.Popen(
-                    cmd,
-                    stdout=slave,
-                    stderr=slave,
-                    close_fds=True
-                )
-                os.close(slave)
-
-                # Read output with non-blocking I/O
-                was_stopped = self._read_process_output_with_select(master)
-
-                if was_stopped:
-                    GLib.idle_add(self.on_complete, False, True)
-                    return
-
-                # Check if we hit a keys error
-                if self.keys_error:
-                    GLib.idle_add(
-                        self.append_output,
-                        "\n❌ Invalid or missing prod.keys file!\n"
-                        "Please restart the app and provide a valid keys file."
-                    )
-                    GLib.idle_add(self.on_complete, False, False)
-                    # Ask user to reload
-                    GLib.idle_add(self.show_keys_error_dialog)
-                    return
-
-                # Check result
-                if self.process.returncode == 0:
-                    successful += 1
-                    GLib.idle_add(
-                        self.append_output,
-                        f"✓ Successfully processed {os.path.basename(path)}"
-                    )
-                else:
-                    GLib.idle_add(
-                        self.append_output,
-                        f"✗ Failed to process {os.path.basename(path)}"
-                    )
-
-            GLib.idle_add(self.on_complete, successful == self.total_files, False)
+        for job, line in progress.items():
+            self.update_progress(job, line)
 
-        except Exception as e:
-            GLib.idle_add(self.append_output, f"Error: {e}")
-            GLib.idle_add(self.on_complete, False, False)
+        for text, level, section in logs:
+            self.append_output(text, level, section)
+
+        if self.debug_label.get_visible():
+            self.debug_label.set_label(self.channel.stats())
 
-    def _read_process_output_with_select(self, master):
+        # on_complete clears the source; stop ticking after the last frame
+        return self.ui_frame_source is not None
+
+    def update_progress(self, job, progress):
         """
-        Read output from process using select() for non-blocking I/O.
+        Show the progress of a job.
 
         Args:
-            master: PTY master file descriptor
+            job: The ConversionJob
+            progress: JobProgress from the engine, or a progress bar line
+                drawn by the nsz command
+        """
+        if isinstance(progress, str):
+            progress = parse_progress_line(progress)
+            if progress is None:
+                return
 
-        Returns:
-            bool: True if stopped by user, False otherwise
+        fraction = progress.fraction
+        job.fraction = fraction
+        self.update_overall_progress()
+
+        entry = self.job_rows.get(job.index)
+        if not entry:
+            return
+        row, bar = entry
+        bar.set_fraction(fraction)
+
+        subtitle = f"{int(fraction * 100)}%"
+        if progress.step:
+            subtitle = f"{progress.step} {subtitle}"
+        if progress.rate > 0:
+            subtitle += f" • {format_rate(progress.rate)}"
+        if progress.remaining is not None:
+            subtitle += f" • {format_duration(progress.remaining)} remaining"
+        row.set_subtitle(subtitle)
+
+    def update_overall_progress(self):
+        """Show the combined progress of all jobs in the status row."""
+        if not self.jobs:
+            return False
+
+        total_size = sum(job.size for job in self.jobs)
+        if total_size > 0:
+            # Weight each job by its size so a finished DLC doesn't count
+            # as much as a finished 16 GB XCI
+            done = sum(
+                job.size * (1.0 if job.status == JOB_DONE else job.fraction)
+                for job in self.jobs
+            )
+            fraction = done / total_size
+        else:
+            done = sum(
+                1.0 if job.status == JOB_DONE else job.fraction
+                for job in self.jobs
+            )
+            fraction = done / len(self.jobs)
+
+        self.progress_bar.set_fraction(fraction)
+
+        subtitle = f"{int(fraction * 100)}% overall"
+        if self.estimated_seconds is not None:
+            remaining = self.estimated_seconds * (1.0 - fraction)
+            subtitle += f" • ~{format_duration(remaining)} remaining"
+        self.status_row.set_subtitle(subtitle)
+        return False
+
+    def update_file_count(self):
+        paused = self.runner and (self.runner.paused or self.runner.pausing)
+        title = "Paused" if paused else "Processing"
+        if self.total_files > 1:
+            self.status_row.set_title(
+                f"{title} ({self.completed_files}/{self.total_files})"
+            )
+        else:
+            self.status_row.set_title(title)
+        return False
+
+    def get_options(self):
+        """Conversion settings of a batch. Override in subclasses."""
+        return ConversionOptions(
+            self.mode,
+            rm_source=self.delete_switch.get_active(),
+            output_dir=self.output_dir
+        )
+
+    def run_conversion(self, runner, scan):
         """
-        import os
-        import fcntl
-        import select
+        Run a batch on a worker thread and show the result when it ends.
 
-        # Set non-blocking mode
-        flags = fcntl.fcntl(master, fcntl.F_GETFL)
-        fcntl.fcntl(master, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        Args:
+            runner: The ConversionRunner of the batch
+            scan: The FileScan of the selected folder
+        """
+        result = runner.run(scan)
+
+        if result == RESULT_KEYS_ERROR:
+            self.channel.post_call(self.on_complete, False, False)
+            # Ask user to reload
+            self.channel.post_call(self.show_keys_error_dialog)
+        elif result == RESULT_STOPPED:
+            self.channel.post_call(self.on_complete, False, True)
+        elif result == RESULT_NO_FILES:
+            self.channel.post_call(self.on_complete, False, False)
+        else:
+            self.channel.post_call(self.on_complete, result == RESULT_SUCCESS, False)
 
-        output_buffer = b""
+    # ---------- RunnerListener (worker threads) ---------- #
 
-        while True:
-            # Check if stopped
-            if self.stopped:
-                self._terminate_process()
-                try:
-                    os.close(master)
-                except Exception:
-                    pass
-                return True  # Stopped by user
+    def on_log(self, text, level=INFO, section=None):
+        self.channel.post_log(text, level, section)
 
-            # Check if process is still running
-            if self.process.poll() is not None:
-                # Process ended, read any remaining output
-                try:
-                    remaining = os.read(master, READ_BUFFER_SIZE)
-                    if remaining:
-                        output_buffer += remaining
-                except Exception:
-                    pass
-                break
+    def on_job_started(self, job):
+        self.channel.post_call(self.add_job_row, job)
 
-            # Try to read output
-            try:
-                ready, _, _ = select.select([master], [], [], PROCESS_POLL_INTERVAL)
-                if ready:
-                    chunk = os.read(master, READ_BUFFER_SIZE)
-                    if chunk:
-                        output_buffer += chunk
-
-                        # Process lines - split by both \n and \r
-                        while b'\n' in output_buffer or b'\r' in output_buffer:
-                            newline_pos = output_buffer.find(b'\n')
-                            carriage_pos = output_buffer.find(b'\r')
-
-                            if newline_pos == -1:
-                                split_pos = carriage_pos
-                                is_carriage = True
-                            elif carriage_pos == -1:
-                                split_pos = newline_pos
-                                is_carriage = False
-                            else:
-                                split_pos = min(newline_pos, carriage_pos)
-                                is_carriage = (carriage_pos < newline_pos)
-
-                            if split_pos == -1:
-                                break
-
-                            line_bytes = output_buffer[:split_pos]
-                            output_buffer = output_buffer[split_pos + 1:]
-
-                            try:
-                                line = line_bytes.decode('utf-8', errors='replace').strip()
-                                self._process_output_line(line, is_carriage)
-                            except Exception:
-                                pass
-            except (OSError, IOError):
-                pass
+    def on_job_progress(self, job, progress):
+        self.channel.post_progress(job, progress)
 
-        # Process any remaining output
-        if output_buffer:
-            try:
-                line = output_buffer.decode('utf-8', errors='replace').rstrip("\r\n")
-                if line:
-                    GLib.idle_add(self.append_output, line)
-            except Exception:
-                pass
+    def on_job_finished(self, job):
+        self.channel.post_call(self.finish_job_row, job)
 
-        try:
-            os.close(master)
-        except Exception:
-            pass
+    def append_output(self, text, level=INFO, section=None):
+        self.log.append(text, level, section)
+        return False
 
-        return False  # Not stopped by user
+    def on_show_log(self, *_):
+        viewer = LogViewer(self.log, f"{self.action_label} Log")
+        viewer.present(self.get_root())
 
-    def append_output(self, text):
-        buf = self.output_view.get_buffer()
-        buf.insert(buf.get_end_iter(), text + "\n")
+    def on_show_report(self, *_):
+        if self.runner:
+            dialog = BatchReportDialog(
+                self.runner.telemetry, "Batch Report", self.report_error
+            )
+            dialog.present(self.get_root())
 
-        # Auto-scroll to bottom
-        mark = buf.get_insert()
-        self.output_view.scroll_to_mark(mark, 0.0, False, 0.0, 0.0)
+    def report_error(self, text):
+        """Log an error outside a batch and show it as a toast."""
+        self.append_output(f"⚠️ {text}", WARNING)
+        window = self.get_root()
+        if isinstance(window, SwitchROMToolsWindow):
+            window.show_toast(text)
 
     def show_keys_error_dialog(self):
         """Show dialog informing user about invalid keys and offer to reload."""
@@ -614,16 +1515,25 @@ class BaseConvertPage(Gtk.Box):
             window.show_toast("Invalid prod.keys detected! Please select a valid file.")
 
     def on_complete(self, success, stopped=False):
+        # Called from on_ui_frame, which removes its own timeout
+        self.ui_frame_source = None
+
         self.spinner.stop()
         self.spinner.set_visible(False)
 
         self.status_icon.set_visible(True)
 
         self.convert_button.set_visible(True)
+        self.plan_button.set_visible(True)
         self.stop_button.set_visible(False)
         self.stop_button.set_sensitive(True)  # Re-enable for next time
+        self.pause_button.set_visible(False)
+        self.pause_button.set_sensitive(True)
+        self.pause_button.set_label("Pause")
+        self.pause_popover.get_child().set_sensitive(True)
         self.convert_button.set_sensitive(True)
         self.folder_button.set_sensitive(True)
+        self.report_button.set_visible(bool(self.runner and self.runner.telemetry.jobs))
 
         if stopped:
             self.status_row.set_title("Stopped")
@@ -633,10 +1543,13 @@ class BaseConvertPage(Gtk.Box):
             self.status_icon.add_css_class("error")
         elif success:
             self.status_row.set_title("Completed")
-            self.status_row.set_subtitle(
+            subtitle = (
                 f"Successfully processed {self.total_files} file"
                 f"{'s' if self.total_files != 1 else ''}"
             )
+            if self.runner and self.runner.skipped:
+                subtitle += f", {len(self.runner.skipped)} already converted"
+            self.status_row.set_subtitle(subtitle)
             self.progress_bar.set_fraction(1.0)
 
             self.status_icon.set_from_icon_name("object-select-symbolic")
@@ -648,26 +1561,25 @@ class BaseConvertPage(Gtk.Box):
             self.status_icon.set_from_icon_name("dialog-error-symbolic")
             self.status_icon.add_css_class("error")
 
+        # Pick up files added or removed during the batch
+        if self.selected_path:
+            self.start_scan()
+
 
 class DecompressPage(BaseConvertPage):
-    mode = "decompress"
-    input_exts = (".nsz", ".xcz", ".ncz")
+    mode = MODE_DECOMPRESS
+    input_exts = INPUT_EXTENSIONS[MODE_DECOMPRESS]
     action_label = "Decompress to NSP/XCI"
 
-    def build_command(self, file_path):
-        """Build the nsz decompression command"""
-        cmd = [NSZ_BINARY_PATH, "-D"]
-
-        # Add verification if enabled
-        if hasattr(self, 'verify_switch') and self.verify_switch.get_active():
-            cmd.append("-V")
-
-        # Delete source if checked
-        if self.delete_switch.get_active():
-            cmd.extend(["-V", "--rm-source"])
-
-        cmd.append(file_path)
-        return cmd
+    def get_options(self):
+        """Decompression settings"""
+        return ConversionOptions(
+            self.mode,
+            verify=self.verify_switch.get_active(),
+            verify_mode=self.verify_modes[self.verify_mode_row.get_selected()],
+            rm_source=self.delete_switch.get_active(),
+            output_dir=self.output_dir
+        )
 
     def _add_mode_specific_settings(self):
         """Add decompression-specific settings"""
@@ -685,11 +1597,30 @@ class DecompressPage(BaseConvertPage):
 
         self.expander.add_row(verify_row)
 
+        # Hashing while writing saves reading every file a second time
+        self.verify_modes = [VERIFY_INLINE, VERIFY_FULL]
+        self.verify_mode_row = Adw.ComboRow()
+        self.verify_mode_row.set_title("Verification")
+        self.verify_mode_row.set_model(Gtk.StringList.new(
+            ["While writing", "Read back afterwards"]
+        ))
+        self.expander.add_row(self.verify_mode_row)
+
+        def on_verify_changed(*_):
+            self.verify_mode_row.set_sensitive(
+                self.verify_switch.get_active() or self.delete_switch.get_active()
+            )
+
+        self.verify_switch.connect("notify::active", on_verify_changed)
+        self.delete_switch.connect("notify::active", on_verify_changed)
+        on_verify_changed()
+
 
 class CompressPage(BaseConvertPage):
-    mode = "compress"
-    input_exts = (".nsp", ".xci")
+    mode = MODE_COMPRESS
+    input_exts = INPUT_EXTENSIONS[MODE_COMPRESS]
     action_label = "Compress to NSZ/XCZ"
+    tunable = True  # Titles can be sampled for their level and savings
 
     def _add_mode_specific_settings(self):
         """Add compression-specific settings"""
@@ -720,6 +1651,88 @@ class CompressPage(BaseConvertPage):
 
         self.level_spin.connect("value-changed", on_level_changed)
 
+        # Automatic level, sampled in the nsz engine
+        auto_row = Adw.ActionRow()
+        auto_row.set_title("Automatic level")
+        auto_row.set_subtitle(
+            "Sample each title and use the best level that meets the targets below"
+        )
+
+        self.auto_level_switch = Gtk.Switch()
+        self.auto_level_switch.set_valign(Gtk.Align.CENTER)
+
+        auto_row.add_suffix(self.auto_level_switch)
+        auto_row.set_activatable_widget(self.auto_level_switch)
+        auto_row.set_visible(self.tunable and engine_available())
+        self.expander.add_row(auto_row)
+
+        speed_row = Adw.ActionRow()
+        speed_row.set_title("Minimum speed")
+        speed_row.set_subtitle("MiB/s each file should reach, 0 = best compression")
+
+        self.min_speed_spin = Gtk.SpinButton()
+        self.min_speed_spin.set_range(0, MAX_TUNING_SPEED)
+        self.min_speed_spin.set_value(0)
+        self.min_speed_spin.set_increments(10, 100)
+        self.min_speed_spin.set_valign(Gtk.Align.CENTER)
+
+        speed_row.add_suffix(self.min_speed_spin)
+        speed_row.set_visible(self.tunable and engine_available())
+        self.expander.add_row(speed_row)
+
+        deadline_row = Adw.ActionRow()
+        deadline_row.set_title("Finish within")
+        deadline_row.set_subtitle("Hours for the whole batch, 0 = no limit")
+
+        self.deadline_spin = Gtk.SpinButton()
+        self.deadline_spin.set_range(0, MAX_TUNING_HOURS)
+        self.deadline_spin.set_digits(1)
+        self.deadline_spin.set_value(0)
+        self.deadline_spin.set_increments(0.5, 1)
+        self.deadline_spin.set_valign(Gtk.Align.CENTER)
+
+        deadline_row.add_suffix(self.deadline_spin)
+        deadline_row.set_visible(self.tunable and engine_available())
+        self.expander.add_row(deadline_row)
+
+        for row in (speed_row, deadline_row):
+            self.auto_level_switch.bind_property(
+                "active", row, "sensitive",
+                GObject.BindingFlags.SYNC_CREATE
+            )
+
+        # Titles with little to gain, probed in the nsz engine
+        savings_row = Adw.ActionRow()
+        savings_row.set_title("Minimum savings")
+        savings_row.set_subtitle(
+            "Percent a title must shrink by to be worth compressing, 0 = off"
+        )
+
+        self.min_savings_spin = Gtk.SpinButton()
+        self.min_savings_spin.set_range(0, MAX_MIN_SAVINGS)
+        self.min_savings_spin.set_value(0)
+        self.min_savings_spin.set_increments(1, 5)
+        self.min_savings_spin.set_valign(Gtk.Align.CENTER)
+
+        savings_row.add_suffix(self.min_savings_spin)
+        savings_row.set_visible(self.tunable and engine_available())
+        self.expander.add_row(savings_row)
+
+        self.low_gain_actions = [LOW_GAIN_SKIP, LOW_GAIN_FAST]
+        self.low_gain_row = Adw.ComboRow()
+        self.low_gain_row.set_title("Titles below it")
+        self.low_gain_row.set_model(Gtk.StringList.new(
+            ["Skip", "Compress at a fast level"]
+        ))
+        self.low_gain_row.set_visible(self.tunable and engine_available())
+        self.expander.add_row(self.low_gain_row)
+
+        def on_min_savings_changed(spin):
+            self.low_gain_row.set_sensitive(spin.get_value() > 0)
+
+        self.min_savings_spin.connect("value-changed", on_min_savings_changed)
+        on_min_savings_changed(self.min_savings_spin)
+
         # Compression mode
         mode_row = Adw.ActionRow()
         mode_row.set_title("Compression mode")
@@ -777,37 +1790,57 @@ class CompressPage(BaseConvertPage):
         threads_row.add_suffix(self.threads_spin)
         self.expander.add_row(threads_row)
 
-    def build_command(self, file_path):
-        """Build the nsz compression command"""
-        cmd = [NSZ_BINARY_PATH, "-C"]
-
-        # Compression level
-        level = int(self.level_spin.get_value())
-        cmd.extend(["-l", str(level)])
+    def get_thread_budget(self):
+        return int(self.threads_spin.get_value())
+
+    def get_tuner(self):
+        if not (self.tunable and self.auto_level_switch.get_active()
+                and engine_available()):
+            return None
+
+        min_speed = self.min_speed_spin.get_value() * 1024 ** 2
+        hours = self.deadline_spin.get_value()
+        return LevelTuner(TuningTarget(
+            min_speed=min_speed or None,
+            deadline=time.monotonic() + hours * 3600 if hours else None
+        ))
+
+    def get_probe(self):
+        min_savings = self.min_savings_spin.get_value()
+        if not (self.tunable and min_savings and engine_available()):
+            return None
+        return CompressionProbe(
+            min_savings / 100,
+            self.low_gain_actions[self.low_gain_row.get_selected()]
+        )
 
-        # Compression mode
-        if self.solid_button.get_active():
-            cmd.append("-S")
-        else:
-            cmd.append("-B")
+    def get_options(self):
+        """Compression settings"""
+        # Deleting the source forces verification
+        return ConversionOptions(
+            self.mode,
+            level=int(self.level_spin.get_value()),
+            solid=self.solid_button.get_active(),
+            verify=self.verify_switch.get_active(),
+            rm_source=self.delete_switch.get_active(),
+            # The whole budget; the runner splits it between running jobs
+            threads=self.get_thread_budget(),
+            output_dir=self.output_dir
+        )
 
-        # Threading
-        threads = int(self.threads_spin.get_value())
-        if threads > 0:
-            cmd.extend(["-t", str(threads)])
 
-        # Verification
-        if self.verify_switch.get_active():
-            cmd.append("-V")
+class RecompressPage(CompressPage):
+    """
+    Compress NSZ/XCZ files again, e.g. at another level or in block mode.
 
-        # Delete source if checked (requires verification)
-        if self.delete_switch.get_active():
-            if not self.verify_switch.get_active():
-                cmd.append("-V")  # Force verification when deleting source
-            cmd.append("--rm-source")
+    Each title is decompressed into memory when it fits and compressed
+    from there; without an output folder the new file replaces the old.
+    """
 
-        cmd.append(file_path)
-        return cmd
+    mode = MODE_RECOMPRESS
+    input_exts = INPUT_EXTENSIONS[MODE_RECOMPRESS]
+    action_label = "Recompress NSZ/XCZ"
+    tunable = False  # Sampling needs the uncompressed title
 
 
 class SwitchROMToolsWindow(Adw.ApplicationWindow):
@@ -828,10 +1861,7 @@ class SwitchROMToolsWindow(Adw.ApplicationWindow):
     # ---------- prod.keys handling ---------- #
 
     def check_prod_keys(self):
-        import os
-        return os.path.exists(
-            os.path.expanduser(PROD_KEYS_PATH)
-        )
+        return prod_keys_present()
 
     def build_prod_keys_ui(self):
         self.toast_overlay = Adw.ToastOverlay()
@@ -929,24 +1959,38 @@ class SwitchROMToolsWindow(Adw.ApplicationWindow):
         toolbar_view.add_top_bar(header)
 
         # Pages
+        self.decompress_page = DecompressPage()
         decompress_page = self.view_stack.add_titled(
-            DecompressPage(),
+            self.decompress_page,
             "decompress",
             "Decompress"
         )
         decompress_page.set_icon_name("decompress-icon-symbolic")
 
+        self.compress_page = CompressPage()
         compress_page = self.view_stack.add_titled(
-            CompressPage(),
+            self.compress_page,
             "compress",
             "Compress"
         )
         compress_page.set_icon_name("compress-icon-symbolic")
 
+        self.recompress_page = RecompressPage()
+        recompress_page = self.view_stack.add_titled(
+            self.recompress_page,
+            "recompress",
+            "Recompress"
+        )
+        recompress_page.set_icon_name("view-refresh-symbolic")
+
         toolbar_view.set_content(self.view_stack)
         self.toast_overlay.set_child(toolbar_view)
         self.set_content(self.toast_overlay)
 
+        # Batches interrupted by a crash, a closed window or Stop
+        for page in (self.decompress_page, self.compress_page, self.recompress_page):
+            GLib.idle_add(page.check_unfinished_batch)
+
     # ---------- toast ---------- #
 
     def show_toast(self, message):
@@ -0,0 +1,131 @@
+# nszoptions.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+MODE_COMPRESS = "compress"
+MODE_DECOMPRESS = "decompress"
+MODE_RECOMPRESS = "recompress"  # Decompress, then compress again, per file
+MODE_VERIFY = "verify"  # Reading a converted file back, see verify_pass()
+
+# How decompressed files are verified
+VERIFY_INLINE = "inline"  # nsz hashes every NCA while writing it
+VERIFY_FULL = "full"      # The output is also read back and hashed again
+VERIFY_MODES = (VERIFY_INLINE, VERIFY_FULL)
+
+
+class ConversionOptions:
+    """
+    Settings for converting one file, independent of how nsz is run.
+
+    The same options become a command line for the nsz binary or a job
+    message for an engine worker.
+    """
+
+    FIELDS = (
+        "mode", "level", "solid", "verify", "verify_mode", "rm_source",
+        "threads", "output_dir"
+    )
+
+    def __init__(self, mode, level=None, solid=True, verify=False,
+                 verify_mode=VERIFY_INLINE, rm_source=False, threads=0,
+                 output_dir=None):
+        self.mode = mode
+        self.level = level
+        self.solid = solid
+        self.verify = verify
+        self.verify_mode = verify_mode
+        self.rm_source = rm_source
+        self.threads = threads
+        self.output_dir = output_dir  # None writes next to the input
+
+    def to_args(self, path):
+        """
+        nsz arguments for converting path, without the nsz binary.
+
+        Deleting the source always verifies first.
+        """
+        if self.mode == MODE_VERIFY:
+            return ["-V", path]
+
+        if self.mode == MODE_COMPRESS:
+            args = ["-C"]
+            if self.level is not None:
+                args.extend(["-l", str(self.level)])
+            args.append("-S" if self.solid else "-B")
+            if self.threads and self.threads > 0:
+                args.extend(["-t", str(self.threads)])
+            # A compressed file can only be verified by reading it back
+            if self.verify or self.rm_source:
+                args.append("-V")
+            if self.rm_source:
+                args.append("--rm-source")
+        else:
+            # nsz hashes every NCA while decompressing, but deletes the
+            # source even if one mismatches: the runner deletes it instead
+            args = ["-D"]
+
+        if self.output_dir:
+            args.extend(["-o", self.output_dir])
+
+        args.append(path)
+        return args
+
+    @property
+    def verifies(self):
+        return self.verify or self.rm_source
+
+    def needs_verify_pass(self):
+        """True if a decompressed file is to be read back after writing."""
+        return (
+            self.mode == MODE_DECOMPRESS
+            and self.verifies
+            and self.verify_mode == VERIFY_FULL
+        )
+
+    def decompress_pass(self, output_dir):
+        """Options for the first pass of a recompression."""
+        return ConversionOptions(
+            MODE_DECOMPRESS, threads=self.threads, output_dir=output_dir
+        )
+
+    def compress_pass(self, output_dir, verify=False):
+        """Options for the second pass of a recompression."""
+        return self.copy(
+            mode=MODE_COMPRESS,
+            # The source is deleted by the runner, after this verifies
+            verify=self.verifies or verify,
+            rm_source=False,
+            output_dir=output_dir
+        )
+
+    def verify_pass(self):
+        """Options for reading a converted file back and verifying it."""
+        return ConversionOptions(MODE_VERIFY, threads=self.threads)
+
+    def copy(self, **changes):
+        """A copy of these options with some fields changed."""
+        data = self.to_dict()
+        data.update(changes)
+        return ConversionOptions(**data)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data[name] for name in cls.FIELDS if name in data})
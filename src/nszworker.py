@@ -0,0 +1,179 @@
+# nszworker.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Long-lived nsz worker process, started by NszEngine.
+
+nsz, pycryptodome, zstandard and prod.keys are loaded once at start.
+Each JSON line on stdin is a job, {"id", "path", "options"}, that runs
+nsz's command-line main() in this process, or a sampling job,
+{"id", "kind": "sample", "path", "levels"}, for the level tuner. nsz writes its log output to
+stdout (a PTY); events for the engine, including structured progress
+instead of drawn progress bars, are written in-band as lines starting
+with EVENT_PREFIX.
+"""
+
+import io
+import json
+import os
+import signal
+import sys
+import time
+import traceback
+
+from .nszoptions import ConversionOptions
+from .leveltuner import sample_title
+from .outputparser import UNIT_SIZES
+
+EVENT_PREFIX = "@@switchromtools@@ "
+KIND_CONVERT = "convert"
+KIND_SAMPLE = "sample"
+PROGRESS_INTERVAL = 0.1  # seconds between progress events per bar
+
+_current_job = None
+
+
+def emit(event, **fields):
+    fields["event"] = event
+    # Start on a fresh line in case nsz left a progress bar unterminated
+    sys.stdout.write("\n" + EVENT_PREFIX + json.dumps(fields) + "\n")
+    sys.stdout.flush()
+
+
+def _terminate_group(signum, frame):
+    # nsz compresses in multiprocessing children; take them down too.
+    # The worker runs in its own session, so the group is ours alone.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    os.killpg(0, signal.SIGTERM)
+
+
+def _report_progress(counter, flush=True, elapsed=None):
+    """Replacement for enlighten.Counter.refresh: emit, don't draw."""
+    now = time.time()
+    # Counter.update() throttles on last_update
+    counter.last_update = now
+
+    total = counter.total or 0
+    if _current_job is None:
+        return
+    if counter.count < total and now - getattr(counter, "_reported", 0) < PROGRESS_INTERVAL:
+        return
+    counter._reported = now
+
+    unit_size = UNIT_SIZES.get(counter.unit, 1)
+    if elapsed is None:
+        elapsed = counter.elapsed
+    done = counter.count * unit_size
+    emit(
+        "progress",
+        id=_current_job,
+        step=counter.desc,
+        done=done,
+        total=total * unit_size,
+        rate=done / elapsed if elapsed and elapsed > 0 else 0.0
+    )
+
+
+def _hook_progress_bars():
+    try:
+        import enlighten
+    except ImportError:
+        return
+    enlighten.Counter.refresh = _report_progress
+
+
+def run_nsz(nsz, args):
+    """Run one nsz command line in this process and return its exit code."""
+    # nsz keeps errors in a module-level list and reads the sys.argv list
+    # it imported, so both are reset in place
+    del nsz.err[:]
+    sys.argv[:] = ["nsz"] + list(args)
+
+    try:
+        nsz.main()
+        return 0
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        traceback.print_exc()
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+def run_sample(job_id, path, levels):
+    """Sample a title for the level tuner and emit the results."""
+    try:
+        results = sample_title(path, levels)
+    except Exception:
+        traceback.print_exc()
+        return 1
+    emit("sample", id=job_id, results=results)
+    return 0
+
+
+def main():
+    global _current_job
+
+    jobs = sys.stdin
+    # nsz asks to "Press Enter to exit" on fatal errors; never let that
+    # read from the job pipe
+    sys.stdin = io.StringIO("\n")
+    signal.signal(signal.SIGTERM, _terminate_group)
+
+    try:
+        import nsz  # Loads prod.keys
+    except SystemExit:
+        emit("failed", reason="keys")
+        return 1
+    except ImportError as e:
+        emit("failed", reason=str(e))
+        return 1
+
+    _hook_progress_bars()
+    emit("ready")
+
+    for line in jobs:
+        try:
+            job = json.loads(line)
+            kind = job.get("kind", KIND_CONVERT)
+            if kind == KIND_SAMPLE:
+                levels = [int(level) for level in job["levels"]]
+            else:
+                options = ConversionOptions.from_dict(job["options"])
+        except (ValueError, KeyError, TypeError):
+            continue
+
+        _current_job = job["id"]
+        emit("start", id=job["id"])
+        if kind == KIND_SAMPLE:
+            returncode = run_sample(job["id"], job["path"], levels)
+        else:
+            returncode = run_nsz(nsz, options.to_args(job["path"]))
+        _current_job = None
+        emit("done", id=job["id"], returncode=returncode)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
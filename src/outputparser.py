@@ -0,0 +1,189 @@
+# outputparser.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import re
+
+# A PTY ends lines with \r\n, progress bars redraw with a lone \r
+_LINE_SPLIT = re.compile(r"(\r\n|\r|\n)")
+_PERCENT = re.compile(r"(\d+)%")
+# nsz progress bar head and count, e.g. "Compressing  45%|" and "| 1201/2670 MiB ["
+_BAR_STEP = re.compile(r"^\s*([A-Za-z][\w ]*?)\s*\d+%\|")
+_BAR_COUNT = re.compile(r"\|\s*(\d+)/(\d+)\s*(\w+)\s*\[")
+# nsz progress bar tail, e.g. [00:02<00:02, 253.83 MiB/s]
+_BAR_INFO = re.compile(r"\[[\d:]+<([\d:]+),\s*([\d.]+)\s*(\w+)/s\]")
+
+UNIT_SIZES = {
+    "B": 1,
+    "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3,
+    "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3,
+}
+
+
+def format_rate(rate):
+    """Human-readable transfer rate for bytes per second."""
+    for unit in ("B", "KiB", "MiB"):
+        if rate < 1024:
+            return f"{rate:.0f} {unit}/s" if unit == "B" else f"{rate:.1f} {unit}/s"
+        rate /= 1024
+    return f"{rate:.2f} GiB/s"
+
+
+def format_size(size):
+    """Human-readable size for a number of bytes."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} TiB"
+
+
+class JobProgress:
+    """
+    Progress of one job: the current step, bytes done and total, and
+    the rate in bytes per second. remaining is in seconds, or None.
+    """
+
+    __slots__ = ("step", "done", "total", "rate", "remaining")
+
+    def __init__(self, step=None, done=0, total=0, rate=0.0, remaining=None):
+        self.step = step
+        self.done = done
+        self.total = total
+        self.rate = rate
+        if remaining is None and rate > 0 and total >= done:
+            remaining = (total - done) / rate
+        self.remaining = remaining
+
+    @property
+    def fraction(self):
+        if self.total <= 0:
+            return 0.0
+        return min(1.0, self.done / self.total)
+
+
+def parse_progress_line(line):
+    """
+    Parse an nsz progress bar drawn as text.
+
+    Only needed when nsz runs as a command; engine workers report
+    JobProgress directly.
+
+    The step is the label in front of the bar ("Compressing",
+    "Verifying", ...). done and total are in bytes if the bar shows its
+    count, otherwise in percent out of 100.
+
+    Returns:
+        JobProgress, or None if the line has no percentage
+    """
+    match = _PERCENT.search(line)
+    if not match:
+        return None
+
+    step = _BAR_STEP.match(line)
+    step = step.group(1) if step else None
+    done, total = int(match.group(1)), 100
+    count = _BAR_COUNT.search(line)
+    if count and count.group(3) in UNIT_SIZES and int(count.group(2)) > 0:
+        unit_size = UNIT_SIZES[count.group(3)]
+        done = int(count.group(1)) * unit_size
+        total = int(count.group(2)) * unit_size
+
+    info = _BAR_INFO.search(line)
+    if not info:
+        return JobProgress(step, done, total)
+
+    remaining, speed, unit = info.groups()
+    seconds = 0
+    for part in remaining.split(":"):
+        seconds = seconds * 60 + int(part)
+
+    return JobProgress(
+        step,
+        done,
+        total,
+        rate=float(speed) * UNIT_SIZES.get(unit, 1),
+        remaining=seconds
+    )
+
+
+class LineSplitter:
+    """
+    Streaming line splitter for terminal output.
+
+    Chunks are appended to a single bytearray. Only the newly added
+    bytes are searched for the last \r or \n (a trailing \r waits for
+    the next chunk, in case a \n follows); everything up to it is
+    decoded straight from a memoryview of the buffer and split in one
+    pass, then dropped from the front of the buffer in one operation.
+    The cost stays linear in the amount of output no matter how often a
+    progress bar redraws itself.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, chunk):
+        """
+        Add a chunk of output and return the lines it completed.
+
+        Args:
+            chunk: Bytes read from the process
+
+        Returns:
+            List of (line, is_carriage_return) tuples. Lines are decoded
+            as UTF-8 and stripped; is_carriage_return is True when the
+            line ended with \r (a progress redraw).
+        """
+        buf = self._buffer
+        # Everything already buffered is an unterminated partial line,
+        # except a held back \r at its end
+        scan_from = max(0, len(buf) - 1)
+        buf += chunk
+
+        # A \r at the end may be the first half of a \r\n split across
+        # reads; it is held back until the next chunk or flush()
+        limit = len(buf) - 1 if buf.endswith(b"\r") else len(buf)
+        end = max(
+            buf.rfind(b"\n", scan_from, limit), buf.rfind(b"\r", scan_from, limit)
+        )
+        if end == -1:
+            return []
+
+        # Decoding stops at a line ending, so a multi-byte character is
+        # never cut in half
+        with memoryview(buf) as view:
+            text = str(view[:end + 1], "utf-8", "replace")
+        del buf[:end + 1]
+
+        parts = _LINE_SPLIT.split(text)
+        return [
+            (line.strip(), ending == "\r")
+            for line, ending in zip(parts[::2], parts[1::2])
+        ]
+
+    def flush(self):
+        """Return the unterminated rest of the output and reset."""
+        rest = self._buffer.decode("utf-8", errors="replace").rstrip("\r\n")
+        self._buffer = bytearray()
+        return rest
+
+    @property
+    def pending(self):
+        """Number of buffered bytes without a line ending yet."""
+        return len(self._buffer)
@@ -0,0 +1,213 @@
+# placement.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import errno
+import os
+import shutil
+import threading
+
+PART_SUFFIX = ".part"  # a staged output being copied to its final place
+
+
+def existing_parent(path):
+    """path, or its closest parent that exists."""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def filesystem(path):
+    """Key of the file system holding path, or None."""
+    try:
+        return os.stat(existing_parent(path)).st_dev
+    except OSError:
+        return None
+
+
+def free_space(path):
+    """Bytes that may still be written to the file system of path, or None."""
+    try:
+        st = os.statvfs(existing_parent(path))
+    except OSError:
+        return None
+    return st.f_bavail * st.f_frsize
+
+
+def physical_device(path):
+    """
+    Key of the device holding path.
+
+    Partitions of the same disk share a key, since they share its
+    heads and queue. File systems without a block device (network
+    shares, tmpfs) are keyed by their st_dev.
+    """
+    try:
+        st_dev = os.stat(existing_parent(path)).st_dev
+    except OSError:
+        return None
+
+    key = f"{os.major(st_dev)}:{os.minor(st_dev)}"
+    sys_path = os.path.realpath(f"/sys/dev/block/{key}")
+    if not os.path.isdir(sys_path):
+        return f"fs:{key}"
+
+    if os.path.exists(os.path.join(sys_path, "partition")):
+        try:
+            with open(os.path.join(os.path.dirname(sys_path), "dev")) as f:
+                return f.read().strip()
+        except OSError:
+            pass
+    return key
+
+
+class Placement:
+    """
+    Where the files of a batch are read, written and staged.
+
+    Outputs of files in subfolders of root keep their subfolder below
+    output_dir and scratch_dir, so files with the same name in different
+    folders do not collide.
+
+    Attributes:
+        root: Folder the batch was started in, or None
+        output_dir: Folder for the outputs, or None to write them next
+            to their sources
+        scratch_dir: Fast local folder nsz writes to first; finished
+            outputs are then moved to their final place. None to write
+            in place.
+    """
+
+    def __init__(self, root=None, output_dir=None, scratch_dir=None):
+        self.root = root
+        self.output_dir = output_dir
+        self.scratch_dir = scratch_dir
+        self._devices = {}
+        self._move_locks = {}
+        self._lock = threading.Lock()
+
+    @property
+    def staged(self):
+        return self.scratch_dir is not None
+
+    def prepare(self):
+        """Create the output and scratch folders."""
+        for path in (self.output_dir, self.scratch_dir):
+            if path:
+                os.makedirs(path, exist_ok=True)
+
+    def _subfolder(self, base, source):
+        folder = os.path.dirname(source)
+        if self.root:
+            relative = os.path.relpath(folder, self.root)
+            if relative != "." and not relative.startswith(os.pardir):
+                return os.path.join(base, relative)
+        return base
+
+    def final_dir(self, source):
+        """Folder the output of source ends up in."""
+        if not self.output_dir:
+            return os.path.dirname(source)
+        return self._subfolder(self.output_dir, source)
+
+    def write_dir(self, source):
+        """Folder nsz writes the output of source to."""
+        if not self.scratch_dir:
+            return self.final_dir(source)
+        return self._subfolder(self.scratch_dir, source)
+
+    def _device(self, folder):
+        with self._lock:
+            if folder not in self._devices:
+                self._devices[folder] = physical_device(folder)
+            return self._devices[folder]
+
+    def devices(self, source):
+        """Devices a conversion of source reads from and writes to."""
+        devices = {
+            self._device(os.path.dirname(source)),
+            self._device(self.write_dir(source)),
+        }
+        devices.discard(None)
+        return tuple(sorted(devices))
+
+    @staticmethod
+    def _place(source, final, replace):
+        """Rename on one file system, without overwriting unless replace."""
+        if replace:
+            os.replace(source, final)
+            return
+        try:
+            # A hard link fails if final exists, where a rename overwrites
+            os.link(source, final)
+        except FileExistsError:
+            raise
+        except OSError as e:
+            if e.errno not in (errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP):
+                raise
+            # No hard links (FAT, exFAT): check, then rename
+            if os.path.exists(final):
+                raise FileExistsError(errno.EEXIST, "File exists", final) from e
+            os.rename(source, final)
+            return
+        os.remove(source)
+
+    def move_to_final(self, staged, final, replace=False):
+        """
+        Move a finished output from the scratch folder to its place.
+
+        A copy to another device goes to a .part file first, so an
+        interrupted move never leaves a truncated output under the final
+        name. Moves to the same device are serialized, so they do not
+        compete for it.
+
+        Args:
+            staged: Finished output in the scratch folder
+            final: Where it belongs
+            replace: Overwrite an existing final; otherwise raise
+                FileExistsError
+        """
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        device = self._device(os.path.dirname(final))
+        with self._lock:
+            lock = self._move_locks.setdefault(device, threading.Lock())
+
+        with lock:
+            try:
+                self._place(staged, final, replace)
+                return
+            except FileExistsError:
+                raise
+            except OSError:
+                pass  # Another file system
+
+            part = final + PART_SUFFIX
+            try:
+                shutil.copyfile(staged, part)
+                self._place(part, final, replace)
+            except BaseException:
+                try:
+                    os.remove(part)
+                except OSError:
+                    pass
+                raise
+            os.remove(staged)
@@ -0,0 +1,232 @@
+# planner.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+import threading
+
+from .paths import user_data_dir
+from .scheduler import ConversionJob, split_threads
+
+THROUGHPUT_FILE_NAME = "throughput.json"
+LARGE_FILE_SIZE = 4 * 1024 ** 3   # bytes
+SMALL_FILE_SIZE = 512 * 1024 ** 2  # bytes
+THROUGHPUT_SMOOTHING = 0.3        # weight of the newest measurement
+MIN_MEASURED_SECONDS = 1.0        # ignore jobs too short to time reliably
+RATIO_KEY_PREFIX = "ratio:"       # output/input ratios share the file with rates
+
+
+def file_size(path):
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def threads_for_size(size, share, total):
+    """
+    Pick the compression threads for a single file.
+
+    Big files ask for twice the fair share, tiny files (DLC, small
+    updates) get half of it, so the cores go where the long-running
+    work is. What a big file gets beyond its share is only granted when
+    it starts, from threads the running jobs leave unused; see
+    grant_threads().
+
+    Args:
+        size: Input file size in bytes
+        share: Fair share of threads for each concurrent job
+        total: Total threads available to the batch
+    """
+    if size >= LARGE_FILE_SIZE:
+        return min(total, share * 2)
+    if size <= SMALL_FILE_SIZE:
+        return max(1, share // 2)
+    return share
+
+
+def grant_threads(requested, share, total, in_use):
+    """
+    Threads a job may use when it starts.
+
+    Args:
+        requested: Threads planned by threads_for_size()
+        share: Fair share of threads for each concurrent job
+        total: Total threads available to the batch
+        in_use: Threads of the jobs running now, and the fair share of
+            each job about to start
+
+    Returns:
+        requested, cut down to the fair share or what is left unused,
+        whichever is more
+    """
+    if requested <= share:
+        return requested
+    return max(share, min(requested, total - in_use))
+
+
+def plan_batch(files, workers, thread_budget, start_index=1):
+    """
+    Stat every input and build the job list for a batch.
+
+    Jobs are ordered largest first so a big XCI never ends up running
+    alone at the end of the batch. A streaming scan plans every batch
+    of files it finds on its own, so the order is largest first within
+    each batch, not across the whole library.
+
+    Args:
+        files: Input file paths
+        workers: Number of jobs running at the same time
+        thread_budget: Total threads requested (0 = all CPU cores)
+        start_index: Index of the first job, when planning a batch in parts
+
+    Returns:
+        List of ConversionJob objects, in start order
+    """
+    sized = sorted(
+        ((file_size(path), path) for path in files),
+        key=lambda item: item[0],
+        reverse=True
+    )
+
+    total = thread_budget or os.cpu_count() or 1
+    share = split_threads(thread_budget, workers)
+
+    jobs = []
+    for idx, (size, path) in enumerate(sized, start_index):
+        if workers <= 1:
+            # A single job gets the whole budget, as before
+            threads = thread_budget
+        else:
+            threads = threads_for_size(size, share, total)
+
+        job = ConversionJob(idx, path, threads)
+        job.size = size
+        jobs.append(job)
+
+    return jobs
+
+
+def estimate_batch_seconds(jobs, workers, rate):
+    """
+    Predict the wall time of a batch.
+
+    Args:
+        jobs: Planned ConversionJob objects
+        workers: Number of jobs running at the same time
+        rate: Measured throughput of a single job in bytes per second
+
+    Returns:
+        Estimated seconds, or None if there is no measurement yet
+    """
+    if not rate:
+        return None
+
+    # Greedy simulation of the worker pool, largest jobs first
+    finish_times = [0.0] * max(1, min(workers, len(jobs)))
+    for job in jobs:
+        idx = finish_times.index(min(finish_times))
+        finish_times[idx] += job.size / rate
+
+    return max(finish_times)
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+
+    if hours:
+        return f"{hours} h {minutes} min"
+    if minutes:
+        return f"{minutes} min"
+    return f"{seconds} s"
+
+
+class ThroughputHistory:
+    """
+    Per-job throughput and output ratio measured on earlier runs, stored
+    as JSON.
+
+    Measurements are keyed by a settings string (mode, level, ...) and
+    smoothed with an exponential moving average.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(user_data_dir(), THROUGHPUT_FILE_NAME)
+        self._lock = threading.Lock()
+        self._rates = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._rates, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def rate(self, key):
+        """Bytes per second for a single job, or None if never measured."""
+        with self._lock:
+            return self._rates.get(key)
+
+    def record(self, key, size, seconds):
+        """Fold a finished job into the stored throughput."""
+        if size <= 0 or seconds < MIN_MEASURED_SECONDS:
+            return
+
+        measured = size / seconds
+        with self._lock:
+            previous = self._rates.get(key)
+            if previous:
+                measured = (
+                    THROUGHPUT_SMOOTHING * measured
+                    + (1 - THROUGHPUT_SMOOTHING) * previous
+                )
+            self._rates[key] = measured
+            self._save()
+
+    def ratio(self, key):
+        """Output size to input size for a single job, or None if never measured."""
+        with self._lock:
+            return self._rates.get(RATIO_KEY_PREFIX + key)
+
+    def record_ratio(self, key, input_size, output_size):
+        """Fold the sizes of a finished job into the stored ratio."""
+        if input_size <= 0 or output_size <= 0:
+            return
+
+        measured = output_size / input_size
+        with self._lock:
+            previous = self._rates.get(RATIO_KEY_PREFIX + key)
+            if previous:
+                measured = (
+                    THROUGHPUT_SMOOTHING * measured
+                    + (1 - THROUGHPUT_SMOOTHING) * previous
+                )
+            self._rates[RATIO_KEY_PREFIX + key] = measured
+            self._save()
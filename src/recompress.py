@@ -0,0 +1,119 @@
+# recompress.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Room for the decompressed titles of a recompression.
+
+nsz seeks around in the files it compresses, so a decompressed title
+cannot be piped into the compressor; it is written to an intermediate
+folder between the two passes. That folder is in RAM (/dev/shm) while
+the titles in flight fit a memory budget, so the full-size NSP never
+touches a disk, and only falls back to a folder on disk otherwise.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+
+from .placement import free_space
+
+MEMORY_DIR = "/dev/shm"
+MEMORY_BUDGET_FRACTION = 0.5  # of the memory available when a batch starts
+WORK_DIR_PREFIX = ".recompress-"
+
+
+def memory_available():
+    """Bytes of memory available without swapping, or None."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class IntermediateSpace:
+    """
+    Hands out folders for decompressed titles, in RAM while they fit.
+
+    Memory is reserved for each title until its folder is released, so
+    parallel jobs together stay within the budget.
+    """
+
+    def __init__(self, memory_dir=MEMORY_DIR, budget=None):
+        """
+        Args:
+            memory_dir: RAM-backed folder, or None to always use disk
+            budget: Bytes of memory titles may take at once, None for
+                MEMORY_BUDGET_FRACTION of the memory available now
+        """
+        if memory_dir and not os.path.isdir(memory_dir):
+            memory_dir = None
+        if budget is None:
+            available = memory_available() or 0
+            budget = int(available * MEMORY_BUDGET_FRACTION)
+        self.memory_dir = memory_dir
+        self.budget = budget
+        self.reserved = 0
+        self._held = {}  # folder -> bytes reserved in memory
+        self._lock = threading.Lock()
+
+    def acquire(self, size, disk_dir):
+        """
+        Create a folder for a title of size bytes.
+
+        Args:
+            size: Bytes the folder will hold, None if unknown
+            disk_dir: Folder to use when the title does not fit in memory
+
+        Returns:
+            (folder, in_memory)
+        """
+        with self._lock:
+            fits = (
+                self.memory_dir is not None
+                and size is not None
+                and self.reserved + size <= self.budget
+                and size <= (free_space(self.memory_dir) or 0)
+            )
+            if fits:
+                self.reserved += size
+
+        base = self.memory_dir if fits else disk_dir
+        try:
+            os.makedirs(base, exist_ok=True)
+            folder = tempfile.mkdtemp(prefix=WORK_DIR_PREFIX, dir=base)
+        except OSError:
+            if fits:
+                with self._lock:
+                    self.reserved -= size
+            raise
+        if fits:
+            with self._lock:
+                self._held[folder] = size
+        return folder, fits
+
+    def release(self, folder):
+        """Delete a folder and everything in it."""
+        shutil.rmtree(folder, ignore_errors=True)
+        with self._lock:
+            self.reserved -= self._held.pop(folder, 0)
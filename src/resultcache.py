@@ -0,0 +1,269 @@
+# resultcache.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .nszoptions import MODE_DECOMPRESS
+from .paths import user_data_dir
+
+CACHE_FILE_NAME = "conversions.json"
+CACHE_VERSION = 1
+PARTIAL_HASH_SAMPLE = 1024 ** 2  # bytes read at the start, middle and end
+SAVE_INTERVAL = 30.0  # seconds between saves while a batch records results
+
+# Settings an output depends on, besides the mode
+COMPRESSION_SETTINGS = ("level", "solid")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_conversion_cache():
+    """Return the shared ConversionCache, loading it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ConversionCache()
+        return _cache
+
+
+def partial_hash(path, size):
+    """
+    Fast content fingerprint from three samples of a file.
+
+    Reads PARTIAL_HASH_SAMPLE bytes at the start, the middle and the
+    end, so the cost does not grow with the file size.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(size).encode())
+
+    with open(path, "rb") as f:
+        for offset in (0, size // 2, size - PARTIAL_HASH_SAMPLE):
+            f.seek(max(0, offset))
+            digest.update(f.read(PARTIAL_HASH_SAMPLE))
+    return digest.hexdigest()
+
+
+class FileKey:
+    """Identity of an input file: size, mtime and an optional hash."""
+
+    __slots__ = ("size", "mtime_ns", "hash")
+
+    def __init__(self, size, mtime_ns, hash=None):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.hash = hash
+
+
+class ConversionCache:
+    """
+    Results of earlier conversions, stored as JSON.
+
+    Every converted input is recorded by path with its size, mtime and,
+    optionally, a partial content hash, together with the output file,
+    the settings and whether the result was verified. A file whose key
+    still matches and whose output is still there does not have to be
+    converted again. Files identified with a partial hash are also
+    recognised by their content after being moved or renamed.
+
+    Results are saved at most every SAVE_INTERVAL while they come in;
+    flush() saves the rest at the end of a batch.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(user_data_dir(), CACHE_FILE_NAME)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._entries = self._load()
+        self._by_hash = {
+            (entry["size"], entry["hash"]): input_path
+            for input_path, entry in self._entries.items()
+            if entry.get("hash")
+        }
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != CACHE_VERSION:
+            return {}
+        return data.get("entries", {})
+
+    def flush(self):
+        """Save results recorded since the last save."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps({"version": CACHE_VERSION, "entries": self._entries})
+                self._dirty = False
+                self._saved_at = time.monotonic()
+            try:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key_for(self, path, with_hash=False):
+        """
+        Identify a file before converting it.
+
+        Args:
+            path: Absolute path of the input
+            with_hash: Also take a partial content hash
+
+        Returns:
+            FileKey, or None if the file cannot be read
+        """
+        try:
+            st = os.stat(path)
+            key = FileKey(st.st_size, st.st_mtime_ns)
+            if with_hash:
+                key.hash = partial_hash(path, st.st_size)
+        except OSError:
+            return None
+        return key
+
+    def lookup(self, path, key, options):
+        """
+        Find a reusable result for a file.
+
+        Args:
+            path: Absolute path of the input
+            key: Its FileKey
+            options: ConversionOptions of the current batch
+
+        Returns:
+            The cached entry (a dict with at least "output"), or None if
+            the file has to be converted
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if not (entry and self._matches(entry, key)):
+                entry = None
+                if key.hash:
+                    other = self._by_hash.get((key.size, key.hash))
+                    entry = self._entries.get(other) if other else None
+
+        if entry is None or not entry.get("ok"):
+            return None
+        if entry.get("mode") != options.mode:
+            return None
+        if options.mode != MODE_DECOMPRESS:
+            # A recompression at another level is the point of running it
+            settings = entry.get("settings", {})
+            if any(
+                settings.get(name) != getattr(options, name)
+                for name in COMPRESSION_SETTINGS
+            ):
+                return None
+        if options.verify and not entry.get("verified"):
+            return None
+
+        # The output must still be there, untouched
+        try:
+            if os.path.getsize(entry["output"]) != entry["output_size"]:
+                return None
+        except (OSError, KeyError, TypeError):
+            return None
+        return entry
+
+    def previous_output(self, path, key):
+        """
+        Output of an earlier conversion of this very file, at any settings.
+
+        Returns:
+            Path of the output if it is still there untouched, or None
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+        if not (entry and entry.get("ok") and self._matches(entry, key)):
+            return None
+        try:
+            if os.path.getsize(entry["output"]) != entry["output_size"]:
+                return None
+        except (OSError, KeyError, TypeError):
+            return None
+        return entry["output"]
+
+    def _matches(self, entry, key):
+        if entry.get("size") != key.size or entry.get("mtime_ns") != key.mtime_ns:
+            return False
+        if key.hash and entry.get("hash"):
+            return key.hash == entry["hash"]
+        return True
+
+    def record(self, path, key, options, output, ok):
+        """
+        Remember the result of converting a file.
+
+        Args:
+            path: Absolute path of the input
+            key: FileKey taken before the conversion
+            options: ConversionOptions used
+            output: Path of the output file, or None
+            ok: True if nsz succeeded
+        """
+        if key is None:
+            return
+
+        output_size = None
+        if output:
+            try:
+                output_size = os.path.getsize(output)
+            except OSError:
+                output, ok = None, False
+
+        settings = options.to_dict()
+        settings.pop("threads", None)
+
+        entry = {
+            "size": key.size,
+            "mtime_ns": key.mtime_ns,
+            "hash": key.hash,
+            "mode": options.mode,
+            "settings": settings,
+            "output": output,
+            "output_size": output_size,
+            "verified": bool(ok and (options.verify or options.rm_source)),
+            "ok": bool(ok),
+            "time": time.time(),
+        }
+
+        with self._lock:
+            self._entries[path] = entry
+            if key.hash:
+                self._by_hash[(key.size, key.hash)] = path
+            self._dirty = True
+            due = time.monotonic() - self._saved_at >= SAVE_INTERVAL
+        if due:
+            self.flush()
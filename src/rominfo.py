@@ -0,0 +1,341 @@
+# rominfo.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Metadata of a title from the headers of its file.
+
+Only the PFS0/HFS0 entry tables, one sector of every NCA header and the
+section table of every NCZ are read, through mmap, so inspecting a file
+touches a few pages however large it is. Nothing is decompressed and
+nsz is not loaded.
+
+The content type and title ID of each NCA are in its encrypted header.
+They are read when prod.keys has the header key and pycryptodome (which
+nsz needs anyway) can be imported; otherwise they are guessed from the
+entry and file names. The version is only known from the file name.
+"""
+
+import mmap
+import os
+import re
+import struct
+import threading
+
+from .leveltuner import title_id as name_title_id, title_key, title_type
+from .paths import PROD_KEYS_PATH
+
+# PFS0 (NSP/NSZ) and HFS0 (partitions of an XCI/XCZ)
+PFS0_MAGIC = b"PFS0"
+HFS0_MAGIC = b"HFS0"
+FS_HEADER = struct.Struct("<4sIII")          # magic, files, string table, reserved
+PFS0_ENTRY = struct.Struct("<QQII")          # offset, size, name offset, reserved
+HFS0_ENTRY = struct.Struct("<QQII8x32s")     # offset, size, name offset, hashed size, hash
+
+# XCI header
+XCI_MAGIC = b"HEAD"
+XCI_MAGIC_OFFSET = 0x100
+XCI_ROOT_OFFSET = 0x130                      # u64 offset of the root HFS0
+XCI_TITLE_PARTITION = "secure"
+
+# NCA header: encrypted with AES-XTS in sectors of NCA_SECTOR_SIZE
+NCA_SECTOR_SIZE = 0x200
+NCA_FIELDS_SECTOR = 1                        # The sector with the fields below
+NCA_MAGICS = (b"NCA3", b"NCA2")
+NCA_FIELDS = struct.Struct("<4sBBBBQQ")      # magic, distribution, content type,
+                                             # key generation, key area, size, title ID
+CONTENT_TYPES = ("program", "meta", "control", "manual", "data", "publicdata")
+
+# NCZ: the NCA header is kept uncompressed, followed by the sections
+NCZ_HEADER_SIZE = 0x4000
+NCZ_SECTION_MAGIC = b"NCZSECTN"
+NCZ_SECTION = struct.Struct("<QQQQ16s16s")   # offset, size, crypto, padding, key, counter
+NCZ_BLOCK_MAGIC = b"NCZBLOCK"
+
+COMPRESSION_SOLID = "solid"
+COMPRESSION_BLOCK = "block"
+
+_VERSION = re.compile(r"\[v(\d+)\]", re.IGNORECASE)
+_RIGHTS_ID = re.compile(r"^([0-9a-f]{16})[0-9a-f]{16}\.tik$", re.IGNORECASE)
+
+_header_key = None
+_header_key_lock = threading.Lock()
+
+
+def _load_header_key(path):
+    try:
+        with open(os.path.expanduser(path)) as f:
+            for line in f:
+                name, _, value = line.partition("=")
+                if name.strip().lower() == "header_key":
+                    key = bytes.fromhex(value.strip())
+                    return key if len(key) == 32 else None
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def get_header_key():
+    """The NCA header key from prod.keys, or None until it is there."""
+    global _header_key
+    with _header_key_lock:
+        if _header_key is None:
+            _header_key = _load_header_key(PROD_KEYS_PATH)
+        return _header_key
+
+
+def _decrypt_nca_header(key, data, sector=0):
+    """
+    Decrypt whole sectors of an NCA header, or return None.
+
+    Nintendo's AES-XTS numbers sectors big-endian in the tweak, which
+    the usual XTS implementations do not, so it is built on AES-ECB.
+    """
+    try:
+        from Crypto.Cipher import AES
+    except ImportError:
+        return None
+
+    data_cipher = AES.new(key[:16], AES.MODE_ECB)
+    tweak_cipher = AES.new(key[16:], AES.MODE_ECB)
+    out = bytearray()
+    for start in range(0, len(data), NCA_SECTOR_SIZE):
+        tweak = int.from_bytes(
+            tweak_cipher.encrypt(sector.to_bytes(16, "big")), "little"
+        )
+        for block in range(start, start + NCA_SECTOR_SIZE, 16):
+            masked = int.from_bytes(data[block:block + 16], "little") ^ tweak
+            plain = data_cipher.decrypt(masked.to_bytes(16, "little"))
+            out += (int.from_bytes(plain, "little") ^ tweak).to_bytes(16, "little")
+            tweak <<= 1
+            if tweak >> 128:
+                tweak ^= (1 << 128) | 0x87
+        sector += 1
+    return bytes(out)
+
+
+def _entries(view, start, magic, entry):
+    """Yield (name, absolute offset, size) of a PFS0 or HFS0 at start."""
+    found, count, strings, _ = FS_HEADER.unpack_from(view, start)
+    if found != magic:
+        raise ValueError(f"no {magic.decode()} header at {start:#x}")
+    table = start + FS_HEADER.size
+    names = table + count * entry.size
+    data = names + strings
+    for i in range(count):
+        offset, size, name_offset = entry.unpack_from(view, table + i * entry.size)[:3]
+        end = view.find(b"\0", names + name_offset, data)
+        name = view[names + name_offset:end if end >= 0 else data]
+        yield name.decode("utf-8", "replace"), data + offset, size
+
+
+class NcaInfo:
+    """One NCA or NCZ of a title."""
+
+    __slots__ = ("name", "size", "uncompressed_size", "content_type",
+                 "title_id", "compression")
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+        self.uncompressed_size = size
+        self.content_type = None  # One of CONTENT_TYPES, None if unknown
+        self.title_id = None
+        self.compression = None   # COMPRESSION_SOLID/BLOCK for an NCZ
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+def _inspect_nca(view, name, offset, size, key):
+    nca = NcaInfo(name, size)
+    lower = name.lower()
+    if lower.endswith((".cnmt.nca", ".cnmt.ncz")):
+        nca.content_type = "meta"
+
+    start = offset + NCA_FIELDS_SECTOR * NCA_SECTOR_SIZE
+    if key is not None and size >= start - offset + NCA_SECTOR_SIZE:
+        header = _decrypt_nca_header(
+            key, view[start:start + NCA_SECTOR_SIZE], NCA_FIELDS_SECTOR
+        )
+        if header is not None:
+            magic, _, content, _, _, _, tid = NCA_FIELDS.unpack_from(header)
+            if magic in NCA_MAGICS:
+                if content < len(CONTENT_TYPES):
+                    nca.content_type = CONTENT_TYPES[content]
+                nca.title_id = f"{tid:016X}"
+
+    if lower.endswith(".ncz"):
+        table = offset + NCZ_HEADER_SIZE
+        if view[table:table + 8] != NCZ_SECTION_MAGIC:
+            raise ValueError(f"{name} has no NCZ section table")
+        count, = struct.unpack_from("<Q", view, table + 8)
+        table += 16
+        ends = [NCZ_HEADER_SIZE]
+        for i in range(count):
+            section_offset, section_size = NCZ_SECTION.unpack_from(
+                view, table + i * NCZ_SECTION.size
+            )[:2]
+            ends.append(section_offset + section_size)
+        nca.uncompressed_size = max(ends)
+        table += count * NCZ_SECTION.size
+        nca.compression = (
+            COMPRESSION_BLOCK if view[table:table + 8] == NCZ_BLOCK_MAGIC
+            else COMPRESSION_SOLID
+        )
+    return nca
+
+
+class RomInfo:
+    """What the headers of an NSP, NSZ, XCI, XCZ or NCZ tell about it."""
+
+    def __init__(self, path, size):
+        self.path = path
+        self.container = os.path.splitext(path)[1].lower().lstrip(".")
+        self.size = size                 # Bytes on disk
+        self.uncompressed_size = size    # Bytes once every NCZ is decompressed
+        self.title_id = None
+        self.version = None
+        self.contents = []               # NcaInfo of every NCA and NCZ
+        self.files = 0                   # Entries, NCAs and others
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def compressed(self):
+        return any(nca.compression for nca in self.contents)
+
+    @property
+    def compression(self):
+        """COMPRESSION_SOLID or COMPRESSION_BLOCK, None if not compressed."""
+        modes = {nca.compression for nca in self.contents if nca.compression}
+        if not modes:
+            return None
+        return COMPRESSION_BLOCK if COMPRESSION_BLOCK in modes else COMPRESSION_SOLID
+
+    @property
+    def content_types(self):
+        types = []
+        for nca in self.contents:
+            if nca.content_type and nca.content_type not in types:
+                types.append(nca.content_type)
+        return types
+
+    @property
+    def title_type(self):
+        return title_type(self.title_id) if self.title_id else None
+
+    @property
+    def ratio(self):
+        """Size on disk to uncompressed size, None if not compressed."""
+        if not self.compressed or not self.uncompressed_size:
+            return None
+        return self.size / self.uncompressed_size
+
+    def estimated_ratio(self, memory=None):
+        """
+        Ratio the file has or is expected to compress to.
+
+        Args:
+            memory: TuningMemory with earlier probes and samples, for
+                files that are not compressed yet
+
+        Returns:
+            Ratio, or None without a compressed file or an earlier probe
+        """
+        if self.compressed:
+            return self.ratio
+        if memory is None:
+            return None
+        return memory.probe_ratio(title_key(self.path))
+
+    def to_dict(self, memory=None):
+        ratio = self.estimated_ratio(memory)
+        return {
+            "file": self.path,
+            "container": self.container,
+            "title_id": self.title_id,
+            "title_type": self.title_type,
+            "version": self.version,
+            "content_types": self.content_types,
+            "size": self.size,
+            "uncompressed_size": self.uncompressed_size,
+            "compression": self.compression,
+            "ratio": round(ratio, 4) if ratio is not None else None,
+            "contents": [nca.to_dict() for nca in self.contents],
+        }
+
+
+def _title_entries(view, container, name):
+    if container == "ncz":
+        return [(name, 0, len(view))]
+    if container in ("xci", "xcz"):
+        if view[XCI_MAGIC_OFFSET:XCI_MAGIC_OFFSET + 4] != XCI_MAGIC:
+            raise ValueError("no XCI header")
+        root, = struct.unpack_from("<Q", view, XCI_ROOT_OFFSET)
+        for name, offset, _ in _entries(view, root, HFS0_MAGIC, HFS0_ENTRY):
+            if name == XCI_TITLE_PARTITION:
+                return list(_entries(view, offset, HFS0_MAGIC, HFS0_ENTRY))
+        return []
+    return list(_entries(view, 0, PFS0_MAGIC, PFS0_ENTRY))
+
+
+def inspect(path, key=None):
+    """
+    Read the metadata of a file from its headers.
+
+    Args:
+        path: NSP, NSZ, XCI, XCZ or NCZ file
+        key: NCA header key, None for the one in prod.keys
+
+    Returns:
+        RomInfo, or None if the file cannot be read or is not a title
+    """
+    key = key or get_header_key()
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if not size:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                info = RomInfo(path, size)
+                entries = _title_entries(view, info.container, info.name)
+                for name, offset, length in entries:
+                    info.files += 1
+                    if name.lower().endswith((".nca", ".ncz")):
+                        nca = _inspect_nca(view, name, offset, length, key)
+                        info.contents.append(nca)
+                        info.uncompressed_size += nca.uncompressed_size - nca.size
+                    elif info.title_id is None:
+                        match = _RIGHTS_ID.match(name)
+                        if match:
+                            info.title_id = match.group(1).upper()
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+
+    # The meta NCA carries the ID of the title itself
+    ids = [nca.title_id for nca in info.contents if nca.title_id]
+    meta = [nca.title_id for nca in info.contents
+            if nca.title_id and nca.content_type == "meta"]
+    info.title_id = (meta or ids or [info.title_id or name_title_id(path)])[0]
+    match = _VERSION.search(info.name)
+    if match:
+        info.version = int(match.group(1))
+    return info
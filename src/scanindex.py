@@ -0,0 +1,315 @@
+# scanindex.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+import threading
+import time
+
+SCAN_BATCH_SIZE = 256
+SCAN_BATCH_INTERVAL = 0.1  # seconds
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_scan_index(root):
+    """Return the shared ScanIndex for a folder, creating it if needed."""
+    root = os.path.abspath(root)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = ScanIndex(root)
+            _indexes[root] = index
+        return index
+
+
+class _DirNode:
+    __slots__ = ("depth", "files", "subdirs")
+
+    def __init__(self, depth, files, subdirs):
+        self.depth = depth
+        self.files = files      # file name -> size in bytes, or None
+        self.subdirs = subdirs  # directory names
+
+
+class ScanIndex:
+    """
+    In-memory index of a directory tree.
+
+    Every directory is read once with os.scandir. The file type comes
+    from the cached DirEntry data, so listing a directory costs no
+    extra stat calls. Queries for any depth up to the scanned depth are
+    answered from memory; a deeper query only reads the directories that
+    have not been visited yet. refresh_dir() updates a single directory
+    when it changes on disk.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.scanned_depth = -1
+        self._dirs = {}
+        self._lock = threading.RLock()
+
+    def _read_dir(self, path, depth):
+        files = {}
+        subdirs = []
+
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_file():
+                            files[entry.name] = None
+                        elif entry.is_dir():
+                            subdirs.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+
+        node = _DirNode(depth, files, sorted(subdirs))
+        self._dirs[path] = node
+        return node
+
+    def _walk(self, path, depth, max_depth):
+        """Read path and its subdirectories down to max_depth."""
+        pending = [(path, depth)]
+
+        while pending:
+            current, current_depth = pending.pop()
+            node = self._dirs.get(current)
+            if node is None:
+                node = self._read_dir(current, current_depth)
+
+            if current_depth < max_depth:
+                for name in node.subdirs:
+                    pending.append(
+                        (os.path.join(current, name), current_depth + 1)
+                    )
+
+    def iter_files(self, exts, max_depth, cancelled=None):
+        """
+        Yield matching files, reading unvisited directories on the way.
+
+        The lock is only held while a single directory is read, so other
+        callers are not blocked for the whole walk.
+
+        Args:
+            exts: Tuple of lowercase file extensions to match
+            max_depth: Maximum recursion depth (0 = root folder only)
+            cancelled: Optional callable; the walk stops once it returns True
+        """
+        pending = [(self.root, 0)]
+
+        while pending:
+            if cancelled and cancelled():
+                return
+
+            path, depth = pending.pop()
+            with self._lock:
+                node = self._dirs.get(path)
+                if node is None:
+                    node = self._read_dir(path, depth)
+
+                names = sorted(
+                    name for name in node.files
+                    if name.lower().endswith(exts)
+                )
+                subdirs = node.subdirs if depth < max_depth else []
+
+            for name in names:
+                yield os.path.join(path, name)
+
+            for name in reversed(subdirs):
+                pending.append((os.path.join(path, name), depth + 1))
+
+        with self._lock:
+            self.scanned_depth = max(self.scanned_depth, max_depth)
+
+    def files(self, exts, max_depth):
+        """
+        List matching files. Only unvisited directories touch the disk.
+
+        Args:
+            exts: Tuple of lowercase file extensions to match
+            max_depth: Maximum recursion depth (0 = root folder only)
+
+        Returns:
+            List of absolute file paths
+        """
+        return list(self.iter_files(exts, max_depth))
+
+    def count(self, exts, max_depth):
+        """Count matching files for a depth."""
+        return sum(1 for _ in self.iter_files(exts, max_depth))
+
+    def size(self, path):
+        """File size in bytes, cached until its directory changes."""
+        directory, name = os.path.split(path)
+
+        with self._lock:
+            node = self._dirs.get(directory)
+            if node is None or name not in node.files:
+                node = None
+            elif node.files[name] is not None:
+                return node.files[name]
+
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            return 0
+
+        if node is not None:
+            with self._lock:
+                if name in node.files:
+                    node.files[name] = size
+        return size
+
+    def directories(self):
+        """All directories currently in the index."""
+        with self._lock:
+            return list(self._dirs)
+
+    def refresh_dir(self, path):
+        """
+        Re-read a single directory after it changed on disk.
+
+        New subdirectories are indexed down to the scanned depth and
+        removed ones are dropped together with everything below them.
+
+        Returns:
+            bool: True if the directory is part of the index
+        """
+        with self._lock:
+            old = self._dirs.get(path)
+            if old is None:
+                return False
+
+            node = self._read_dir(path, old.depth)
+
+            for name in set(old.subdirs) - set(node.subdirs):
+                self._drop_tree(os.path.join(path, name))
+
+            if node.depth < self.scanned_depth:
+                for name in set(node.subdirs) - set(old.subdirs):
+                    self._walk(
+                        os.path.join(path, name),
+                        node.depth + 1,
+                        self.scanned_depth
+                    )
+            return True
+
+    def _drop_tree(self, path):
+        prefix = path + os.sep
+        for key in [k for k in self._dirs if k == path or k.startswith(prefix)]:
+            del self._dirs[key]
+
+
+class FileScan:
+    """
+    Background scan of a folder that streams matching files.
+
+    Files are collected in a scan thread and published in batches,
+    either every SCAN_BATCH_SIZE files or every SCAN_BATCH_INTERVAL
+    seconds. on_batch and on_done are called from the scan thread.
+    Consumers can also follow the scan with iter_batches().
+    """
+
+    def __init__(self, index, exts, max_depth, on_batch=None, on_done=None):
+        self.index = index
+        self.exts = exts
+        self.max_depth = max_depth
+        self.on_batch = on_batch
+        self.on_done = on_done
+        self.found = []
+        self.done = False
+        self.cancelled = False
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.done or self.cancelled
+
+    @property
+    def root(self):
+        return self.index.root
+
+    def start(self):
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+
+    def cancel(self):
+        with self._cond:
+            self.cancelled = True
+            self._cond.notify_all()
+
+    def _publish(self, batch):
+        with self._cond:
+            if self.cancelled:
+                return
+            self.found.extend(batch)
+            self._cond.notify_all()
+
+        if self.on_batch:
+            self.on_batch(self)
+
+    def _run(self):
+        batch = []
+        last_publish = time.monotonic()
+
+        for path in self.index.iter_files(
+            self.exts, self.max_depth, lambda: self.cancelled
+        ):
+            batch.append(path)
+
+            now = time.monotonic()
+            if (len(batch) >= SCAN_BATCH_SIZE
+                    or now - last_publish >= SCAN_BATCH_INTERVAL):
+                self._publish(batch)
+                batch = []
+                last_publish = now
+
+        if batch:
+            self._publish(batch)
+
+        with self._cond:
+            if self.cancelled:
+                return
+            self.done = True
+            self._cond.notify_all()
+
+        if self.on_done:
+            self.on_done(self)
+
+    def iter_batches(self):
+        """Yield lists of newly found files until the scan ends."""
+        sent = 0
+
+        while True:
+            with self._cond:
+                while len(self.found) == sent and not self.finished:
+                    self._cond.wait()
+                batch = self.found[sent:]
+                finished = self.finished
+
+            sent += len(batch)
+            if batch:
+                yield batch
+            if finished:
+                return
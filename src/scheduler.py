@@ -0,0 +1,272 @@
+# scheduler.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+import threading
+from collections import deque
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_STOPPED = "stopped"
+JOB_SKIPPED = "skipped"  # Not worth converting, found out while running
+
+
+def split_threads(threads, jobs):
+    """
+    Split a CPU thread budget between concurrently running jobs.
+
+    Args:
+        threads: Total threads requested (0 = all CPU cores)
+        jobs: Number of jobs running at the same time
+
+    Returns:
+        int: Threads for each job (0 = let nsz decide)
+    """
+    if jobs <= 1:
+        return threads
+
+    total = threads or os.cpu_count() or 1
+    return max(1, total // jobs)
+
+
+class ConversionJob:
+    """State of a single file within a batch."""
+
+    def __init__(self, index, path, threads=0):
+        self.index = index
+        self.path = path
+        self.threads = threads
+        self.size = 0
+        self.elapsed = 0.0
+        self.process = None
+        self.status = JOB_QUEUED
+        self.fraction = 0.0
+        self.devices = ()  # Keys of the disks the job reads and writes
+        self.paused_since = None
+        self.paused_seconds = 0.0
+        self.estimated_ratio = None  # Output / input size expected by a probe
+        self.output_size = None
+        self.telemetry = None  # JobTelemetry, once queued in a batch
+        self.verifying = False  # Reading the output back
+        self.verified = None  # False once nsz reports a hash mismatch
+        self.verify_saved = None  # Estimated seconds a read-back would take
+        self.work_dir = None  # Intermediate folder of a recompression
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def finished(self):
+        return self.status in (JOB_DONE, JOB_FAILED, JOB_STOPPED, JOB_SKIPPED)
+
+    @property
+    def paused(self):
+        return self.paused_since is not None
+
+    def set_paused(self, paused, now):
+        """Track time spent paused, so it is not counted as work."""
+        if paused and self.paused_since is None:
+            self.paused_since = now
+        elif not paused and self.paused_since is not None:
+            self.paused_seconds += now - self.paused_since
+            self.paused_since = None
+
+
+class JobScheduler:
+    """
+    Bounded pool that runs conversion jobs concurrently.
+
+    start_job(job, done) must start a job without blocking and call
+    done() once it has finished, from any thread. The scheduler keeps
+    up to max_workers jobs running and starts the next queued job as
+    soon as one finishes, so no thread is tied up per running job.
+    Jobs can be submitted while the pool is already running.
+    While held, running jobs continue but no queued job is started.
+
+    With a device_limit, at most that many running jobs may use the
+    same disk. The first queued job whose disks have room starts next,
+    so jobs on other disks overtake ones waiting for a busy disk.
+
+    With an admission (a SpaceAdmission), a job only starts once
+    admission.admit(job) has reserved its disk space (prepared with
+    admission.prepare(job) before it is submitted), and gives it back
+    when it finishes. Jobs that do not fit wait and are overtaken like
+    jobs waiting for a disk. If none is running, nothing will make room
+    for them: on_rejected(job) is called instead of starting the job.
+    """
+
+    def __init__(self, max_workers, start_job, device_limit=0, admission=None,
+                 on_rejected=None):
+        self.max_workers = max(1, max_workers)
+        self.start_job = start_job
+        self.device_limit = device_limit
+        self.admission = admission
+        self.on_rejected = on_rejected
+        self._device_jobs = {}
+        self.stopped = False
+        self.held = False
+        self.running = 0
+        self._queue = deque()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._local = threading.local()
+
+    def submit(self, job):
+        with self._lock:
+            self._queue.append(job)
+        self._fill()
+
+    def close(self):
+        """Signal that no more jobs will be submitted."""
+        with self._lock:
+            self._closed = True
+        self._check_idle()
+
+    def join(self):
+        """Block until the queue is empty and no job is running."""
+        self._idle.wait()
+
+    def run(self, jobs):
+        """
+        Run all jobs and block until every job has finished.
+
+        Args:
+            jobs: Iterable of ConversionJob objects, in start order
+        """
+        for job in jobs:
+            self.submit(job)
+        self.close()
+        self.join()
+
+    def stop(self):
+        """Stop handing out queued jobs. Running jobs are not touched."""
+        with self._lock:
+            self.stopped = True
+            self._queue.clear()
+            self._closed = True
+        self._check_idle()
+
+    def set_max_workers(self, max_workers):
+        """Change how many jobs run at once; running jobs are not touched."""
+        with self._lock:
+            self.max_workers = max(1, max_workers)
+        self._fill()
+
+    def hold(self):
+        """Start no more queued jobs until release()."""
+        with self._lock:
+            self.held = True
+
+    def release(self):
+        """Start queued jobs again after hold()."""
+        with self._lock:
+            self.held = False
+        self._fill()
+
+    def _fill(self):
+        # A job that finishes synchronously inside start_job must not
+        # recurse; the loop below already picks up the free slot
+        if getattr(self._local, "filling", False):
+            return
+
+        self._local.filling = True
+        try:
+            if self.admission is not None:
+                with self._lock:
+                    can_start = self._can_start()
+                # Disk space is read outside the lock
+                if can_start:
+                    self.admission.refresh()
+            while True:
+                with self._lock:
+                    if not self._can_start():
+                        return
+                    job, admitted = self._take_next()
+                    if job is None:
+                        return
+                    if admitted:
+                        self.running += 1
+                        for device in job.devices:
+                            self._device_jobs[device] = (
+                                self._device_jobs.get(device, 0) + 1
+                            )
+
+                if not admitted:
+                    if self.on_rejected:
+                        self.on_rejected(job)
+                    self.admission.release(job)
+                    self._check_idle()
+                    continue
+
+                try:
+                    self.start_job(job, lambda job=job: self._job_done(job))
+                except Exception:
+                    job.status = JOB_FAILED
+                    self._job_done(job)
+        finally:
+            self._local.filling = False
+
+    def _can_start(self):
+        return not (self.stopped or self.held or not self._queue
+                    or self.running >= self.max_workers)
+
+    def _take_next(self):
+        """(job, True) to start, (job, False) to reject, (None, False) to wait."""
+        if not self.device_limit and self.admission is None:
+            return self._queue.popleft(), True
+
+        waiting = None  # First job that does not fit on its disks
+        for i, job in enumerate(self._queue):
+            if self.device_limit and not all(
+                self._device_jobs.get(device, 0) < self.device_limit
+                for device in job.devices
+            ):
+                continue
+            if self.admission is None or self.admission.admit(job):
+                del self._queue[i]
+                return job, True
+            if waiting is None:
+                waiting = i
+
+        if waiting is not None and self.running == 0:
+            job = self._queue[waiting]
+            del self._queue[waiting]
+            return job, False
+        return None, False
+
+    def _job_done(self, job):
+        if self.admission is not None:
+            self.admission.release(job)
+        with self._lock:
+            self.running -= 1
+            for device in job.devices:
+                self._device_jobs[device] -= 1
+        self._fill()
+        self._check_idle()
+
+    def _check_idle(self):
+        with self._lock:
+            idle = self._closed and not self._queue and self.running == 0
+        if idle:
+            self._idle.set()
@@ -0,0 +1,378 @@
+# supervisor.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import fcntl
+import logging
+import os
+import pty
+import selectors
+import signal
+import subprocess
+import threading
+import time
+
+READ_BUFFER_SIZE = 65536
+PROCESS_TERMINATE_TIMEOUT = 1  # seconds
+EXIT_POLL_INTERVAL = 0.1  # seconds between exit checks without pidfd
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+# A failing callback must not stop the supervisor thread, but it must
+# not disappear either: its job would hang without a trace
+logger = logging.getLogger(__name__)
+
+
+def get_supervisor():
+    """Return the shared ProcessSupervisor, starting it on first use."""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = ProcessSupervisor()
+        return _supervisor
+
+
+def process_cpu_seconds(pid):
+    """
+    CPU time of a process and the children it has waited for, or None.
+
+    Still readable while the process is a zombie, so the final value of
+    an exited child can be read before it is reaped.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            data = f.read()
+        # Fields after the command name, which may contain spaces
+        fields = data[data.rindex(")") + 2:].split()
+        ticks = sum(int(field) for field in fields[11:15])
+        return ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError):
+        return None
+
+
+def _has_exited(pid):
+    """True if a child has exited, without reaping it."""
+    try:
+        flags = os.WEXITED | os.WNOHANG | os.WNOWAIT
+        return os.waitid(os.P_PID, pid, flags) is not None
+    except ChildProcessError:
+        return True  # Reaped already
+
+
+def _set_nonblocking(fd):
+    flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+    fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+
+
+class ChildProcess:
+    """A supervised child process and the master side of its PTY."""
+
+    def __init__(self, popen, master, on_output, on_exit):
+        self.popen = popen
+        self.pid = popen.pid
+        self.master = master
+        self.pidfd = None
+        self.on_output = on_output
+        self.on_exit = on_exit
+        self.returncode = None
+        self.cpu_seconds = None  # Final CPU time, once exited
+        self.paused = False     # Suspended by pause()
+        self.throttled = False  # Suspended by throttle()
+        self.output_closed = False
+        self.kill_deadline = None
+        self.exit_poll_at = None  # Next exit check, without pidfd
+
+
+class ProcessSupervisor:
+    """
+    Event-driven supervisor for any number of child processes.
+
+    A single thread waits in epoll on the PTY of every child and on its
+    pidfd (Linux 5.3+), so it only wakes up when output arrives or a
+    child exits. Without pidfd support, the PTY hangup starts polling
+    for the exit every EXIT_POLL_INTERVAL. Once a child has exited its
+    PTY is drained completely before on_exit is called. Only the
+    supervisor thread reaps children.
+
+    on_output(chunk) and on_exit(returncode) run on the supervisor
+    thread and should return quickly.
+
+    Children started with start_new_session=True lead their own process
+    group and can be paused and resumed as a whole, helpers included.
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._pending = []
+        self._children = set()
+        # Held while a child is reaped or signalled, so a signal never
+        # reaches a reaped child's pid, which may have been reused
+        self._reap_lock = threading.Lock()
+
+        # Wakes the selector when another thread hands us work
+        self._wake_r, self._wake_w = os.pipe()
+        _set_nonblocking(self._wake_r)
+        _set_nonblocking(self._wake_w)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # ---------- Public API (any thread) ---------- #
+
+    def spawn(self, cmd, on_output, on_exit, **popen_kwargs):
+        """
+        Start a command on a new PTY and supervise it.
+
+        Args:
+            cmd: Command line to run
+            on_output: Called with each chunk of raw output
+            on_exit: Called with the return code after the output is drained
+            popen_kwargs: Extra arguments for subprocess.Popen
+
+        Returns:
+            ChildProcess
+        """
+        master, slave = pty.openpty()
+        try:
+            popen = subprocess.Popen(
+                cmd,
+                stdout=slave,
+                stderr=slave,
+                close_fds=True,
+                **popen_kwargs
+            )
+        except Exception:
+            os.close(master)
+            raise
+        finally:
+            os.close(slave)
+
+        _set_nonblocking(master)
+        child = ChildProcess(popen, master, on_output, on_exit)
+        self._call_soon(self._add_child, child)
+        return child
+
+    def terminate(self, child):
+        """Ask a child to exit, killing it after PROCESS_TERMINATE_TIMEOUT."""
+        self._call_soon(self._terminate, child)
+
+    def pause(self, child):
+        """Suspend the process group of a child with SIGSTOP, right away."""
+        child.paused = True
+        self._signal_group(child, signal.SIGSTOP)
+
+    def resume(self, child):
+        """Continue a paused child with SIGCONT."""
+        child.paused = False
+        if not child.throttled:
+            self._signal_group(child, signal.SIGCONT)
+
+    def throttle(self, child, throttled):
+        """
+        Suspend or continue a child to limit its resource use.
+
+        Independent of pause(): a paused child stays paused when its
+        throttle ends, and a throttled one stays suspended on resume().
+        """
+        child.throttled = throttled
+        if throttled:
+            self._signal_group(child, signal.SIGSTOP)
+        elif not child.paused:
+            self._signal_group(child, signal.SIGCONT)
+
+    # ---------- Supervisor thread ---------- #
+
+    def _call_soon(self, func, *args):
+        with self._lock:
+            self._pending.append((func, args))
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass  # Already woken up
+
+    def _run_pending(self):
+        try:
+            while os.read(self._wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for func, args in pending:
+            # One failing call must not drop the others
+            try:
+                func(*args)
+            except Exception:
+                logger.exception("Error in a call on the supervisor thread")
+
+    def _add_child(self, child):
+        self._children.add(child)
+        self._selector.register(
+            child.master, selectors.EVENT_READ, (child, "output")
+        )
+
+        try:
+            child.pidfd = os.pidfd_open(child.pid)
+        except (AttributeError, OSError):
+            return  # Fall back to the PTY hangup
+        self._selector.register(
+            child.pidfd, selectors.EVENT_READ, (child, "exit")
+        )
+
+    def _terminate(self, child):
+        if child not in self._children:
+            return
+
+        try:
+            child.popen.terminate()
+        except OSError:
+            pass
+        # A stopped process only handles SIGTERM once it runs again
+        if child.paused or child.throttled:
+            child.paused = child.throttled = False
+            self._signal_group(child, signal.SIGCONT)
+        child.kill_deadline = time.monotonic() + PROCESS_TERMINATE_TIMEOUT
+
+    def _signal_group(self, child, signum):
+        # Any thread: only while the child is not reaped, so its pid
+        # cannot be reused
+        with self._reap_lock:
+            if child.returncode is not None:
+                return
+            try:
+                if os.getpgid(child.pid) == child.pid:
+                    os.killpg(child.pid, signum)
+                else:
+                    os.kill(child.pid, signum)
+            except OSError:
+                pass
+
+    def _next_timeout(self):
+        deadlines = [
+            deadline for child in self._children
+            for deadline in (child.kill_deadline, child.exit_poll_at)
+            if deadline is not None
+        ]
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - time.monotonic())
+
+    def _kill_overdue(self):
+        now = time.monotonic()
+        for child in list(self._children):
+            if child.kill_deadline is not None and child.kill_deadline <= now:
+                child.kill_deadline = None
+                try:
+                    child.popen.kill()
+                except OSError:
+                    pass
+
+    def _poll_exits(self):
+        now = time.monotonic()
+        for child in list(self._children):
+            if child.exit_poll_at is not None and child.exit_poll_at <= now:
+                if _has_exited(child.pid):
+                    self._reap(child)
+                else:
+                    child.exit_poll_at = now + EXIT_POLL_INTERVAL
+
+    def _run(self):
+        while True:
+            for key, _ in self._selector.select(self._next_timeout()):
+                try:
+                    if key.data is None:
+                        self._run_pending()
+                        continue
+
+                    child, kind = key.data
+                    if kind == "output":
+                        if not child.output_closed:
+                            self._read(child)
+                    elif child in self._children:
+                        self._reap(child)
+                except Exception:
+                    logger.exception("Error handling a child process event")
+
+            self._kill_overdue()
+            try:
+                self._poll_exits()
+            except Exception:
+                logger.exception("Error checking child processes for exit")
+
+    def _read(self, child):
+        """Read everything the PTY has buffered."""
+        while True:
+            try:
+                chunk = os.read(child.master, READ_BUFFER_SIZE)
+            except BlockingIOError:
+                return
+            except OSError:
+                chunk = b""  # EIO: every writer has closed the PTY
+
+            if not chunk:
+                self._close_output(child)
+                if child.pidfd is None and child in self._children:
+                    # The PTY may close before the process exits
+                    if _has_exited(child.pid):
+                        self._reap(child)
+                    else:
+                        child.exit_poll_at = time.monotonic() + EXIT_POLL_INTERVAL
+                return
+
+            try:
+                child.on_output(chunk)
+            except Exception:
+                logger.exception("Error handling output of process %s", child.pid)
+
+    def _close_output(self, child):
+        if child.output_closed:
+            return
+        child.output_closed = True
+        self._selector.unregister(child.master)
+        os.close(child.master)
+
+    def _reap(self, child):
+        if child not in self._children:
+            return
+        self._children.discard(child)
+
+        # The child has exited: waiting does not block
+        child.cpu_seconds = process_cpu_seconds(child.pid)
+        with self._reap_lock:
+            child.returncode = child.popen.wait()
+        child.kill_deadline = None
+        child.exit_poll_at = None
+
+        # Drain whatever the child wrote before exiting
+        if not child.output_closed:
+            self._read(child)
+            self._close_output(child)
+
+        if child.pidfd is not None:
+            self._selector.unregister(child.pidfd)
+            os.close(child.pidfd)
+            child.pidfd = None
+
+        try:
+            child.on_exit(child.returncode)
+        except Exception:
+            logger.exception("Error handling exit of process %s", child.pid)
@@ -0,0 +1,304 @@
+# telemetry.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Per-file measurements of a batch.
+
+Every job records how long it waited in the queue, how long each phase
+took (nsz reports its steps in its progress bars), its input and output
+size, average and peak rate, and the CPU time of the processes that
+converted it. The batch can be exported as JSON or CSV.
+"""
+
+import csv
+import json
+import os
+import threading
+import time
+
+from .nszoptions import MODE_DECOMPRESS
+
+# Phases; nsz steps are mapped onto these
+PHASE_SETUP = "setup"    # Before nsz reports progress: start, reading headers
+PHASE_SAMPLE = "sample"  # Probing the title and tuning its level
+PHASE_COMPRESS = "compress"
+PHASE_DECOMPRESS = "decompress"
+PHASE_VERIFY = "verify"
+PHASE_MOVE = "move"      # From the scratch folder to the final place
+
+_STEP_PHASES = {
+    "compress": PHASE_COMPRESS,
+    "compressing": PHASE_COMPRESS,
+    "decompress": PHASE_DECOMPRESS,
+    "decompressing": PHASE_DECOMPRESS,
+    "verify": PHASE_VERIFY,
+    "verifying": PHASE_VERIFY,
+}
+
+PEAK_RATE_WINDOW = 1.0  # seconds the peak rate is averaged over
+
+CSV_FIELDS = (
+    "index", "file", "status", "level", "input_bytes", "output_bytes",
+    "ratio", "queue_seconds", "wall_seconds", "paused_seconds",
+    "average_mib_s", "peak_mib_s", "cpu_seconds", "verify_saved_seconds",
+)
+
+
+def step_phase(step):
+    """Phase of an nsz progress step like "Compressing", or None."""
+    if not step:
+        return None
+    key = step.strip().lower()
+    return _STEP_PHASES.get(key, key)
+
+
+def _mib(rate):
+    return round(rate / 1024 ** 2, 2) if rate else None
+
+
+def _round(value, digits=3):
+    return round(value, digits) if value is not None else None
+
+
+class JobTelemetry:
+    """Measurements of one file."""
+
+    def __init__(self, index, path, input_bytes, main_phase, queued_at):
+        self.index = index
+        self.path = path
+        self.input_bytes = input_bytes
+        self.output_bytes = None
+        self.status = None
+        self.level = None
+        self.main_phase = main_phase
+        self.queued_at = queued_at
+        self.started_at = None
+        self.finished_at = None
+        self.paused_seconds = 0.0
+        self.cpu_seconds = None
+        self.verify_saved_seconds = None  # Read-back avoided by hashing inline
+        self.peak_rate = 0.0
+        self.phases = {}  # phase -> seconds, in the order they began
+        self.phase = None
+        self._phase_since = None
+        self._resume_phase = None
+        self._window = None  # (time, bytes done) the peak rate is measured from
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    def enter(self, phase, now):
+        """Switch to another phase; None stops the clock."""
+        if phase == self.phase:
+            return
+        if self.phase is not None:
+            self.phases[self.phase] = (
+                self.phases.get(self.phase, 0.0) + now - self._phase_since
+            )
+        self.phase = phase
+        self._phase_since = now
+        self._window = None
+
+    def start(self, now):
+        self.started_at = now
+        self.enter(PHASE_SETUP, now)
+
+    def pause(self, now):
+        if self.phase is not None:
+            self._resume_phase = self.phase
+            self.enter(None, now)
+
+    def resume(self, now):
+        if self._resume_phase is not None:
+            self.enter(self._resume_phase, now)
+            self._resume_phase = None
+
+    def progress(self, progress, now):
+        """Track the phase and rate from a JobProgress."""
+        phase = step_phase(progress.step)
+        if phase is None:
+            phase = self.main_phase if self.phase in (PHASE_SETUP, None) else self.phase
+        self.enter(phase, now)
+
+        # Progress bars without sizes only count percent
+        if progress.total <= 100:
+            self.peak_rate = max(self.peak_rate, progress.rate)
+            return
+        if self._window is None or progress.done < self._window[1]:
+            self._window = (now, progress.done)
+            return
+        since, done = self._window
+        if now - since >= PEAK_RATE_WINDOW:
+            self.peak_rate = max(self.peak_rate, (progress.done - done) / (now - since))
+            self._window = (now, progress.done)
+
+    def add_cpu(self, seconds):
+        """Count the CPU time of one of the processes that converted the file."""
+        if seconds is not None:
+            self.cpu_seconds = (self.cpu_seconds or 0.0) + seconds
+
+    def finish(self, status, now, output_bytes=None, cpu_seconds=None,
+               paused_seconds=0.0):
+        self.enter(None, now)
+        self._resume_phase = None
+        self.status = status
+        self.finished_at = now
+        self.output_bytes = output_bytes
+        self.add_cpu(cpu_seconds)
+        self.paused_seconds = paused_seconds
+
+    @property
+    def queue_seconds(self):
+        if self.started_at is None:
+            return None
+        return self.started_at - self.queued_at
+
+    @property
+    def wall_seconds(self):
+        """Time from start to finish, without time spent paused."""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return max(0.0, self.finished_at - self.started_at - self.paused_seconds)
+
+    @property
+    def ratio(self):
+        if not self.output_bytes or not self.input_bytes:
+            return None
+        return self.output_bytes / self.input_bytes
+
+    @property
+    def average_rate(self):
+        wall = self.wall_seconds
+        if not wall or not self.output_bytes:
+            return None
+        return self.input_bytes / wall
+
+    def to_dict(self):
+        return {
+            "index": self.index,
+            "file": self.path,
+            "status": self.status,
+            "level": self.level,
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "ratio": _round(self.ratio, 4),
+            "queue_seconds": _round(self.queue_seconds),
+            "wall_seconds": _round(self.wall_seconds),
+            "paused_seconds": _round(self.paused_seconds),
+            "phases": {phase: _round(seconds) for phase, seconds in self.phases.items()},
+            "average_mib_s": _mib(self.average_rate),
+            "peak_mib_s": _mib(self.peak_rate),
+            "cpu_seconds": _round(self.cpu_seconds),
+            "verify_saved_seconds": _round(self.verify_saved_seconds),
+        }
+
+
+class BatchTelemetry:
+    """Measurements of every file of a batch."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._jobs = {}  # job index -> JobTelemetry
+
+    def queued(self, job, now):
+        main_phase = PHASE_DECOMPRESS if self.mode == MODE_DECOMPRESS else PHASE_COMPRESS
+        record = JobTelemetry(job.index, job.path, job.size, main_phase, now)
+        job.telemetry = record
+        with self._lock:
+            self._jobs[job.index] = record
+        return record
+
+    @property
+    def jobs(self):
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda record: record.index)
+
+    def summary(self):
+        """Totals over the files that were converted."""
+        jobs = [record for record in self.jobs if record.finished_at is not None]
+        converted = [record for record in jobs if record.output_bytes]
+        started = [record.started_at for record in jobs if record.started_at is not None]
+        wall = (
+            max(record.finished_at for record in jobs) - min(started)
+            if started else None
+        )
+        input_bytes = sum(record.input_bytes for record in converted)
+        output_bytes = sum(record.output_bytes for record in converted)
+        cpu = [record.cpu_seconds for record in jobs if record.cpu_seconds is not None]
+        saved = [
+            record.verify_saved_seconds for record in jobs
+            if record.verify_saved_seconds is not None
+        ]
+
+        phases = {}
+        for record in jobs:
+            for phase, seconds in record.phases.items():
+                phases[phase] = phases.get(phase, 0.0) + seconds
+
+        return {
+            "files": len(jobs),
+            "converted": len(converted),
+            "input_bytes": input_bytes,
+            "output_bytes": output_bytes,
+            "ratio": _round(output_bytes / input_bytes, 4) if input_bytes else None,
+            "wall_seconds": _round(wall),
+            "average_mib_s": _mib(input_bytes / wall) if wall else None,
+            "cpu_seconds": _round(sum(cpu)) if cpu else None,
+            "verify_saved_seconds": _round(sum(saved)) if saved else None,
+            "phases": {phase: _round(seconds) for phase, seconds in phases.items()},
+        }
+
+    def to_dict(self):
+        return {
+            "mode": self.mode,
+            "started": self.started,
+            "summary": self.summary(),
+            "files": [record.to_dict() for record in self.jobs],
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+    def write_csv(self, path):
+        """One row per file; phase durations follow the fixed columns."""
+        rows = [record.to_dict() for record in self.jobs]
+        phases = []
+        for row in rows:
+            phases.extend(phase for phase in row["phases"] if phase not in phases)
+
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDS + tuple(f"{phase}_seconds" for phase in phases))
+            for row in rows:
+                writer.writerow(
+                    [row[field] for field in CSV_FIELDS]
+                    + [row["phases"].get(phase) for phase in phases]
+                )
+
+    def write(self, path):
+        """Export as CSV if path ends in .csv, otherwise as JSON."""
+        if path.lower().endswith(".csv"):
+            self.write_csv(path)
+        else:
+            self.write_json(path)
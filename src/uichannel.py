@@ -0,0 +1,84 @@
+# uichannel.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import logging
+import threading
+
+
+class UpdateChannel:
+    """
+    Coalescing worker-to-UI channel.
+
+    Worker threads post from any thread; the UI drains the channel on
+    a fixed frame tick. Only the latest progress value per key is kept,
+    log lines are batched, and other calls are kept in order.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = []
+        self._progress = {}
+        self._logs = []
+
+        # Counters for the debug overlay
+        self.frames = 0
+        self.progress_posted = 0
+        self.progress_merged = 0
+        self.logs_posted = 0
+
+    def post_call(self, func, *args):
+        """Run func(*args) on the UI thread with the next frame."""
+        with self._lock:
+            self._calls.append((func, args))
+
+    def post_progress(self, key, value):
+        """Set the progress of key, replacing any value not drawn yet."""
+        with self._lock:
+            self.progress_posted += 1
+            if key in self._progress:
+                self.progress_merged += 1
+            self._progress[key] = value
+
+    def post_log(self, text, level=logging.INFO, section=None):
+        """Queue a log line with its severity and per-file section."""
+        with self._lock:
+            self.logs_posted += 1
+            self._logs.append((text, level, section))
+
+    def drain(self):
+        """
+        Take everything posted since the last frame.
+
+        Returns:
+            Tuple of (calls, progress, logs): a list of (func, args), a
+            dict of key -> latest value, and a list of
+            (text, level, section) log tuples
+        """
+        with self._lock:
+            self.frames += 1
+            calls, self._calls = self._calls, []
+            progress, self._progress = self._progress, {}
+            logs, self._logs = self._logs, []
+        return calls, progress, logs
+
+    def stats(self):
+        return (
+            f"frames {self.frames} • progress {self.progress_posted} posted, "
+            f"{self.progress_merged} merged • log lines {self.logs_posted}"
+        )
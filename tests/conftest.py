@@ -0,0 +1,41 @@
+# conftest.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Makes the app importable as its package for the tests.
+
+The sources live in src/ and import each other relatively, so the
+folder is linked into a temporary folder under the package's name, as
+the benchmarks do.
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+PACKAGE = "switchromtools"
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+if PACKAGE not in sys.modules:
+    _parent = tempfile.mkdtemp(prefix="switchromtools-tests-")
+    os.symlink(SRC_DIR, os.path.join(_parent, PACKAGE))
+    atexit.register(shutil.rmtree, _parent, True)
+    sys.path.insert(0, _parent)
@@ -0,0 +1,201 @@
+# test_admission.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import pytest
+
+from switchromtools import admission
+from switchromtools.admission import (
+    SPACE_MARGIN,
+    SpaceAdmission,
+    SpaceNeed,
+    expected_output_size,
+)
+from switchromtools.nszoptions import (
+    MODE_COMPRESS,
+    MODE_DECOMPRESS,
+    MODE_RECOMPRESS,
+    ConversionOptions,
+)
+from switchromtools.scheduler import ConversionJob, JobScheduler
+
+MIB = 1024 ** 2
+
+
+class Memory:
+    """TuningMemory with fixed ratios."""
+
+    def __init__(self, sampled=None, probe=None):
+        self.sampled = sampled
+        self.probe = probe
+
+    def sampled_ratio(self, key, level):
+        return self.sampled
+
+    def probe_ratio(self, key):
+        return self.probe
+
+
+class Info:
+    uncompressed_size = 1000
+
+
+def make_job(index, size):
+    job = ConversionJob(index, f"/roms/{index}.nsp")
+    job.size = size
+    return job
+
+
+class Disk:
+    """A folder whose free space the test sets."""
+
+    def __init__(self, path):
+        self.path = path
+        self.free = 0
+
+    def __str__(self):
+        return str(self.path)
+
+    def __truediv__(self, name):
+        return self.path / name
+
+
+@pytest.fixture
+def disk(tmp_path, monkeypatch):
+    disk = Disk(tmp_path)
+    monkeypatch.setattr(admission, "free_space", lambda path: disk.free)
+    return disk
+
+
+def sized(size):
+    """Bytes a SpaceNeed of size reserves."""
+    return round(size * (1 + SPACE_MARGIN))
+
+
+def test_expected_output_size():
+    job = make_job(1, 500)
+    compress = ConversionOptions(MODE_COMPRESS, level=18)
+
+    assert expected_output_size(job, compress, None, Memory()) == 500
+    assert expected_output_size(job, compress, None, Memory(sampled=0.5)) == 250
+    assert expected_output_size(job, compress, None, Memory(probe=0.8)) == 400
+    # Never more than the input
+    assert expected_output_size(job, compress, None, Memory(sampled=1.2)) == 500
+
+    decompress = ConversionOptions(MODE_DECOMPRESS)
+    assert expected_output_size(job, decompress, Info(), Memory()) == 1000
+    assert expected_output_size(job, decompress, None, Memory()) == 500
+
+    recompress = ConversionOptions(MODE_RECOMPRESS, level=18)
+    assert expected_output_size(job, recompress, Info(), Memory(sampled=0.3)) == 300
+    assert expected_output_size(job, recompress, None, Memory(sampled=0.3)) == 500
+
+
+def test_admit_within_free_space(disk):
+    disk.free = 10 * MIB + sized(300)
+    space = SpaceAdmission(
+        lambda job: [SpaceNeed(str(disk), job.size)], headroom=10 * MIB
+    )
+    first, second = make_job(1, 200), make_job(2, 200)
+    for job in (first, second):
+        space.prepare(job)
+    space.refresh()
+
+    assert space.admit(first)
+    assert space.shortfall(second) == (str(disk), sized(200), sized(300) - sized(200))
+    assert not space.admit(second)
+
+    space.release(first)
+    space.refresh()
+    assert space.admit(second)
+
+
+def test_reservation_shrinks_as_the_output_is_written(disk):
+    output = disk / "1.nsz"
+    disk.free = sized(300)
+    space = SpaceAdmission(
+        lambda job: [SpaceNeed(str(disk), job.size, str(output))], headroom=0
+    )
+    first, second = make_job(1, 200), make_job(2, 200)
+    for job in (first, second):
+        space.prepare(job)
+    space.refresh()
+    assert space.admit(first)
+    assert space.reserved == sized(200)
+
+    # The written bytes already show in the free space
+    output.write_bytes(b"\0" * 150)
+    assert space.reserved == sized(200) - 150
+    space.refresh()
+    assert space.admit(second)
+
+
+def test_unknown_free_space_is_not_limited(disk):
+    disk.free = None
+    space = SpaceAdmission(lambda job: [SpaceNeed(str(disk), job.size)])
+    job = make_job(1, 10 ** 15)
+    space.prepare(job)
+    space.refresh()
+    assert space.shortfall(job) is None
+    assert space.admit(job)
+
+
+def test_waiting_is_reported_once(disk):
+    disk.free = 0
+    waiting = []
+    space = SpaceAdmission(
+        lambda job: [SpaceNeed(str(disk), job.size)],
+        headroom=0,
+        on_waiting=lambda job, *shortfall: waiting.append(job.index),
+    )
+    job = make_job(1, 100)
+    space.prepare(job)
+    space.refresh()
+    assert not space.admit(job)
+    assert not space.admit(job)
+    assert waiting == [1]
+
+
+def test_scheduler_waits_then_rejects(disk):
+    disk.free = sized(300)
+    space = SpaceAdmission(lambda job: [SpaceNeed(str(disk), job.size)], headroom=0)
+    started, rejected, done = [], [], {}
+
+    def start_job(job, finish):
+        started.append(job.index)
+        done[job.index] = finish
+
+    scheduler = JobScheduler(
+        2, start_job, admission=space,
+        on_rejected=lambda job: rejected.append(job.index),
+    )
+    jobs = [make_job(1, 200), make_job(2, 200), make_job(3, 1000)]
+    for job in jobs:
+        space.prepare(job)
+        scheduler.submit(job)
+
+    # 2 waits for 1; 3 waits too, since something is still running
+    assert started == [1] and rejected == []
+
+    done.pop(1)()
+    assert started == [1, 2] and rejected == []
+
+    # Nothing running will make room for 3
+    done.pop(2)()
+    assert rejected == [3]
+    assert started == [1, 2]
@@ -0,0 +1,124 @@
+# test_journal.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+
+from switchromtools.journal import (
+    FILE_DONE,
+    FILE_FAILED,
+    FILE_RUNNING,
+    BatchJournal,
+    discard_journal,
+    load_journal,
+    remove_partial_output,
+)
+from switchromtools.nszoptions import MODE_COMPRESS, ConversionOptions
+
+
+def start(path, folder="/roms"):
+    options = ConversionOptions(MODE_COMPRESS, level=18)
+    return BatchJournal.start(str(path), folder, 1, options)
+
+
+def test_resumable_batch(tmp_path):
+    path = tmp_path / "compress-batch.journal"
+    journal = start(path)
+    journal.queued(["/roms/a.nsp", "/roms/b.nsp", "/roms/c.nsp"])
+    journal.running("/roms/a.nsp", "/roms/a.nsz")
+    journal.finished("/roms/a.nsp", FILE_DONE)
+    journal.running("/roms/b.nsp", "/roms/b.nsz")
+    journal.close()
+
+    state = load_journal(str(path))
+    assert state.folder == "/roms"
+    assert state.depth == 1
+    assert state.options.level == 18
+    assert state.files["/roms/b.nsp"] == FILE_RUNNING
+    assert state.pending() == ["/roms/b.nsp", "/roms/c.nsp"]
+    assert state.interrupted_outputs() == ["/roms/b.nsz"]
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = tmp_path / "compress-batch.journal"
+    journal = start(path)
+    journal.queued(["/roms/a.nsp", "/roms/b.nsp"])
+    journal.finished("/roms/a.nsp", FILE_FAILED)
+    journal.close()
+    with open(path, "a") as f:
+        f.write(json.dumps({"op": FILE_DONE, "path": "/roms/b.nsp"})[:20])
+
+    state = load_journal(str(path))
+    assert state.files == {"/roms/a.nsp": FILE_FAILED, "/roms/b.nsp": "queued"}
+    assert state.pending() == ["/roms/b.nsp"]
+
+
+def test_completed_batch_leaves_nothing_to_resume(tmp_path):
+    path = tmp_path / "compress-batch.journal"
+    journal = start(path)
+    journal.queued(["/roms/a.nsp"])
+    journal.finished("/roms/a.nsp", FILE_DONE)
+    journal.complete()
+
+    assert not path.exists()
+    assert load_journal(str(path)) is None
+
+
+def test_missing_journal(tmp_path):
+    assert load_journal(str(tmp_path / "none.journal")) is None
+
+
+def test_remove_partial_output(tmp_path):
+    output = tmp_path / "a.nsz"
+    output.write_bytes(b"partial")
+    folder = tmp_path / ".recompress-x"
+    folder.mkdir()
+    (folder / "a.nca").write_bytes(b"title")
+
+    assert remove_partial_output(str(output))
+    assert remove_partial_output(str(folder))
+    assert not output.exists() and not folder.exists()
+    assert not remove_partial_output(str(output))
+    # Any OSError, not only a missing file
+    assert not remove_partial_output(str(tmp_path / "not-a-dir" / "a.nsz" / "x"))
+
+
+def test_new_batch_discards_unfinished_one(tmp_path):
+    path = tmp_path / "compress-batch.journal"
+    partial = tmp_path / "a.nsz"
+    partial.write_bytes(b"partial")
+    journal = start(path)
+    journal.queued(["/roms/a.nsp"])
+    journal.running("/roms/a.nsp", str(partial))
+    journal.close()
+
+    start(path).close()
+    assert not partial.exists()
+
+
+def test_discard_journal(tmp_path):
+    path = tmp_path / "compress-batch.journal"
+    partial = tmp_path / "a.nsz"
+    partial.write_bytes(b"partial")
+    journal = start(path)
+    journal.queued(["/roms/a.nsp"])
+    journal.running("/roms/a.nsp", str(partial))
+    journal.close()
+
+    assert discard_journal(load_journal(str(path))) == [str(partial)]
+    assert not path.exists()
@@ -0,0 +1,71 @@
+# test_outputparser.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from switchromtools.outputparser import LineSplitter
+
+
+def feed_all(splitter, *chunks):
+    lines = []
+    for chunk in chunks:
+        lines.extend(splitter.feed(chunk))
+    return lines
+
+
+def test_lines_and_redraws():
+    splitter = LineSplitter()
+    assert feed_all(splitter, b"first\n 10%\r 20%\rlast\r\n") == [
+        ("first", False),
+        ("10%", True),
+        ("20%", True),
+        ("last", False),
+    ]
+    assert splitter.pending == 0
+
+
+def test_partial_line_waits_for_its_ending():
+    splitter = LineSplitter()
+    assert splitter.feed(b"[VERIFIED] fo") == []
+    assert splitter.feed(b"o.nca\n") == [("[VERIFIED] foo.nca", False)]
+
+
+def test_crlf_split_across_chunks():
+    splitter = LineSplitter()
+    assert feed_all(splitter, b"[VERIFIED] foo.nca\r", b"\nnext\r\n") == [
+        ("[VERIFIED] foo.nca", False),
+        ("next", False),
+    ]
+
+
+def test_trailing_cr_is_a_redraw_once_more_output_follows():
+    splitter = LineSplitter()
+    assert splitter.feed(b" 10%\r") == []
+    assert splitter.feed(b" 20%") == [("10%", True)]
+
+
+def test_flush_returns_the_unterminated_rest():
+    splitter = LineSplitter()
+    splitter.feed(b"done\n 99%\r")
+    assert splitter.flush() == " 99%"
+    assert splitter.flush() == ""
+
+
+def test_multibyte_character_split_across_chunks():
+    data = "Ünïcode ✓\n".encode()
+    splitter = LineSplitter()
+    assert feed_all(splitter, data[:2], data[2:9], data[9:]) == [("Ünïcode ✓", False)]
@@ -0,0 +1,120 @@
+# test_placement.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import errno
+import os
+
+import pytest
+
+from switchromtools.placement import PART_SUFFIX, Placement
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_outputs_next_to_their_sources():
+    placement = Placement(root="/roms")
+    assert placement.final_dir("/roms/a/b.nsp") == "/roms/a"
+    assert placement.write_dir("/roms/a/b.nsp") == "/roms/a"
+    assert not placement.staged
+
+
+def test_subfolders_are_kept():
+    placement = Placement("/roms", output_dir="/out", scratch_dir="/fast")
+    assert placement.final_dir("/roms/b.nsp") == "/out"
+    assert placement.final_dir("/roms/x/y/b.nsp") == "/out/x/y"
+    assert placement.write_dir("/roms/x/y/b.nsp") == "/fast/x/y"
+    assert placement.staged
+
+
+def test_sources_outside_root_go_to_the_top():
+    placement = Placement("/roms", output_dir="/out")
+    assert placement.final_dir("/other/b.nsp") == "/out"
+    assert placement.final_dir("/b.nsp") == "/out"
+    assert Placement(output_dir="/out").final_dir("/roms/x/b.nsp") == "/out"
+
+
+def test_move_to_final(tmp_path):
+    staged = write(tmp_path / "scratch" / "b.nsz", b"new")
+    final = str(tmp_path / "out" / "x" / "b.nsz")
+
+    Placement().move_to_final(staged, final)
+    assert open(final, "rb").read() == b"new"
+    assert not os.path.exists(staged)
+
+
+def test_move_does_not_overwrite(tmp_path):
+    staged = write(tmp_path / "scratch" / "b.nsz", b"new")
+    final = write(tmp_path / "out" / "b.nsz", b"old")
+
+    with pytest.raises(FileExistsError):
+        Placement().move_to_final(staged, final)
+    assert open(final, "rb").read() == b"old"
+    assert os.path.exists(staged)
+
+    Placement().move_to_final(staged, final, replace=True)
+    assert open(final, "rb").read() == b"new"
+    assert not os.path.exists(staged)
+
+
+def test_move_without_hard_links(tmp_path, monkeypatch):
+    def link(source, target):
+        raise OSError(errno.EPERM, "Operation not permitted")
+
+    monkeypatch.setattr(os, "link", link)
+    staged = write(tmp_path / "scratch" / "b.nsz", b"new")
+    final = write(tmp_path / "out" / "b.nsz", b"old")
+
+    with pytest.raises(FileExistsError):
+        Placement().move_to_final(staged, final)
+    assert open(final, "rb").read() == b"old"
+
+    os.remove(final)
+    Placement().move_to_final(staged, final)
+    assert open(final, "rb").read() == b"new"
+    assert not os.path.exists(staged)
+
+
+def test_move_across_file_systems(tmp_path, monkeypatch):
+    real_link = os.link
+
+    def link(source, target):
+        # Only the .part copy is on the same file system as final
+        if not source.endswith(PART_SUFFIX):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        real_link(source, target)
+
+    monkeypatch.setattr(os, "link", link)
+    staged = write(tmp_path / "scratch" / "b.nsz", b"new")
+    final = write(tmp_path / "out" / "b.nsz", b"old")
+
+    with pytest.raises(FileExistsError):
+        Placement().move_to_final(staged, final)
+    assert open(final, "rb").read() == b"old"
+    assert os.path.exists(staged)
+    assert not os.path.exists(final + PART_SUFFIX)
+
+    os.remove(final)
+    Placement().move_to_final(staged, final)
+    assert open(final, "rb").read() == b"new"
+    assert not os.path.exists(staged)
+    assert not os.path.exists(final + PART_SUFFIX)
@@ -0,0 +1,84 @@
+# test_planner.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from switchromtools import planner
+from switchromtools.planner import (
+    estimate_batch_seconds,
+    grant_threads,
+    plan_batch,
+    threads_for_size,
+)
+from switchromtools.scheduler import ConversionJob
+
+GIB = 1024 ** 3
+
+
+def test_threads_for_size():
+    assert threads_for_size(8 * GIB, 4, 16) == 8
+    assert threads_for_size(8 * GIB, 4, 6) == 6
+    assert threads_for_size(1 * GIB, 4, 16) == 4
+    assert threads_for_size(100, 4, 16) == 2
+    assert threads_for_size(100, 1, 16) == 1
+
+
+def test_grant_threads_within_unused_budget():
+    # Nothing else running: the whole request
+    assert grant_threads(8, 4, 8, 0) == 8
+    # Another job holds its share: only what is left
+    assert grant_threads(8, 4, 8, 4) == 4
+    assert grant_threads(8, 4, 10, 4) == 6
+    # Never below the fair share
+    assert grant_threads(8, 4, 8, 8) == 4
+    # Small requests are granted as they are
+    assert grant_threads(2, 4, 8, 8) == 2
+    assert grant_threads(0, 0, 8, 0) == 0
+
+
+def test_plan_batch_orders_largest_first(tmp_path, monkeypatch):
+    sizes = {"small.nsp": 10, "large.xci": 3000, "medium.nsp": 500}
+    for name, size in sizes.items():
+        (tmp_path / name).write_bytes(b"\0" * size)
+    monkeypatch.setattr(planner, "LARGE_FILE_SIZE", 2000)
+    monkeypatch.setattr(planner, "SMALL_FILE_SIZE", 100)
+
+    jobs = plan_batch([str(tmp_path / name) for name in sizes], 2, 8, start_index=5)
+
+    assert [job.name for job in jobs] == ["large.xci", "medium.nsp", "small.nsp"]
+    assert [job.index for job in jobs] == [5, 6, 7]
+    assert [job.threads for job in jobs] == [8, 4, 2]
+    assert [job.size for job in jobs] == [3000, 500, 10]
+
+
+def test_plan_batch_single_worker_gets_the_whole_budget(tmp_path):
+    (tmp_path / "a.nsp").write_bytes(b"\0")
+    jobs = plan_batch([str(tmp_path / "a.nsp")], 1, 0)
+    assert jobs[0].threads == 0
+
+
+def test_estimate_batch_seconds():
+    jobs = []
+    for index, size in enumerate((300, 200, 100, 100), 1):
+        job = ConversionJob(index, f"/roms/{index}.nsp")
+        job.size = size
+        jobs.append(job)
+
+    assert estimate_batch_seconds(jobs, 2, None) is None
+    # 300 on one worker, 200 + 100 + 100 on the other
+    assert estimate_batch_seconds(jobs, 2, 100) == 4.0
+    assert estimate_batch_seconds(jobs, 1, 100) == 7.0
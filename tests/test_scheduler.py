@@ -0,0 +1,131 @@
+# test_scheduler.py
+#
+# Copyright 2026 leon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+
+from switchromtools.scheduler import ConversionJob, JobScheduler, split_threads
+
+
+class Pool:
+    """start_job() that records started jobs and lets the test finish them."""
+
+    def __init__(self, max_workers, **kwargs):
+        self.started = []
+        self._done = {}
+        self.scheduler = JobScheduler(max_workers, self.start_job, **kwargs)
+
+    def start_job(self, job, done):
+        self.started.append(job.index)
+        self._done[job.index] = done
+
+    def finish(self, index):
+        self._done.pop(index)()
+
+    @property
+    def running(self):
+        return sorted(self._done)
+
+
+def jobs(count, devices=None):
+    made = []
+    for index in range(1, count + 1):
+        job = ConversionJob(index, f"/roms/{index}.nsp")
+        if devices:
+            job.devices = devices[index - 1]
+        made.append(job)
+    return made
+
+
+def test_split_threads():
+    assert split_threads(8, 1) == 8
+    assert split_threads(0, 1) == 0
+    assert split_threads(8, 3) == 2
+    assert split_threads(2, 4) == 1
+    assert split_threads(0, 2) == max(1, (os.cpu_count() or 1) // 2)
+
+
+def test_runs_at_most_max_workers_in_order():
+    pool = Pool(2)
+    for job in jobs(4):
+        pool.scheduler.submit(job)
+    assert pool.started == [1, 2]
+
+    pool.finish(2)
+    assert pool.started == [1, 2, 3]
+    pool.finish(1)
+    pool.finish(3)
+    assert pool.started == [1, 2, 3, 4]
+
+
+def test_hold_and_release():
+    pool = Pool(1)
+    pool.scheduler.hold()
+    for job in jobs(2):
+        pool.scheduler.submit(job)
+    assert pool.started == []
+
+    pool.scheduler.release()
+    assert pool.started == [1]
+    pool.scheduler.hold()
+    pool.finish(1)
+    assert pool.started == [1]
+    pool.scheduler.release()
+    assert pool.started == [1, 2]
+
+
+def test_jobs_on_other_disks_overtake_a_busy_disk():
+    pool = Pool(3, device_limit=1)
+    for job in jobs(3, devices=[("a",), ("a",), ("b",)]):
+        pool.scheduler.submit(job)
+    assert pool.started == [1, 3]
+
+    pool.finish(1)
+    assert pool.started == [1, 3, 2]
+
+
+def test_join_returns_once_closed_and_idle():
+    pool = Pool(2)
+    for job in jobs(2):
+        pool.scheduler.submit(job)
+    pool.scheduler.close()
+    pool.finish(1)
+    pool.finish(2)
+    pool.scheduler.join()  # Would block if the pool were not idle
+    assert pool.running == []
+
+
+def test_stop_drops_queued_jobs():
+    pool = Pool(1)
+    for job in jobs(3):
+        pool.scheduler.submit(job)
+    pool.scheduler.stop()
+    pool.finish(1)
+    assert pool.started == [1]
+
+
+def test_job_finishing_inside_start_job():
+    started = []
+
+    def start_job(job, done):
+        started.append(job.index)
+        done()
+
+    scheduler = JobScheduler(1, start_job)
+    scheduler.run(jobs(3))
+    assert started == [1, 2, 3]